@@ -7,79 +7,3638 @@
  * License: MIT
  */
 
-#include <string>
+#include <algorithm>
+#include <atomic>
+#include <bit>
+#include <chrono>
 #include <cmath>
+#include <cstdint>
+#include <cstdlib>
+#include <cstring>
+#include <mutex>
+#include <string>
+#include <thread>
+#include <type_traits>
+#include <vector>
 #ifndef PY_SSIZE_T_CLEAN
     #define PY_SSIZE_T_CLEAN
 #endif
 #include <Python.h>
+#include <structmember.h>
+
+/* Vector kernels of x86-64 are compiled for each instruction set and selected at import time,
+   so the baseline flags still produce a module that runs on any x86-64 CPU */
+#if defined(__x86_64__) || defined(_M_X64)
+    #define SIGNUM_X86 1
+    #include <immintrin.h>
+    #if defined(_MSC_VER) && !defined(__clang__)
+        #include <intrin.h>
+        #define SIGNUM_TARGET(isa)
+    #else
+        #define SIGNUM_TARGET(isa) __attribute__((target(isa)))
+    #endif
+#endif
+
+/* Memory-mapped files of 'sign_file' */
+#ifdef _WIN32
+    #define WIN32_LEAN_AND_MEAN
+    #define NOMINMAX
+    #include <windows.h>
+#else
+    #include <fcntl.h>
+    #include <sys/mman.h>
+    #include <sys/stat.h>
+    #include <unistd.h>
+#endif
+
+/* Per-object locks of the free-threaded build (PEP 703); with the GIL they are no-ops */
+#if PY_VERSION_HEX < 0x030D0000
+    #define Py_BEGIN_CRITICAL_SECTION(op) {
+    #define Py_END_CRITICAL_SECTION() }
+#endif
+
+#if PY_VERSION_HEX < 0x03090000
+    #define PyObject_Vectorcall _PyObject_Vectorcall
+    static inline PyObject *PyObject_CallMethodNoArgs(PyObject *o, PyObject *name)
+    {
+        return PyObject_CallMethodObjArgs(o, name, NULL);
+    }
+#endif
+
+/* --- MODULE STATE --- */
+
+/* Everything the module owns, one copy per (sub)interpreter: isolated interpreters share no objects (PEP 684) */
+struct SignumState {
+    /* Keywords (argument names) */
+    PyObject *kw_if_exc;
+    PyObject *kw_preprocess;
+    PyObject *kw_codeshift;
+    PyObject *kw_fast;
+    PyObject *kw_as_array;
+    PyObject *kw_frombytes;
+    PyObject *kw_out;
+    PyObject *kw_batch;
+    PyObject *kw_weights;
+    PyObject *kw_invalid;
+    PyObject *kw_reorder;
+    PyObject *kw_column;
+    PyObject *kw_delimiter;
+    PyObject *kw_skip;
+    PyObject *kw_threads;
+    PyObject *kw_packed;
+    PyObject *kw_chunk;
+    PyObject *kw_progress;
+
+    /* Attribute and method names */
+    PyObject *kw_numerator;
+    PyObject *kw_is_nan;
+    PyObject *kw_is_snan;
+    PyObject *kw_is_zero;
+    PyObject *kw_is_signed;
+    PyObject *kw_sign;
+
+    /* 'int(-1)', 'int(0)', 'int(1)', "float('nan')"; the small ints are immortal since Python 3.12, so threads
+       do not contend for their reference counts in the free-threaded build */
+    PyObject *Py_m_one;
+    PyObject *Py_zero;
+    PyObject *Py_one;
+    PyObject *Py_float_nan;
+
+    /* 'array.array' and its typecodes 'b' and 'q' for compact results */
+    PyObject *Py_array_type;
+    PyObject *Py_typecode_b;
+    PyObject *Py_typecode_q;
+
+    /* Built-in 'round' for the 'round_to' preprocessor */
+    PyObject *Py_round;
+
+    /* Types created at module initialization */
+    PyObject *Isign_Type;
+    PyObject *Preproc_Type;
+    PyObject *SignError_Type;
+    PyObject *Signer_Type;
+
+    /* 'fractions.Fraction' and 'decimal.Decimal', resolved when their first instance is seen */
+    std::atomic<PyTypeObject *> fraction_type;
+    std::atomic<PyTypeObject *> decimal_type;
+
+    /* Sign implementations registered by 'signum.register': {type: callable or attribute name} */
+    PyObject *sign_registry;
+    /* Zeros registered by 'signum.register_zero': {type: zero to compare with} */
+    PyObject *zero_registry;
+    /* Types registered by 'signum.register_invalid': {type}, never ordered against zero */
+    PyObject *invalid_registry;
+    /* Changes at every registration to invalidate cached strategies; see 'epoch_source' */
+    std::atomic<unsigned int> registry_epoch;
+    #ifdef Py_GIL_DISABLED
+        /* Everything ever registered: cached strategies borrow from the registries without the GIL */
+        PyObject *registry_kept;
+    #endif
+    /* Default zeros already registered, by the index in 'default_zeros' (see there) */
+    std::atomic<bool> zero_done[3];
+
+    /* Deprecation warning control */
+    std::atomic<bool> warn_flag;
+
+    /* Latency sampling of 'signum.profile': about one call in 'profile_rate' is timed per thread; 0 is off */
+    std::atomic<unsigned int> profile_rate;
+    uint64_t profile_overhead;       /* Nanoseconds of two clock readings, subtracted from every sample */
+    std::mutex profile_mutex;        /* Guards 'profile' */
+    struct ProfileEntry *profile;    /* 'PROFILE_SLOTS' entries, allocated when sampling is first enabled */
+};
+
+/* Epochs are unique in the process: the thread-local strategy cache is shared by all interpreters that run on
+   a thread, and an entry of one interpreter (or of an unloaded module) must never match another */
+static std::atomic<unsigned int> epoch_source{0};
+
+static inline unsigned int new_epoch()
+{
+    return epoch_source.fetch_add(1, std::memory_order_relaxed) + 1;
+}
+
+static inline SignumState *signum_state(PyObject *module)
+{
+    return (SignumState *)PyModule_GetState(module);
+}
+
+#if PY_VERSION_HEX < 0x03090000
+    /* Python 3.8: types cannot find their module; only one module exists, as with single-phase initialization */
+    static PyObject *signum_module = NULL;
+    #define PyType_FromModuleAndSpec(module, spec, bases) PyType_FromSpecWithBases(spec, bases)
+    #define PyType_GetModuleState(type) PyModule_GetState(signum_module)
+#endif
+
+/* The module state of an instance of a type of the module */
+static inline SignumState *type_state(PyTypeObject *type)
+{
+    return (SignumState *)PyType_GetModuleState(type);
+}
+
+/* Quinary codes of 'sign' results; 'codeshift' is added to them */
+enum {
+    SIGN_RAISE = -3, /* Internal: Python error is set and must be raised */
+    SIGN_ERR   = -2, /* Invalid argument */
+    SIGN_NEG   = -1,
+    SIGN_ZERO  =  0,
+    SIGN_POS   =  1,
+    SIGN_NAN   =  2,
+    SIGN_OBJ   =  3  /* Internal: the result is a ready object ('preprocess' early exit or 'if_exc') */
+};
+
+/* Options of a 'sign' call, parsed once and shared by the bulk functions */
+struct SignOptions {
+    bool      no_codeshift;
+    long      c_codeshift;
+    PyObject *if_exc;
+    PyObject *preprocess;
+    bool      fast;         /* 'fastsign' semantics instead of the Triple Check */
+    SignumState *st;        /* The module state of the calling module */
+};
+
+/* Branchless sign codes: NaN fails all comparisons and gets code 2 */
+static inline signed char sign_code_of(double v)
+{
+    return (signed char)((v > 0.0) - (v < 0.0) + ((v != v) << 1));
+}
+
+static inline signed char sign_code_of(int64_t v)
+{
+    return (signed char)((v > 0) - (v < 0));
+}
+
+static inline signed char sign_code_of(uint64_t v)
+{
+    return (signed char)(v > 0);
+}
+
+/* --- STATISTICS --- */
+
+/* Counters of the exit paths of 'sign' and 'fastsign', read by 'signum.stats()'. Counting is off until enabled at
+   run time ('stats(enable=True)' or the environment variable SIGNUM_STATS); a build with SIGNUM_STATS=0 has none */
+#ifndef SIGNUM_STATS
+    #define SIGNUM_STATS 1
+#endif
+
+enum StatId {
+    STAT_SIGN_EXACT, STAT_SIGN_IMPL, STAT_SIGN_INVALID, STAT_SIGN_NAN, STAT_SIGN_NOCMP, STAT_SIGN_TRIPLE,
+    STAT_SIGN_NAN_PROBE, STAT_FAST_EXACT, STAT_FAST_IMPL, STAT_FAST_INVALID, STAT_FAST_COMPARE, STAT_FAST_FLOAT,
+    STAT_CACHE_HIT, STAT_CACHE_MISS, STAT_PP_DECIDED, STAT_PP_RESULT, STAT_PP_ERROR, STAT_IF_EXC, STAT_CODESHIFT,
+    STAT_RAISED, STAT_RENDERED, STAT_COUNT
+};
+
+/* The keys of 'signum.stats()', in the order of 'StatId' */
+static const char *const stat_names[STAT_COUNT] = {
+    "sign.exact",               /* Exact 'int', 'float', 'Fraction', 'Decimal' */
+    "sign.registered",          /* 'register' or '__sign__' */
+    "sign.known_invalid",       /* Cached or registered as invalid: no probing */
+    "sign.nan_shortcut",        /* NaN found by '__float__' */
+    "sign.not_comparable",      /* Cached as never compared with 'int' */
+    "sign.triple_check",        /* Compared with zero, whatever the outcome */
+    "sign.nan_probe",           /* The self-equality probe after three 'False' */
+    "fastsign.exact",
+    "fastsign.registered",
+    "fastsign.known_invalid",
+    "fastsign.compare",         /* Decided by the comparisons */
+    "fastsign.float_fallback",  /* Decided by, or failed in, 'PyFloat_AsDouble' */
+    "cache.hit",                /* Strategy cache: found */
+    "cache.miss",               /* Strategy cache: probed */
+    "preprocess.decided",       /* A native preprocessor decided the code */
+    "preprocess.result",        /* 'preprocess' replaced the result */
+    "preprocess.error",         /* 'preprocess' raised; the error was ignored */
+    "if_exc",                   /* An invalid argument returned 'if_exc[0]' */
+    "codeshift_error",          /* An invalid argument returned '-2 + codeshift' */
+    "error.raised",             /* 'SignError' raised */
+    "error.rendered",           /* 'SignError' message built */
+};
+
+#if SIGNUM_STATS
+/* Counters of one thread: only the owner writes them, without read-modify-write; 'stats()' reads all threads */
+struct StatsBlock {
+    std::atomic<uint64_t> n[STAT_COUNT];
+    StatsBlock *prev, *next;
+    StatsBlock();
+    ~StatsBlock();
+};
+
+/* Process-wide: counters are not per interpreter, as the threads that run the interpreters are not */
+static std::atomic<bool> stats_enabled{false};
+static std::mutex stats_mutex;                 /* Guards everything below */
+static StatsBlock *stats_threads = NULL;       /* Live threads that have counted */
+static uint64_t stats_retired[STAT_COUNT];     /* Counts of finished threads */
+static uint64_t stats_base[STAT_COUNT];        /* Totals at the last reset: resetting never writes to other threads */
+
+StatsBlock::StatsBlock() : n{}, prev(NULL)
+{
+    std::lock_guard<std::mutex> lock(stats_mutex);
+    next = stats_threads;
+    if (next) next->prev = this;
+    stats_threads = this;
+}
+
+StatsBlock::~StatsBlock()
+{
+    std::lock_guard<std::mutex> lock(stats_mutex);
+    for (int i = 0; i < STAT_COUNT; i++) stats_retired[i] += n[i].load(std::memory_order_relaxed);
+    if (prev) prev->next = next; else stats_threads = next;
+    if (next) next->prev = prev;
+}
+
+/* Count one exit; when counting is off, this is one relaxed load */
+static inline void stat_add(StatId id)
+{
+    if (!stats_enabled.load(std::memory_order_relaxed)) return;
+    static thread_local StatsBlock block;
+    std::atomic<uint64_t> &c = block.n[id];
+    c.store(c.load(std::memory_order_relaxed) + 1, std::memory_order_relaxed);
+}
+
+/* Totals of all threads since the start of the process; 'stats_mutex' must be held */
+static void stats_totals(uint64_t *tot)
+{
+    std::memcpy(tot, stats_retired, sizeof(stats_retired));
+    for (StatsBlock *b = stats_threads; b; b = b->next)
+        for (int i = 0; i < STAT_COUNT; i++) tot[i] += b->n[i].load(std::memory_order_relaxed);
+}
+#else
+    #define stat_add(id) ((void)0)
+#endif
+
+/* 'stats(reset=False, *, enable=None)': {name: count} since the last reset, then reset and/or switch counting */
+static PyObject *signum_stats(PyObject *module, PyObject *args, PyObject *kwargs)
+{
+    static const char *kwlist[] = {"reset", "enable", NULL};
+    int reset = 0;
+    PyObject *enable = Py_None;
+    if (!PyArg_ParseTupleAndKeywords(args, kwargs, "|p$O:stats", (char **)kwlist, &reset, &enable)) return NULL;
+    int on = enable == Py_None ? -1 : PyObject_IsTrue(enable);
+    if (on < 0 && PyErr_Occurred()) return NULL;
+
+    PyObject *res = PyDict_New();
+    if (res == NULL) return NULL;
+    #if SIGNUM_STATS
+        uint64_t tot[STAT_COUNT];
+        {
+            std::lock_guard<std::mutex> lock(stats_mutex);
+            stats_totals(tot);
+            for (int i = 0; i < STAT_COUNT; i++) {
+                uint64_t v = tot[i] - stats_base[i];
+                if (reset) stats_base[i] = tot[i];
+                tot[i] = v;
+            }
+        }
+        for (int i = 0; i < STAT_COUNT; i++) {
+            PyObject *v = PyLong_FromUnsignedLongLong(tot[i]);
+            if (v == NULL || PyDict_SetItemString(res, stat_names[i], v) < 0) {
+                Py_XDECREF(v);
+                Py_DECREF(res);
+                return NULL;
+            }
+            Py_DECREF(v);
+        }
+        if (on >= 0) stats_enabled.store(on != 0, std::memory_order_relaxed);
+    #else
+        if (on > 0) {
+            Py_DECREF(res);
+            PyErr_SetString(PyExc_RuntimeError, "signum.stats(): the module was built with SIGNUM_STATS=0");
+            return NULL;
+        }
+    #endif
+    return res;
+}
+
+/* --- LATENCY PROFILE --- */
+
+/* Sampled latencies of 'sign' and 'fastsign' by the type of the argument and the option set, read by
+   'signum.profile()'. The table is bounded: when its slots are taken, other pairs share the last one */
+#define PROFILE_SLOTS    64
+#define PROFILE_BUCKETS  128         /* 4 per power of 2 of nanoseconds: exact below 4 ns, then within 25% */
+#define PROFILE_MAX_RATE (1u << 30)
+
+/* Option sets of sampled calls, named by 'profile_option_names' */
+enum {
+    PROF_FAST      = 1,  /* 'fastsign' semantics */
+    PROF_PREPROC   = 2,
+    PROF_NATIVE_PP = 4,
+    PROF_IF_EXC    = 8,
+    PROF_CODESHIFT = 16
+};
+static const char *const profile_option_names[] = {
+    "fastsign", "preprocess", "native preprocess", "if_exc", "codeshift"
+};
+
+struct ProfileEntry {
+    PyObject *type;                  /* Strong reference; NULL in free slots and in the shared last slot */
+    unsigned int opts;
+    uint64_t samples, total_ns, max_ns;
+    uint64_t hist[PROFILE_BUCKETS];  /* Samples by 'profile_bucket' */
+};
+
+static inline unsigned int profile_bucket(uint64_t ns)
+{
+    if (ns < 4) return (unsigned int)ns;
+    if (ns >> 32) return PROFILE_BUCKETS - 1;
+    int e = std::bit_width(ns) - 1;
+    return (unsigned int)(4 * (e - 1) + ((ns >> (e - 2)) & 3));
+}
+
+/* The largest number of nanoseconds in bucket 'b' */
+static inline uint64_t profile_bucket_last(unsigned int b)
+{
+    if (b < 4) return b;
+    return ((uint64_t)(5 + b % 4) << (b / 4 - 1)) - 1;
+}
+
+static inline uint64_t profile_now()
+{
+    return (uint64_t)std::chrono::duration_cast<std::chrono::nanoseconds>(
+        std::chrono::steady_clock::now().time_since_epoch()).count();
+}
+
+/* The cost of two clock readings, measured once per interpreter and subtracted from every sample */
+static uint64_t profile_clock_overhead()
+{
+    uint64_t best = UINT64_MAX;
+    for (int i = 0; i < 200; i++) {
+        uint64_t start = profile_now();
+        best = std::min(best, profile_now() - start);
+    }
+    return best;
+}
+
+/* Countdown to the next sampled call of this thread, and its random generator */
+static thread_local int profile_countdown = 0;
+static thread_local uint32_t profile_random = 0;
+
+/* Whether this call is sampled. Gaps are random with the mean 'profile_rate', so periodic data is not aliased;
+   when sampling is off, this is one relaxed load */
+static inline bool profile_due(SignumState *st)
+{
+    unsigned int rate = st->profile_rate.load(std::memory_order_relaxed);
+    if (rate == 0) return false;
+    if (--profile_countdown > 0 && profile_countdown < (int)(2 * rate - 1)) return false; /* Or the rate was lowered */
+    if (profile_random == 0) profile_random = (uint32_t)(uintptr_t)&profile_random | 1;
+    profile_random ^= profile_random << 13; /* xorshift32 */
+    profile_random ^= profile_random >> 17;
+    profile_random ^= profile_random << 5;
+    profile_countdown = 1 + (int)(profile_random % (2 * rate - 1));
+    return true;
+}
+
+static inline unsigned int profile_options(const SignOptions *opt)
+{
+    unsigned int opts = opt->fast ? PROF_FAST : 0;
+    if (opt->preprocess != Py_None)
+        opts |= Py_TYPE(opt->preprocess) == (PyTypeObject *)opt->st->Preproc_Type ? PROF_NATIVE_PP : PROF_PREPROC;
+    if (opt->if_exc != Py_None) opts |= PROF_IF_EXC;
+    if (!opt->no_codeshift) opts |= PROF_CODESHIFT;
+    return opts;
+}
+
+/* Add a sample of 'ns' nanoseconds, the clock readings included, for type 'T' and options 'opts' */
+static void profile_record(SignumState *st, PyTypeObject *T, unsigned int opts, uint64_t ns)
+{
+    ns = ns > st->profile_overhead ? ns - st->profile_overhead : 0;
+    std::lock_guard<std::mutex> lock(st->profile_mutex);
+    ProfileEntry *tab = st->profile;
+    if (tab == NULL) return;
+
+    ProfileEntry *e = &tab[PROFILE_SLOTS - 1]; /* The shared slot, if the others are taken */
+    size_t h = (((uintptr_t)T >> 4) ^ (opts * 0x9E3779B9u)) % (PROFILE_SLOTS - 1);
+    for (size_t i = 0; i < PROFILE_SLOTS - 1; i++) {
+        ProfileEntry *c = &tab[(h + i) % (PROFILE_SLOTS - 1)];
+        if (c->type == NULL) {
+            Py_INCREF(T); /* Released by a reset; never decremented under the lock, see 'profile_release' */
+            c->type = (PyObject *)T;
+            c->opts = opts;
+            e = c;
+            break;
+        }
+        if (c->type == (PyObject *)T && c->opts == opts) { e = c; break; }
+    }
+    e->samples++;
+    e->total_ns += ns;
+    e->max_ns = std::max(e->max_ns, ns);
+    e->hist[profile_bucket(ns)]++;
+}
+
+/* A copy of the table with new references, or the table itself when 'reset' is true (then a new one is installed).
+   Returns NULL with error set */
+static ProfileEntry *profile_take(SignumState *st, bool reset)
+{
+    ProfileEntry *copy = PyMem_New(ProfileEntry, PROFILE_SLOTS);
+    if (copy == NULL) { PyErr_NoMemory(); return NULL; }
+    std::memset(copy, 0, PROFILE_SLOTS * sizeof(ProfileEntry));
+    std::lock_guard<std::mutex> lock(st->profile_mutex);
+    if (st->profile == NULL) return copy; /* Never enabled */
+    if (reset) {
+        std::swap(copy, st->profile);
+    } else {
+        std::memcpy(copy, st->profile, PROFILE_SLOTS * sizeof(ProfileEntry));
+        for (int i = 0; i < PROFILE_SLOTS; i++) Py_XINCREF(copy[i].type);
+    }
+    return copy;
+}
+
+/* Release a table taken by 'profile_take'. Outside the lock: a type deallocated here may run code that calls 'sign' */
+static void profile_release(ProfileEntry *tab)
+{
+    if (tab == NULL) return;
+    for (int i = 0; i < PROFILE_SLOTS; i++) Py_XDECREF(tab[i].type);
+    PyMem_Free(tab);
+}
+
+/* A row of 'profile()' */
+struct ProfileRow {
+    const ProfileEntry *e;
+    uint64_t p50, p90, p99;
+};
+
+static uint64_t profile_quantile(const ProfileEntry *e, double q)
+{
+    uint64_t rank = (uint64_t)std::ceil(q * (double)e->samples), seen = 0;
+    for (unsigned int b = 0; b < PROFILE_BUCKETS; b++) {
+        seen += e->hist[b];
+        if (seen >= rank && seen > 0) return std::min(profile_bucket_last(b), e->max_ns);
+    }
+    return e->max_ns;
+}
+
+/* The sampled entries of 'tab', most total time first */
+static std::vector<ProfileRow> profile_rows(const ProfileEntry *tab, uint64_t *total_ns)
+{
+    std::vector<ProfileRow> rows;
+    *total_ns = 0;
+    for (int i = 0; i < PROFILE_SLOTS; i++) {
+        const ProfileEntry *e = &tab[i];
+        if (e->samples == 0) continue;
+        *total_ns += e->total_ns;
+        rows.push_back({e, profile_quantile(e, 0.5), profile_quantile(e, 0.9), profile_quantile(e, 0.99)});
+    }
+    std::stable_sort(rows.begin(), rows.end(),
+                     [](const ProfileRow &a, const ProfileRow &b) { return a.e->total_ns > b.e->total_ns; });
+    return rows;
+}
+
+/* 'module.qualname' of a profiled type, without 'builtins.'; '(other types)' for the shared slot */
+static PyObject *profile_type_name(PyObject *type)
+{
+    if (type == NULL) return PyUnicode_FromString("(other types)");
+    PyObject *mod = PyObject_GetAttrString(type, "__module__");
+    PyObject *qual = PyObject_GetAttrString(type, "__qualname__");
+    PyObject *res;
+    if (mod == NULL || qual == NULL || !PyUnicode_Check(mod)
+        || PyUnicode_CompareWithASCIIString(mod, "builtins") == 0) {
+        PyErr_Clear();
+        if (qual && PyUnicode_Check(qual)) { Py_INCREF(qual); res = qual; }
+        else res = PyUnicode_FromString(((PyTypeObject *)type)->tp_name);
+    } else {
+        res = PyUnicode_FromFormat("%U.%S", mod, qual);
+    }
+    Py_XDECREF(mod);
+    Py_XDECREF(qual);
+    return res;
+}
+
+/* 'if_exc, codeshift', '-' for none, '*' for the shared slot */
+static std::string profile_options_name(const ProfileEntry *e)
+{
+    if (e->type == NULL) return "*";
+    std::string res;
+    for (unsigned int i = 0; i < std::size(profile_option_names); i++) {
+        if (!(e->opts & (1u << i))) continue;
+        if (!res.empty()) res += ", ";
+        res += profile_option_names[i];
+    }
+    return res.empty() ? "-" : res;
+}
+
+/* Sample about one call in 'rate', 0 stops; the table is allocated on first use. Returns false with error set */
+static bool profile_set_rate(SignumState *st, unsigned int rate)
+{
+    if (rate > 0 && st->profile == NULL) {
+        ProfileEntry *fresh = PyMem_New(ProfileEntry, PROFILE_SLOTS);
+        if (fresh == NULL) { PyErr_NoMemory(); return false; }
+        std::memset(fresh, 0, PROFILE_SLOTS * sizeof(ProfileEntry));
+        std::lock_guard<std::mutex> lock(st->profile_mutex);
+        if (st->profile == NULL) std::swap(fresh, st->profile);
+        PyMem_Free(fresh);
+    }
+    st->profile_rate.store(rate, std::memory_order_relaxed);
+    return true;
+}
+
+/* Parse the arguments of 'profile' and 'profile_table', switch sampling, and take the table; NULL with error set */
+static ProfileEntry *profile_args(PyObject *module, PyObject *args, PyObject *kwargs, const char *format)
+{
+    SignumState *st = signum_state(module);
+    static const char *kwlist[] = {"reset", "rate", NULL};
+    int reset = 0;
+    PyObject *rate_obj = Py_None;
+    if (!PyArg_ParseTupleAndKeywords(args, kwargs, format, (char **)kwlist, &reset, &rate_obj)) return NULL;
+
+    long rate = -1;
+    if (rate_obj != Py_None) {
+        rate = PyLong_AsLong(rate_obj);
+        if (rate == -1 && PyErr_Occurred()) return NULL;
+        if (rate < 0 || rate > (long)PROFILE_MAX_RATE) {
+            PyErr_Format(PyExc_ValueError, "'rate' must be None, 0 (off), or from 1 to %u", PROFILE_MAX_RATE);
+            return NULL;
+        }
+    }
+    ProfileEntry *tab = profile_take(st, reset);
+    if (tab == NULL) return NULL;
+    if (rate >= 0 && !profile_set_rate(st, (unsigned int)rate)) { profile_release(tab); return NULL; }
+    return tab;
+}
+
+/* 'profile(reset=False, *, rate=None)': the sampled latencies since the last reset, then reset and/or set the rate */
+static PyObject *signum_profile(PyObject *module, PyObject *args, PyObject *kwargs)
+{
+    ProfileEntry *tab = profile_args(module, args, kwargs, "|p$O:profile");
+    if (tab == NULL) return NULL;
+    uint64_t total_ns;
+    std::vector<ProfileRow> rows = profile_rows(tab, &total_ns);
+
+    PyObject *res = PyList_New(0);
+    for (const ProfileRow &r : rows) {
+        if (res == NULL) break;
+        const ProfileEntry *e = r.e;
+        PyObject *hist = PyList_New(0);
+        for (unsigned int b = 0; hist && b < PROFILE_BUCKETS; b++) {
+            if (e->hist[b] == 0) continue;
+            PyObject *pair = Py_BuildValue("(KK)", (unsigned long long)profile_bucket_last(b),
+                                           (unsigned long long)e->hist[b]);
+            if (pair == NULL || PyList_Append(hist, pair) < 0) Py_CLEAR(hist);
+            Py_XDECREF(pair);
+        }
+        std::string opts = profile_options_name(e);
+        PyObject *row = hist == NULL ? NULL : Py_BuildValue(
+            "{sOsssKsdsKsKsKsKsKsN}",
+            "type", e->type ? e->type : Py_None, "options", opts.c_str(),
+            "samples", (unsigned long long)e->samples, "share", total_ns ? (double)e->total_ns / total_ns : 0.0,
+            "mean_ns", (unsigned long long)(e->total_ns / e->samples), "p50_ns", (unsigned long long)r.p50,
+            "p90_ns", (unsigned long long)r.p90, "p99_ns", (unsigned long long)r.p99,
+            "max_ns", (unsigned long long)e->max_ns, "histogram", hist);
+        if (row == NULL || PyList_Append(res, row) < 0) Py_CLEAR(res);
+        Py_XDECREF(row);
+    }
+    profile_release(tab);
+    return res;
+}
+
+/* Nanoseconds for a table cell: '850 ns', '12.5 us', '3.20 ms' */
+static std::string profile_duration(uint64_t ns)
+{
+    char buf[32];
+    if (ns < 1000)          snprintf(buf, sizeof(buf), "%llu ns", (unsigned long long)ns);
+    else if (ns < 1000000)  snprintf(buf, sizeof(buf), "%.1f us", ns / 1e3);
+    else                    snprintf(buf, sizeof(buf), "%.2f ms", ns / 1e6);
+    return buf;
+}
+
+/* 'profile_table(reset=False, *, rate=None)': 'profile()' as a text table */
+static PyObject *signum_profile_table(PyObject *module, PyObject *args, PyObject *kwargs)
+{
+    SignumState *st = signum_state(module);
+    ProfileEntry *tab = profile_args(module, args, kwargs, "|p$O:profile_table");
+    if (tab == NULL) return NULL;
+    uint64_t total_ns;
+    std::vector<ProfileRow> rows = profile_rows(tab, &total_ns);
+
+    /* Names first: the widths of the columns depend on them */
+    std::vector<std::string> names, opts;
+    size_t w_name = 4, w_opts = 7;
+    for (const ProfileRow &r : rows) {
+        PyObject *name = profile_type_name(r.e->type);
+        const char *utf8 = name ? PyUnicode_AsUTF8(name) : NULL;
+        if (utf8 == NULL) { Py_XDECREF(name); profile_release(tab); return NULL; }
+        names.emplace_back(utf8, std::min<size_t>(std::strlen(utf8), 48));
+        Py_DECREF(name);
+        opts.push_back(profile_options_name(r.e));
+        w_name = std::max(w_name, names.back().size());
+        w_opts = std::max(w_opts, opts.back().size());
+    }
+
+    std::string out;
+    char line[256];
+    uint64_t samples = 0;
+    snprintf(line, sizeof(line), "%-*s | %-*s | %9s | %6s | %9s | %9s | %9s | %9s | %9s\n", (int)w_name, "Type",
+             (int)w_opts, "Options", "Samples", "Share", "Mean", "p50", "p90", "p99", "Max");
+    out += line;
+    out += std::string(w_name + w_opts + 86, '-') + "\n";
+    for (size_t i = 0; i < rows.size(); i++) {
+        const ProfileEntry *e = rows[i].e;
+        samples += e->samples;
+        snprintf(line, sizeof(line), "%-*s | %-*s | %9llu | %5.1f%% | %9s | %9s | %9s | %9s | %9s\n", (int)w_name,
+                 names[i].c_str(), (int)w_opts, opts[i].c_str(), (unsigned long long)e->samples,
+                 total_ns ? 100.0 * e->total_ns / total_ns : 0.0, profile_duration(e->total_ns / e->samples).c_str(),
+                 profile_duration(rows[i].p50).c_str(), profile_duration(rows[i].p90).c_str(),
+                 profile_duration(rows[i].p99).c_str(), profile_duration(e->max_ns).c_str());
+        out += line;
+    }
+    unsigned int rate = st->profile_rate.load(std::memory_order_relaxed);
+    snprintf(line, sizeof(line), "%llu samples; %s; clock overhead of %llu ns subtracted\n",
+             (unsigned long long)samples, rate ? ("about 1 call in " + std::to_string(rate) + " sampled").c_str()
+             : "sampling is off", (unsigned long long)st->profile_overhead);
+    out += line;
+    profile_release(tab);
+    return PyUnicode_FromStringAndSize(out.data(), (Py_ssize_t)out.size());
+}
+
+/* --- EXACT-TYPE FAST PATHS --- */
+
+static inline int long_sign(PyObject *x)
+{
+    #if PY_VERSION_HEX >= 0x030E0000
+        int s;
+        PyLong_GetSign(x, &s);
+        return s;
+    #else
+        return _PyLong_Sign(x);
+    #endif
+}
+
+/* Is 'T' the class 'name' of the already imported module 'mod_name'? It is remembered in '*slot' */
+static bool resolve_type(PyTypeObject *T, const char *mod_name, const char *name)
+{
+    PyObject *mod_str = PyUnicode_FromString(mod_name);
+    PyObject *mod = mod_str ? PyImport_GetModule(mod_str) : NULL;
+    Py_XDECREF(mod_str);
+    PyObject *cls = mod ? PyObject_GetAttrString(mod, name) : NULL;
+    Py_XDECREF(mod);
+    if (PyErr_Occurred()) PyErr_Clear();
+
+    bool found = (PyTypeObject *)cls == T;
+    Py_XDECREF(cls);
+    return found;
+}
+
+/* Keep 'T' in 'slot' if it is still empty; threads racing for the first instance keep one reference */
+static void keep_type(std::atomic<PyTypeObject *> &slot, PyTypeObject *T)
+{
+    PyTypeObject *empty = NULL;
+    Py_INCREF(T);
+    if (!slot.compare_exchange_strong(empty, T)) Py_DECREF(T);
+}
+
+/* Sign of an exact 'Fraction': the sign of its numerator; 'SIGN_RAISE' means "use the Triple Check" */
+static inline int fraction_code(SignumState *st, PyObject *x)
+{
+    PyObject *num = PyObject_GetAttr(x, st->kw_numerator);
+    if (num == NULL) { PyErr_Clear(); return SIGN_RAISE; }
+    int code = PyLong_CheckExact(num) ? long_sign(num) : SIGN_RAISE;
+    Py_DECREF(num);
+    return code;
+}
+
+/* 'True', 'False', or -1 with Python error set */
+static inline int decimal_test(PyObject *x, PyObject *method)
+{
+    PyObject *r = PyObject_CallMethodNoArgs(x, method);
+    if (r == NULL) return -1;
+    Py_DECREF(r);
+    return r == Py_True;
+}
+
+/* Sign of an exact 'Decimal' by 'is_nan()', 'is_zero()', 'is_signed()'; signaling NaNs use the Triple Check */
+static inline int decimal_code(SignumState *st, PyObject *x)
+{
+    int t = decimal_test(x, st->kw_is_nan);
+    if (t > 0) {
+        t = decimal_test(x, st->kw_is_snan);
+        if (t == 0) return SIGN_NAN;
+    }
+    if (t == 0) {
+        t = decimal_test(x, st->kw_is_zero);
+        if (t > 0) return SIGN_ZERO;
+        if (t == 0) {
+            t = decimal_test(x, st->kw_is_signed);
+            if (t >= 0) return t ? SIGN_NEG : SIGN_POS;
+        }
+    }
+    if (t < 0) PyErr_Clear();
+    return SIGN_RAISE;
+}
+
+/* Exact 'int', 'bool', 'float', 'Fraction', 'Decimal' are classified directly.
+   'SIGN_RAISE' means "use the Triple Check"; subclasses always use it */
+static inline int sign_code_exact(SignumState *st, PyObject *x)
+{
+    PyTypeObject *T = Py_TYPE(x);
+
+    if (T == &PyLong_Type || T == &PyBool_Type) return long_sign(x);
+    if (T == &PyFloat_Type) return sign_code_of(PyFloat_AS_DOUBLE(x));
+    if (T == st->fraction_type.load(std::memory_order_relaxed)) return fraction_code(st, x);
+    if (T == st->decimal_type.load(std::memory_order_relaxed)) return decimal_code(st, x);
+
+    /* The first 'Fraction' or 'Decimal' seen: resolve the type */
+    if (st->fraction_type == NULL && strcmp(T->tp_name, "Fraction") == 0 && resolve_type(T, "fractions", "Fraction")) {
+        keep_type(st->fraction_type, T);
+        return fraction_code(st, x);
+    }
+    if (st->decimal_type == NULL && strcmp(T->tp_name, "decimal.Decimal") == 0
+        && resolve_type(T, "decimal", "Decimal")) {
+        keep_type(st->decimal_type, T);
+        return decimal_code(st, x);
+    }
+
+    return SIGN_RAISE;
+}
+
+/* --- PER-TYPE STRATEGY CACHE --- */
+
+/* What probing has learned about a type */
+enum {
+    STRAT_NOFLOAT = 1, /* Neither '__float__' nor '__index__': the NaN probe always fails */
+    STRAT_NOCMP   = 2, /* C-level comparisons with zero are not implemented: the Triple Check always fails */
+    STRAT_CALL    = 4, /* 'impl(x)' has the sign of 'x' */
+    STRAT_BIND    = 8, /* 'impl' is a '__sign__' descriptor: bind it to 'x', then call */
+    STRAT_ATTR    = 16, /* 'impl' is the name of an attribute of 'x' that has the sign of 'x' */
+    STRAT_INVALID = 32, /* Nothing can succeed: classification fails at once, without raising and clearing errors */
+    STRAT_DECLARED = 64 /* 'STRAT_INVALID' because of 'register_invalid' */
+};
+
+struct TypeStrategy {
+    PyTypeObject *type;  /* Borrowed; valid only together with 'tag' */
+    unsigned int tag;    /* 'tp_version_tag' at probing time; 0: not cacheable */
+    unsigned int epoch;  /* 'registry_epoch' at probing time */
+    richcmpfunc cmp;
+    PyObject *impl;      /* Borrowed from the registry or the type; NULL: no sign implementation */
+    PyObject *zero;      /* Borrowed from the registry; NULL: compare with 'int(0)' */
+    unsigned int flags;
+};
+
+/* Small inline cache with round-robin eviction; thread-local, so no locking */
+#define STRATEGY_SLOTS 8
+static thread_local TypeStrategy strat_cache[STRATEGY_SLOTS];
+static thread_local TypeStrategy strat_uncached;
+static thread_local unsigned int strat_victim = 0;
+
+/* Current version tag of 'T', 0 if it is not valid. Any change of the type (e.g. 'T.__lt__ = ...')
+   invalidates the tag, and tags are never reused, so a stale or recycled entry cannot match */
+static inline unsigned int type_tag(PyTypeObject *T)
+{
+    #if PY_VERSION_HEX < 0x030C0000
+        if (!PyType_HasFeature(T, Py_TPFLAGS_VALID_VERSION_TAG)) return 0;
+    #endif
+    return T->tp_version_tag;
+}
+
+static unsigned int type_tag_assign(SignumState *st, PyTypeObject *T)
+{
+    #if PY_VERSION_HEX >= 0x030C0000
+        PyUnstable_Type_AssignVersionTag(T);
+    #else
+        (void)_PyType_Lookup(T, st->kw_numerator); /* Assigns a version tag as a side effect */
+    #endif
+    return type_tag(T);
+}
+
+/* Is 'T->tp_richcompare' C code? Python-level '__lt__' etc. are never the slot of a static type */
+static bool cmp_is_native(PyTypeObject *T)
+{
+    PyTypeObject *B = T;
+    while (B && PyType_HasFeature(B, Py_TPFLAGS_HEAPTYPE)) B = B->tp_base;
+    return B && B->tp_richcompare == T->tp_richcompare;
+}
+
+/* Does 'cmp(x, 0, op)' return 'NotImplemented' without error? */
+static bool cmp_not_implemented(SignumState *st, richcmpfunc cmp, PyObject *x, int op)
+{
+    PyObject *res = cmp(x, st->Py_zero, op);
+    if (res == NULL) { PyErr_Clear(); return false; }
+    Py_DECREF(res);
+    return res == Py_NotImplemented;
+}
+
+/* Keep 'obj' alive until the module is unloaded. Without the GIL, another thread may unregister an object between
+   its lookup and 'Py_INCREF', so everything that strategies borrow is kept; registrations are rare */
+static inline void registry_keep(SignumState *st, PyObject *obj)
+{
+    #ifdef Py_GIL_DISABLED
+        if (PyList_Append(st->registry_kept, obj) < 0) PyErr_Clear();
+    #else
+        (void)obj;
+    #endif
+}
+
+/* Find the registered implementation for 'T' or its base classes, or '__sign__'; sets 'e->impl' and 'e->flags'.
+   The nearest registration in the MRO wins, so a subclass may have a sign although its base is registered invalid */
+static bool strategy_impl(SignumState *st, PyTypeObject *T, TypeStrategy *e)
+{
+    PyObject *mro = T->tp_mro;
+    if (mro && (PyDict_GET_SIZE(st->sign_registry) || PySet_GET_SIZE(st->invalid_registry))) {
+        for (Py_ssize_t i = 0; i < PyTuple_GET_SIZE(mro); i++) {
+            PyObject *B = PyTuple_GET_ITEM(mro, i);
+            PyObject *impl = PyDict_GetItemWithError(st->sign_registry, B);
+            if (impl) {
+                e->impl = impl;
+                e->flags |= PyUnicode_Check(impl) ? STRAT_ATTR : STRAT_CALL;
+                return true;
+            }
+            if (PyErr_Occurred()) PyErr_Clear();
+            if (PySet_Contains(st->invalid_registry, B) > 0) {
+                e->flags |= STRAT_INVALID | STRAT_DECLARED;
+                return true;
+            }
+            if (PyErr_Occurred()) PyErr_Clear();
+        }
+    }
+
+    /* No instance dictionary, like all special methods */
+    #ifdef Py_GIL_DISABLED
+        PyObject *meth = _PyType_LookupRef(T, st->kw_sign);
+        if (meth) { registry_keep(st, meth); Py_DECREF(meth); } /* Borrowed from now on, like with the GIL */
+    #else
+        PyObject *meth = _PyType_Lookup(T, st->kw_sign); /* Borrowed */
+    #endif
+    if (meth == NULL || meth == Py_None) return false;
+    e->impl = meth;
+    e->flags |= !PyFunction_Check(meth) && Py_TYPE(meth)->tp_descr_get ? STRAT_BIND : STRAT_CALL;
+    return true;
+}
+
+/* Types whose zero is their constructor called without arguments; registered when their first instance is seen */
+static const struct {
+    const char *tp_name, *mod_name, *name;
+} default_zeros[] = {
+    {"datetime.timedelta", "datetime", "timedelta"},
+    {"decimal.Decimal", "decimal", "Decimal"},
+    {"Fraction", "fractions", "Fraction"}
+};
+
+/* Register the default zero if 'B' is one of 'default_zeros'; returns the zero (borrowed) or NULL */
+static PyObject *default_zero(SignumState *st, PyTypeObject *B)
+{
+    for (size_t i = 0; i < std::size(default_zeros); i++) {
+        auto &dz = default_zeros[i];
+        if (st->zero_done[i] || strcmp(B->tp_name, dz.tp_name) != 0) continue;
+        if (!resolve_type(B, dz.mod_name, dz.name)) return NULL;
+        st->zero_done[i] = true;
+
+        PyObject *zero = PyObject_CallObject((PyObject *)B, NULL);
+        if (zero) registry_keep(st, zero);
+        /* The first zero wins: another thread or 'register_zero' may have been faster */
+        PyObject *kept = zero ? PyDict_SetDefault(st->zero_registry, (PyObject *)B, zero) : NULL;
+        Py_XDECREF(zero); /* The registry keeps it */
+        if (kept == NULL) PyErr_Clear();
+        return kept;
+    }
+    return NULL;
+}
+
+/* Find the zero registered for 'T' or its base classes; borrowed reference or NULL */
+static PyObject *strategy_zero(SignumState *st, PyTypeObject *T)
+{
+    PyObject *mro = T->tp_mro;
+    if (mro == NULL) return NULL;
+    for (Py_ssize_t i = 0; i < PyTuple_GET_SIZE(mro); i++) {
+        PyTypeObject *B = (PyTypeObject *)PyTuple_GET_ITEM(mro, i);
+        PyObject *zero = PyDict_GetItemWithError(st->zero_registry, (PyObject *)B);
+        if (zero == NULL && !PyErr_Occurred()) zero = default_zero(st, B);
+        if (zero) return zero;
+        if (PyErr_Occurred()) PyErr_Clear();
+    }
+    return NULL;
+}
+
+/* Probe the type of 'x' and store the strategy in the cache */
+static const TypeStrategy *strategy_probe(SignumState *st, PyObject *x)
+{
+    PyTypeObject *T = Py_TYPE(x);
+    unsigned int tag = type_tag_assign(st, T);
+    TypeStrategy *e = tag ? &strat_cache[strat_victim++ % STRATEGY_SLOTS] : &strat_uncached;
+
+    e->type = T;
+    e->tag = tag;
+    e->epoch = st->registry_epoch.load(std::memory_order_acquire);
+    e->cmp = T->tp_richcompare;
+    e->impl = NULL;
+    e->zero = NULL;
+    e->flags = 0;
+    if (strategy_impl(st, T, e)) return e; /* Nothing else is needed */
+
+    PyNumberMethods *nb = T->tp_as_number;
+    if (nb == NULL || (nb->nb_float == NULL && nb->nb_index == NULL)) e->flags |= STRAT_NOFLOAT;
+
+    e->zero = strategy_zero(st, T);
+    if (e->zero) return e; /* Comparisons with a registered zero are expected to work */
+
+    /* 'int' subclasses are compared by the reflected 'int' method */
+    if (!PyType_IsSubtype(T, &PyLong_Type)
+        && (e->cmp == NULL
+            || (cmp_is_native(T) && cmp_not_implemented(st, e->cmp, x, Py_GT)
+                && cmp_not_implemented(st, e->cmp, x, Py_LT))))
+        e->flags |= STRAT_NOCMP;
+
+    /* E.g. 'None', 'str', 'list', 'dict', 'set': learned as invalid until the type changes */
+    if ((e->flags & (STRAT_NOFLOAT | STRAT_NOCMP)) == (STRAT_NOFLOAT | STRAT_NOCMP)) e->flags |= STRAT_INVALID;
+
+    return e;
+}
+
+/* The strategy for the type of 'x'; may be overwritten by any nested 'sign' call, so copy what is needed */
+static inline const TypeStrategy *type_strategy(SignumState *st, PyObject *x)
+{
+    PyTypeObject *T = Py_TYPE(x);
+    unsigned int tag = type_tag(T);
+    if (tag) {
+        unsigned int epoch = st->registry_epoch.load(std::memory_order_acquire);
+        for (const TypeStrategy &e : strat_cache)
+            if (e.type == T && e.tag == tag && e.epoch == epoch) { stat_add(STAT_CACHE_HIT); return &e; }
+    }
+    stat_add(STAT_CACHE_MISS);
+    return strategy_probe(st, x);
+}
+
+static int sign_code(SignumState *st, PyObject *x);
+
+/* Sign of 'x' by its registered implementation or '__sign__', normalized by 'sign_code'.
+   'SIGN_ERR' is returned with Python error set */
+static int impl_code(SignumState *st, PyObject *x, PyObject *impl, unsigned int flags)
+{
+    Py_INCREF(impl); /* Registration may change during the call */
+    PyObject *r;
+    if (flags & STRAT_ATTR) {
+        r = PyObject_GetAttr(x, impl);
+    } else if (flags & STRAT_BIND) {
+        PyObject *bound = Py_TYPE(impl)->tp_descr_get(impl, x, (PyObject *)Py_TYPE(x));
+        r = bound ? PyObject_CallObject(bound, NULL) : NULL;
+        Py_XDECREF(bound);
+    } else {
+        r = PyObject_Vectorcall(impl, &x, 1, NULL);
+    }
+    Py_DECREF(impl);
+    if (r == NULL) return SIGN_ERR;
+
+    int code = SIGN_ERR;
+    if (Py_EnterRecursiveCall(" while normalizing the result of a sign implementation") == 0) {
+        code = sign_code(st, r);
+        Py_LeaveRecursiveCall();
+        if (code == SIGN_ERR || code == SIGN_RAISE) {
+            if (PyErr_Occurred()) PyErr_Clear();
+            PyErr_Format(PyExc_TypeError, "the sign implementation of type '%.80s' returned '%.80s', not a number",
+                         Py_TYPE(x)->tp_name, Py_TYPE(r)->tp_name);
+            code = SIGN_ERR;
+        }
+    }
+    Py_DECREF(r);
+    return code;
+}
+
+/* Triple Check: compare 'x' with 'zero' */
+static int triple_check(PyObject *x, PyObject *zero)
+{
+    /* Start of the ternary logic block */
+    int gt, lt, eq, stat_idx, self_eq;
+    long res;
+
+    gt = PyObject_RichCompareBool(x, zero, Py_GT) + 1; /* 0: Error; 1: False; 2: True */
+    stat_idx = gt;
+
+    lt = PyObject_RichCompareBool(x, zero, Py_LT) + 1;
+    res = (long)gt - lt; /* Result, if nothing special */
+
+    /* Optimization: Tell the compiler that 'lt' is strictly within [0, 2] */
+    #if __has_cpp_attribute(assume)
+        [[assume(0 <= lt && lt <= 2)]];
+    #elif defined(_MSC_VER)
+        __assume(0 <= lt && lt <= 2);
+    #elif defined(__GNUC__) || defined(__clang__)
+        if (!(0 <= lt && lt <= 2)) __builtin_unreachable();
+    #endif
+
+    switch (lt) {
+        case 0: return SIGN_ERR;
+        case 1: break; /* 'stat_idx == gt' is mutiplied by 'lt == 1' */
+        case 2: stat_idx = (stat_idx << 1) & 3; /* 'stat_idx == gt' is shift-mutiplied by 'lt == 2'
+                                                    and truncated mod 4 */
+    }
+
+    eq = PyObject_RichCompareBool(x, zero, Py_EQ) + 1; /* Used only to process NaN and errors */
+
+    #if __has_cpp_attribute(assume)
+        [[assume(0 <= eq && eq <= 2)]];
+    #elif defined(_MSC_VER)
+        __assume(0 <= eq && eq <= 2);
+    #elif defined(__GNUC__) || defined(__clang__)
+        if (!(0 <= eq && eq <= 2)) __builtin_unreachable();
+    #endif
+
+    switch (eq) {
+        case 0: return SIGN_ERR;
+        case 1: break; /* 'stat_idx == (gt * lt) & 3' is mutiplied by 'eq == 1' */
+        case 2: stat_idx = (stat_idx << 1) & 3; /* 'stat_idx == (gt * lt) & 3' is shift-mutiplied by 'eq == 2'
+                                                   and truncated mod 4 */
+    }
+
+    /* Short Logic Overview:
+       - 'stat_idx == 0': Multiple 'True' flags or an error occurred. Maps to 0, 4, 8; this is 0 mod 4.
+       - 'stat_idx == 1': Triple 'False' state (1,1,1). Potential NaN; requires self-comparison.
+       - 'stat_idx == 2': Exactly one 'True' flag, no errors. Valid numeric state.
+    */
+
+    /* Detailed Logic Overview:
+       'gt', 'lt', 'eq' can be 0 for 'Error', 1 for 'False', 2 for 'True' (ternary logic).
+       'stat_idx = (gt*lt*eq) & 3'; equivalent is '(gt*lt*eq) % 4'.
+       'stat_idx' is 0:
+         - if we have one, two, or three errors; then the product is 0;
+           (we already processed errors in 'lt' or 'eq' directly by 'return SIGN_ERR;');
+         - if we have two 'True' and one 'False', or three 'True'; the product is 4 or 8,
+              which gives 0 (mod 4).
+       'stat_idx' is 1:
+         - if we have triple 'False', that indicates a potential NaN, and we perform
+           an additional self-comparison;
+       'stat_idx' is 2:
+         - only if we have one 'True' and two 'False': it's a valid number */
+
+    #if __has_cpp_attribute(assume)
+        [[assume(0 <= stat_idx && stat_idx <= 2)]];
+    #elif defined(_MSC_VER)
+        __assume(0 <= stat_idx && stat_idx <= 2);
+    #elif defined(__GNUC__) || defined(__clang__)
+        if (!(0 <= stat_idx && stat_idx <= 2)) __builtin_unreachable();
+    #endif
+
+    switch (stat_idx) {
+        case 0: return SIGN_ERR;
+        case 1: { /* possible NaN '(False, False, False)' */
+            stat_add(STAT_SIGN_NAN_PROBE);
+            self_eq = PyObject_RichCompareBool(x, x, Py_EQ);
+
+            #if __has_cpp_attribute(assume)
+                [[assume(-1 <= self_eq && self_eq <= 1)]];
+            #elif defined(_MSC_VER)
+                __assume(-1 <= self_eq && self_eq <= 1);
+            #elif defined(__GNUC__) || defined(__clang__)
+                if (!(-1 <= self_eq && self_eq <= 1)) __builtin_unreachable();
+            #endif
+
+            switch (self_eq) {
+                case -1: return SIGN_RAISE; /* Error in __eq__, we keep current Python error */
+                case  0: return SIGN_NAN;   /* NaN: not equal to itself */
+                case  1: return SIGN_ERR;   /* Not a NaN: equals to itself; not comparable to 0 */
+            }
+            return SIGN_ERR;
+        }
+        case 2: return (int)res;
+    }
+    return SIGN_ERR;
+}
+
+/* Classify 'x' into a quinary code.
+   'SIGN_ERR' may be returned with or without Python error set ('invalid_raise' restores the error of known-invalid
+   types); 'SIGN_RAISE' keeps the error of '__eq__' */
+static int sign_code(SignumState *st, PyObject *x)
+{
+    /* Exact numeric types don't need the Triple Check */
+    int code = sign_code_exact(st, x);
+    if (code != SIGN_RAISE) { stat_add(STAT_SIGN_EXACT); return code; }
+
+    const TypeStrategy *ts = type_strategy(st, x);
+    unsigned int flags = ts->flags;
+    if (ts->impl) { stat_add(STAT_SIGN_IMPL); return impl_code(st, x, ts->impl, flags); }
+    if (flags & STRAT_INVALID) { stat_add(STAT_SIGN_INVALID); return SIGN_ERR; }
+    PyObject *zero = ts->zero;
+
+    /* Check for numeric NaN */
+    if (!(flags & STRAT_NOFLOAT)) {
+        double d = PyFloat_AsDouble(x);
+        if (Py_IS_NAN(d)) { stat_add(STAT_SIGN_NAN); return SIGN_NAN; }
+        /* If it is something special, we will nevertheless try comparisons */
+        if (PyErr_Occurred()) PyErr_Clear();
+    }
+
+    /* Known to fail: 'invalid_raise' restores the error of 'x < 0' only if it is raised */
+    if (flags & STRAT_NOCMP) { stat_add(STAT_SIGN_NOCMP); return SIGN_ERR; }
+
+    stat_add(STAT_SIGN_TRIPLE);
+    if (zero == NULL) return triple_check(x, st->Py_zero);
+    Py_INCREF(zero); /* The cache entry may be refilled and the zero unregistered during comparisons */
+    code = triple_check(x, zero);
+    Py_DECREF(zero);
+    return code;
+}
+
+/* --- SIGN ERROR --- */
+
+/* 'signum.SignError(TypeError)': keeps the invalid argument and the cause; the message is rendered only when needed */
+struct SignErrorObject {
+    PyException_HEAD
+    PyObject *sign_obj;     /* The invalid argument */
+    PyObject *sign_cause;   /* The exception that made it invalid, or None */
+    PyObject *sign_zero;    /* 'fastsign': the zero it was compared with; NULL for 'sign' */
+    PyObject *message;      /* Rendered message, cached */
+};
+
+static int sign_error_traverse(SignErrorObject *self, visitproc visit, void *arg)
+{
+    Py_VISIT(self->sign_obj);
+    Py_VISIT(self->sign_cause);
+    Py_VISIT(self->sign_zero);
+    return ((PyTypeObject *)PyExc_TypeError)->tp_traverse((PyObject *)self, visit, arg);
+}
+
+static int sign_error_clear(SignErrorObject *self)
+{
+    Py_CLEAR(self->sign_obj);
+    Py_CLEAR(self->sign_cause);
+    Py_CLEAR(self->sign_zero);
+    Py_CLEAR(self->message);
+    return ((PyTypeObject *)PyExc_TypeError)->tp_clear((PyObject *)self);
+}
+
+static void sign_error_dealloc(SignErrorObject *self)
+{
+    PyTypeObject *tp = Py_TYPE(self);
+    PyObject_GC_UnTrack(self);
+    sign_error_clear(self);
+    tp->tp_free((PyObject *)self);
+    Py_DECREF(tp);
+}
+
+/* 'SignError(obj, cause=None)' */
+static int sign_error_init(SignErrorObject *self, PyObject *args, PyObject *kwds)
+{
+    PyObject *obj, *cause = Py_None;
+    if (((PyTypeObject *)PyExc_TypeError)->tp_init((PyObject *)self, args, kwds) < 0) return -1;
+    if (!PyArg_ParseTuple(args, "O|O:SignError", &obj, &cause)) return -1;
+    Py_INCREF(obj);
+    Py_XSETREF(self->sign_obj, obj);
+    Py_INCREF(cause);
+    Py_XSETREF(self->sign_cause, cause);
+    Py_CLEAR(self->message);
+    return 0;
+}
+
+/* The message of the original 'TypeError' of 'sign' or 'fastsign' */
+static PyObject *sign_error_render(SignErrorObject *self)
+{
+    stat_add(STAT_RENDERED);
+    PyObject *x = self->sign_obj ? self->sign_obj : Py_None;
+    PyObject *cause = self->sign_cause ? self->sign_cause : Py_None;
+    const char *type_name = Py_TYPE(x)->tp_name;
+    PyObject *res;
+
+    if (self->sign_zero) { /* 'fastsign' */
+        PyObject *old_msg = cause != Py_None ? PyObject_Str(cause) : NULL;
+        if (old_msg == NULL) PyErr_Clear();
+        if (old_msg && PyUnicode_GET_LENGTH(old_msg) > 0) {
+            res = PyUnicode_FromFormat("signum.fastsign(): cannot compare or check for NaN. Cause: %.320s",
+                                       PyUnicode_AsUTF8(old_msg));
+        } else { /* No cause, or an empty message */
+            res = PyUnicode_FromFormat("signum.fastsign(): cannot compare or check for NaN. "
+                                       "Cause: comparison with '%.80s' not implemented for type '%.80s'",
+                                       Py_TYPE(self->sign_zero)->tp_name, type_name);
+        }
+        Py_XDECREF(old_msg);
+        return res;
+    }
+
+    PyObject *repr = PyObject_Repr(x);
+    if (repr == NULL) PyErr_Clear();
+    if (cause != Py_None) {
+        /* Prepare the old error as string */
+        PyObject *old_msg = PyObject_Str(cause);
+        if (old_msg == NULL) PyErr_Clear();
+        const char *old_msg_str = old_msg ? PyUnicode_AsUTF8(old_msg) : "unknown error";
+        res = PyUnicode_FromFormat("signum.sign: invalid argument `%.160s` (type '%.80s'). Cause: %.320s",
+                                   repr ? PyUnicode_AsUTF8(repr) : "???", type_name, old_msg_str);
+        Py_XDECREF(old_msg);
+    } else if (repr) {
+        res = PyUnicode_FromFormat("signum.sign: invalid argument `%.160s`. "
+                                   "Type '%.80s' does not support order comparisons (>, <, ==) "
+                                   "or NaN detection.", PyUnicode_AsUTF8(repr), type_name);
+    } else {
+        res = PyUnicode_FromFormat("signum.sign: invalid argument of type '%.80s', "
+                                   "which does not support order comparisons (>, <, ==) and printing.", type_name);
+    }
+    Py_XDECREF(repr);
+    return res;
+}
+
+static PyObject *sign_error_str(SignErrorObject *self)
+{
+    PyObject *res = NULL;
+    Py_BEGIN_CRITICAL_SECTION(self); /* Threads printing the same exception render it once */
+    if (self->message == NULL && self->sign_obj) self->message = sign_error_render(self);
+    if (self->message) {
+        Py_INCREF(self->message);
+        res = self->message;
+    } else if (self->sign_obj == NULL) {
+        res = PyObject_Str(self->args); /* Not initialized by 'SignError(obj)' */
+    }
+    Py_END_CRITICAL_SECTION();
+    return res;
+}
+
+static PyObject *sign_error_get_obj(SignErrorObject *self, void *closure)
+{
+    PyObject *res = self->sign_obj ? self->sign_obj : Py_None;
+    Py_INCREF(res);
+    return res;
+}
+
+static PyObject *sign_error_get_cause(SignErrorObject *self, void *closure)
+{
+    PyObject *res = self->sign_cause ? self->sign_cause : Py_None;
+    Py_INCREF(res);
+    return res;
+}
+
+static PyGetSetDef sign_error_getset[] = {
+    {"obj",   (getter)sign_error_get_obj,   NULL, "The invalid argument.", NULL},
+    {"cause", (getter)sign_error_get_cause, NULL, "The exception that made the argument invalid, or None.", NULL},
+    {NULL, NULL, NULL, NULL, NULL}
+};
+
+static PyType_Slot sign_error_slots[] = {
+    {Py_tp_doc,      (void *)"Invalid argument of signum.sign() or signum.fastsign(): SignError(obj, cause=None)."},
+    {Py_tp_dealloc,  (void *)sign_error_dealloc},
+    {Py_tp_traverse, (void *)sign_error_traverse},
+    {Py_tp_clear,    (void *)sign_error_clear},
+    {Py_tp_init,     (void *)sign_error_init},
+    {Py_tp_str,      (void *)sign_error_str},
+    {Py_tp_getset,   (void *)sign_error_getset},
+    {0, NULL}
+};
+
+static PyType_Spec sign_error_spec = {
+    "signum.SignError",
+    sizeof(SignErrorObject),
+    0,
+    Py_TPFLAGS_DEFAULT | Py_TPFLAGS_BASETYPE | Py_TPFLAGS_HAVE_GC,
+    sign_error_slots
+};
+
+/* Raise 'SignError' for the invalid argument 'x'; the current Python error, if any, becomes its cause.
+   'zero' is NULL for 'sign' */
+static void sign_error_raise(SignumState *st, PyObject *x, PyObject *zero)
+{
+    stat_add(STAT_RAISED);
+    PyObject *cause = Py_None;
+    if (PyErr_Occurred()) {
+        PyObject *type, *value, *traceback;
+        /* Extract the current error */
+        PyErr_Fetch(&type, &value, &traceback);
+        PyErr_NormalizeException(&type, &value, &traceback);
+        if (value && traceback) PyException_SetTraceback(value, traceback);
+        Py_XDECREF(type);
+        Py_XDECREF(traceback);
+        cause = value ? value : Py_None;
+        if (value == NULL) Py_INCREF(cause);
+    } else {
+        Py_INCREF(cause);
+    }
+
+    PyObject *exc_args[2] = {x, cause};
+    PyObject *exc = PyObject_Vectorcall(st->SignError_Type, exc_args, 2, NULL);
+    Py_DECREF(cause);
+    if (exc == NULL) return;
+    if (zero) {
+        Py_INCREF(zero);
+        ((SignErrorObject *)exc)->sign_zero = zero;
+    }
+    PyErr_SetObject(st->SignError_Type, exc);
+    Py_DECREF(exc);
+}
+
+/* Raise the informative 'SignError' of 'sign' for the invalid argument 'x' */
+static inline void sign_raise(SignumState *st, PyObject *x)
+{
+    sign_error_raise(st, x, NULL);
+}
+
+/* 'fastsign' comparisons of 'x' with 'zero' by 'fs_f_cmp', then the float fallback */
+static int fastsign_compare(SignumState *st, PyObject *x, richcmpfunc fs_f_cmp, PyObject *zero)
+{
+    if (fs_f_cmp) {
+        PyObject *res = NULL;
+
+        // x > 0
+        res = fs_f_cmp(x, zero, Py_GT);
+        if (res == Py_True) {
+            Py_DECREF(res); stat_add(STAT_FAST_COMPARE); return SIGN_POS;
+        }
+        long flag = (res == NULL) || (res == Py_NotImplemented);
+        Py_XDECREF(res);
+        if (flag) goto fs_error;
+
+        // x < 0
+        res = fs_f_cmp(x, zero, Py_LT);
+        if (res == Py_True) {
+            Py_DECREF(res); stat_add(STAT_FAST_COMPARE); return SIGN_NEG;
+        }
+        flag = (res == NULL) || (res == Py_NotImplemented);
+        Py_XDECREF(res);
+        if (flag) goto fs_error;
+
+        // x == 0
+        res = fs_f_cmp(x, zero, Py_EQ);
+        if (res == Py_True) {
+            Py_DECREF(res); stat_add(STAT_FAST_COMPARE); return SIGN_ZERO;
+        }
+        Py_XDECREF(res);
+    }
+
+fs_error:
+    if (!PyUnicode_Check(x)) {
+        /* The float fallback decides; the error of the comparisons is not needed */
+        stat_add(STAT_FAST_FLOAT);
+        if (PyErr_Occurred()) PyErr_Clear();
+        double d = PyFloat_AsDouble(x);
+        if (d == -1.0 && PyErr_Occurred()) return SIGN_ERR;
+
+        if (std::isnan(d)) return SIGN_NAN;
+        if (d == 0.0)      return SIGN_ZERO;
+        if (d >  0.0)      return SIGN_POS;
+        if (d <  0.0)      return SIGN_NEG;
+    }
+
+    sign_error_raise(st, x, zero); /* The error of the comparisons, if any, is the cause */
+    return SIGN_ERR;
+}
+
+/* 'fastsign' logic: classify 'x' into a quinary code.
+   'SIGN_ERR' is returned with Python error set, except for known-invalid types (see 'invalid_raise') */
+static int fastsign_code(SignumState *st, PyObject *x)
+{
+    /* Exact numeric types don't need comparisons */
+    int code = sign_code_exact(st, x);
+    if (code != SIGN_RAISE) { stat_add(STAT_FAST_EXACT); return code; }
+
+    const TypeStrategy *ts = type_strategy(st, x);
+    if (ts->impl) { stat_add(STAT_FAST_IMPL); return impl_code(st, x, ts->impl, ts->flags); }
+    if (ts->flags & STRAT_INVALID) { stat_add(STAT_FAST_INVALID); return SIGN_ERR; }
+    richcmpfunc fs_f_cmp = ts->flags & STRAT_NOCMP ? NULL : ts->cmp;
+    PyObject *zero = ts->zero;
+
+    if (zero == NULL) return fastsign_compare(st, x, fs_f_cmp, st->Py_zero);
+    Py_INCREF(zero); /* The cache entry may be refilled and the zero unregistered during comparisons */
+    code = fastsign_compare(st, x, fs_f_cmp, zero);
+    Py_DECREF(zero);
+    return code;
+}
+
+/* Raise the 'SignError' for 'x' after 'SIGN_ERR' without Python error set.
+   Known-invalid types skip the probing; its error, the cause, is restored here, only when it is really raised */
+static void invalid_raise(SignumState *st, PyObject *x, bool fast)
+{
+    const TypeStrategy *ts = type_strategy(st, x);
+    if (ts->flags & STRAT_DECLARED) {
+        PyErr_Format(PyExc_TypeError, "type '%.100s' is registered as invalid", Py_TYPE(x)->tp_name);
+    } else if (fast) {
+        /* The float fallback of 'fastsign_compare' raises its own error */
+        if (!PyUnicode_Check(x) && PyFloat_AsDouble(x) == -1.0 && PyErr_Occurred()) return;
+    } else if (ts->flags & STRAT_NOCMP) {
+        PyErr_Format(PyExc_TypeError, "'<' not supported between instances of '%.100s' and '%.100s'",
+                     Py_TYPE(x)->tp_name, Py_TYPE(st->Py_zero)->tp_name);
+    }
+    sign_error_raise(st, x, fast ? st->Py_zero : NULL);
+}
+
+/* --- NATIVE PREPROCESSORS --- */
+
+enum PreprocKind { PP_DEADBAND, PP_REL_DEADBAND, PP_ROUND_TO };
+
+/* Preprocessor evaluated in C by 'sign'; also callable from Python with the 'preprocess' tuple protocol */
+struct PreprocObject {
+    PyObject_HEAD
+    PreprocKind  kind;
+    PyObject    *arg1;      /* Arguments of the factory, for 'repr' */
+    PyObject    *arg2;      /* NULL for one argument */
+    PyObject    *eps;       /* Deadbands: '|x| < eps' is zero */
+    double       eps_d;     /* 'eps' as double */
+    bool         eps_exact; /* 'eps_d == eps' exactly, so floats may be compared in C */
+    PyObject    *ndigits;   /* 'round_to' */
+    double       half;      /* 'round_to': '0.5 * 10**-ndigits', nonzero numbers below it are rounded to zero */
+};
+
+static void preproc_dealloc(PreprocObject *self)
+{
+    PyTypeObject *tp = Py_TYPE(self);
+    Py_XDECREF(self->arg1);
+    Py_XDECREF(self->arg2);
+    Py_XDECREF(self->eps);
+    Py_XDECREF(self->ndigits);
+    tp->tp_free((PyObject *)self);
+    Py_DECREF(tp);
+}
+
+static PyObject *preproc_repr(PreprocObject *self)
+{
+    switch (self->kind) {
+        case PP_DEADBAND:     return PyUnicode_FromFormat("signum.deadband(%R)", self->arg1);
+        case PP_REL_DEADBAND: return PyUnicode_FromFormat("signum.rel_deadband(%R, %R)", self->arg1, self->arg2);
+        case PP_ROUND_TO:     return PyUnicode_FromFormat("signum.round_to(%R)", self->arg1);
+    }
+    return NULL;
+}
+
+/* 'abs(x) < eps' for any 'x'; -1 with Python error set */
+static int deadband_test(PreprocObject *pp, PyObject *x)
+{
+    PyObject *a = PyNumber_Absolute(x);
+    if (a == NULL) return -1;
+    int lt = PyObject_RichCompareBool(a, pp->eps, Py_LT);
+    Py_DECREF(a);
+    return lt;
+}
+
+/* Evaluate the preprocessor for 'x'. Returns the quinary code if it is already decided, otherwise 'SIGN_RAISE';
+   then '*x' may be replaced by a new reference, which is also stored in '*to_free'. Errors are ignored */
+static int preproc_code(SignumState *st, PreprocObject *pp, PyObject **x, PyObject **to_free)
+{
+    PyObject *v = *x;
+
+    if (pp->kind == PP_ROUND_TO) {
+        if (PyFloat_CheckExact(v)) {
+            double d = PyFloat_AS_DOUBLE(v);
+            if (!std::isfinite(d)) return sign_code_of(d);
+            double a = std::fabs(d);
+            /* Outside of the rounding error of 'half', the result is clear; ties are left to 'round' */
+            if (a < pp->half * (1.0 - 0x1p-50)) return SIGN_ZERO;
+            if (a > pp->half * (1.0 + 0x1p-50)) return sign_code_of(d);
+        }
+        PyObject *r = PyObject_CallFunctionObjArgs(st->Py_round, v, pp->ndigits, NULL);
+        if (r == NULL) { PyErr_Clear(); return SIGN_RAISE; }
+        *x = r;
+        *to_free = r;
+        return SIGN_RAISE;
+    }
+
+    /* Deadbands */
+    if (pp->eps_exact) {
+        if (PyFloat_CheckExact(v)) {
+            double d = PyFloat_AS_DOUBLE(v);
+            return std::fabs(d) < pp->eps_d ? SIGN_ZERO : sign_code_of(d);
+        }
+        if (PyLong_CheckExact(v)) {
+            int overflow;
+            long long n = PyLong_AsLongLongAndOverflow(v, &overflow);
+            if (!overflow && -(1LL << 53) <= n && n <= (1LL << 53)) /* Exact as double */
+                return std::fabs((double)n) < pp->eps_d ? SIGN_ZERO : sign_code_of((int64_t)n);
+        }
+    }
+    int lt = deadband_test(pp, v);
+    if (lt < 0) PyErr_Clear();
+    return lt > 0 ? SIGN_ZERO : SIGN_RAISE;
+}
+
+/* Python call with the 'preprocess' protocol: '(0,)' or 'None' for deadbands, '(round(x, ndigits),)' */
+static PyObject *preproc_call(PreprocObject *self, PyObject *args, PyObject *kwargs)
+{
+    SignumState *st = type_state(Py_TYPE(self));
+    PyObject *x;
+    if (!PyArg_ParseTuple(args, "O:Preprocessor", &x)) return NULL;
+    if (kwargs && PyDict_GET_SIZE(kwargs)) {
+        PyErr_SetString(PyExc_TypeError, "signum.Preprocessor takes no keyword arguments");
+        return NULL;
+    }
+
+    if (self->kind == PP_ROUND_TO) {
+        PyObject *r = PyObject_CallFunctionObjArgs(st->Py_round, x, self->ndigits, NULL);
+        if (r == NULL) return NULL;
+        PyObject *res = PyTuple_Pack(1, r);
+        Py_DECREF(r);
+        return res;
+    }
+    int lt = deadband_test(self, x);
+    if (lt < 0) return NULL;
+    if (lt) return PyTuple_Pack(1, st->Py_zero);
+    Py_RETURN_NONE;
+}
+
+/* Pickle as the factory call, e.g. 'signum.deadband(eps)' */
+static PyObject *preproc_reduce(PreprocObject *self, PyObject *Py_UNUSED(ignored))
+{
+    const char *name = self->kind == PP_DEADBAND ? "deadband" : self->kind == PP_REL_DEADBAND ? "rel_deadband"
+                                                                                              : "round_to";
+    PyObject *mod = PyImport_ImportModule("signum");
+    if (mod == NULL) return NULL;
+    PyObject *factory = PyObject_GetAttrString(mod, name);
+    Py_DECREF(mod);
+    if (factory == NULL) return NULL;
+    if (self->arg2) return Py_BuildValue("N(OO)", factory, self->arg1, self->arg2);
+    return Py_BuildValue("N(O)", factory, self->arg1);
+}
+
+static PyMethodDef preproc_methods[] = {
+    {"__reduce__", (PyCFunction)preproc_reduce, METH_NOARGS, NULL},
+    {NULL, NULL, 0, NULL}
+};
+
+static PyType_Slot preproc_slots[] = {
+    {Py_tp_doc,     (void *)"Native preprocessor for 'preprocess=' created by signum.deadband(), "
+                            "signum.rel_deadband(), or signum.round_to()."},
+    {Py_tp_dealloc, (void *)preproc_dealloc},
+    {Py_tp_repr,    (void *)preproc_repr},
+    {Py_tp_call,    (void *)preproc_call},
+    {Py_tp_methods, (void *)preproc_methods},
+    {0, NULL}
+};
+
+static PyType_Spec preproc_spec = {
+    "signum.Preprocessor",
+    sizeof(PreprocObject),
+    0,
+    #ifdef Py_TPFLAGS_DISALLOW_INSTANTIATION
+        Py_TPFLAGS_DEFAULT | Py_TPFLAGS_DISALLOW_INSTANTIATION,
+    #else
+        Py_TPFLAGS_DEFAULT,
+    #endif
+    preproc_slots
+};
+
+/* New preprocessor of the given kind with the factory arguments */
+static PreprocObject *preproc_new(SignumState *st, PreprocKind kind, PyObject *arg1, PyObject *arg2)
+{
+    PreprocObject *pp = PyObject_New(PreprocObject, (PyTypeObject *)st->Preproc_Type);
+    if (pp == NULL) return NULL;
+    pp->kind = kind;
+    Py_INCREF(arg1);
+    pp->arg1 = arg1;
+    Py_XINCREF(arg2);
+    pp->arg2 = arg2;
+    pp->eps = NULL;
+    pp->eps_d = 0.0;
+    pp->eps_exact = false;
+    pp->ndigits = NULL;
+    pp->half = 0.0;
+    return pp;
+}
+
+/* Store the threshold 'eps' (new reference) of a deadband; false with Python error set */
+static bool preproc_set_eps(PreprocObject *pp, PyObject *eps, const char *fname)
+{
+    pp->eps = eps;
+    pp->eps_d = PyFloat_AsDouble(eps);
+    if (pp->eps_d == -1.0 && PyErr_Occurred()) {
+        PyErr_Clear();
+        PyErr_Format(PyExc_TypeError, "signum.%s(): the threshold must be a real number, not '%.80s'",
+                     fname, Py_TYPE(eps)->tp_name);
+        return false;
+    }
+    if (!(pp->eps_d >= 0.0)) {
+        PyErr_Format(PyExc_ValueError, "signum.%s(): the threshold must be non-negative, got %R", fname, eps);
+        return false;
+    }
+    pp->eps_exact = PyFloat_CheckExact(eps) || (PyLong_CheckExact(eps) && pp->eps_d <= 0x1p53);
+    return true;
+}
+
+/* 'deadband(eps)': 'x' with 'abs(x) < eps' is zero */
+static PyObject *signum_deadband(PyObject *self, PyObject *eps)
+{
+    SignumState *st = signum_state(self);
+    PreprocObject *pp = preproc_new(st, PP_DEADBAND, eps, NULL);
+    if (pp == NULL) return NULL;
+    Py_INCREF(eps);
+    if (!preproc_set_eps(pp, eps, "deadband")) { Py_DECREF(pp); return NULL; }
+    return (PyObject *)pp;
+}
+
+/* 'rel_deadband(ref, rtol)': 'x' with 'abs(x) < rtol * abs(ref)' is zero */
+static PyObject *signum_rel_deadband(PyObject *self, PyObject *const *args, Py_ssize_t nargs)
+{
+    SignumState *st = signum_state(self);
+    if (nargs != 2) {
+        PyErr_Format(PyExc_TypeError, "signum.rel_deadband() takes exactly 2 positional arguments, got %zd", nargs);
+        return NULL;
+    }
+    PreprocObject *pp = preproc_new(st, PP_REL_DEADBAND, args[0], args[1]);
+    if (pp == NULL) return NULL;
+    PyObject *a = PyNumber_Absolute(args[0]);
+    PyObject *eps = a ? PyNumber_Multiply(args[1], a) : NULL;
+    Py_XDECREF(a);
+    if (eps == NULL) {
+        PyErr_Clear();
+        PyErr_SetString(PyExc_TypeError, "signum.rel_deadband(): 'ref' and 'rtol' must be real numbers");
+        Py_DECREF(pp);
+        return NULL;
+    }
+    if (!preproc_set_eps(pp, eps, "rel_deadband")) { Py_DECREF(pp); return NULL; }
+    return (PyObject *)pp;
+}
+
+/* 'round_to(ndigits)': the sign of 'round(x, ndigits)' */
+static PyObject *signum_round_to(PyObject *self, PyObject *ndigits)
+{
+    SignumState *st = signum_state(self);
+    if (!PyLong_Check(ndigits)) {
+        PyErr_Format(PyExc_TypeError, "signum.round_to(): 'ndigits' must be an integer, not '%.80s'",
+                     Py_TYPE(ndigits)->tp_name);
+        return NULL;
+    }
+    int overflow;
+    long n = PyLong_AsLongAndOverflow(ndigits, &overflow);
+    if (n == -1 && PyErr_Occurred()) return NULL;
+
+    PreprocObject *pp = preproc_new(st, PP_ROUND_TO, ndigits, NULL);
+    if (pp == NULL) return NULL;
+    Py_INCREF(ndigits);
+    pp->ndigits = ndigits;
+    pp->half = overflow > 0 ? 0.0 : overflow < 0 ? Py_HUGE_VAL : 0.5 * std::pow(10.0, -(double)n);
+    return (PyObject *)pp;
+}
+
+/* Apply all options of 'sign' to 'x': 'preprocess', classification, 'if_exc', 'codeshift'.
+   Returns a quinary code, 'SIGN_RAISE' with Python error set, or 'SIGN_OBJ' with the new reference in '*obj' */
+static inline int sign_apply_core(PyObject *x, const SignOptions *opt, PyObject **obj)
+{
+    SignumState *st = opt->st;
+    /* preprocess */
+    PyObject *to_free = NULL;
+    int code = SIGN_RAISE; /* Not classified yet */
+    if (Py_TYPE(opt->preprocess) == (PyTypeObject *)st->Preproc_Type) { /* Native preprocessor, evaluated in C */
+        code = preproc_code(st, (PreprocObject *)opt->preprocess, &x, &to_free);
+        if (code != SIGN_RAISE) stat_add(STAT_PP_DECIDED);
+    } else if (opt->preprocess != Py_None) { /* 'preprocess' argument exists, call it without checking */
+        PyObject *ppres = PyObject_CallFunctionObjArgs(opt->preprocess, x, NULL);
+        if (ppres == NULL) { /* Error inside 'preprocess(x)': ignore */
+            stat_add(STAT_PP_ERROR);
+            PyErr_Clear();
+        } else {
+            if (PyTuple_Check(ppres)) { /* 'ppres' is a tuple */
+                Py_ssize_t t_size = PyTuple_Size(ppres);
+
+                /* Optimization: Tell the compiler that 'tsize' >= 0 */
+                #if __has_cpp_attribute(assume)
+                    [[assume(0 <= t_size)]];
+                #elif defined(_MSC_VER)
+                    __assume(0 <= t_size);
+                #elif defined(__GNUC__) || defined(__clang__)
+                    if (t_size < 0) __builtin_unreachable();
+                #endif
+
+                switch (t_size) {
+                    case 0: break; /* Ignore the empty tuple */
+                    case 1: {      /* Replace argument */
+                        PyObject *item0 = PyTuple_GetItem(ppres, 0);
+                        Py_INCREF(item0);
+                        x = item0;
+                        to_free = item0;
+                        break;
+                    }
+                    default: {     /* 't_size' > 1: replace result */
+                        PyObject *item1 = PyTuple_GetItem(ppres, 1);
+                        Py_INCREF(item1);
+                        Py_DECREF(ppres);
+                        *obj = item1;
+                        stat_add(STAT_PP_RESULT);
+                        return SIGN_OBJ;
+                    }
+                }
+            }
+            Py_DECREF(ppres);
+        }
+    }
+
+    if (code == SIGN_RAISE) code = opt->fast ? fastsign_code(st, x) : sign_code(st, x);
+
+    if (code == SIGN_ERR) {
+        if (opt->if_exc != Py_None) { /* 'if_exc' argument exists, return its 0th element instead of error */
+            stat_add(STAT_IF_EXC);
+            PyErr_Clear();
+            PyObject *item = PyTuple_GetItem(opt->if_exc, 0); /* We don't check 'if_exc' that should be tuple */
+            Py_INCREF(item);
+            *obj = item;
+            code = SIGN_OBJ;
+        } else if (!opt->no_codeshift) {
+            stat_add(STAT_CODESHIFT);
+            if (PyErr_Occurred()) PyErr_Clear();
+        } else {
+            if (!PyErr_Occurred()) invalid_raise(st, x, opt->fast);
+            else if (!opt->fast) sign_raise(st, x); /* 'fastsign_code' has already set its error */
+            code = SIGN_RAISE;
+        }
+    }
+
+    Py_XDECREF(to_free);
+    return code;
+}
+
+/* 'sign_apply_core', timed for the latency profile */
+static int sign_apply_sampled(PyObject *x, const SignOptions *opt, PyObject **obj)
+{
+    uint64_t start = profile_now();
+    int code = sign_apply_core(x, opt, obj);
+    profile_record(opt->st, Py_TYPE(x), profile_options(opt), profile_now() - start);
+    return code;
+}
+
+/* 'sign_apply_core'; with 'signum.profile' enabled, a sample of the calls is timed */
+static inline int sign_apply(PyObject *x, const SignOptions *opt, PyObject **obj)
+{
+    if (profile_due(opt->st)) return sign_apply_sampled(x, opt, obj);
+    return sign_apply_core(x, opt, obj);
+}
+
+/* Convert the outcome of 'sign_apply' into the Python result of 'sign' */
+static inline PyObject *sign_result(int code, PyObject *obj, const SignOptions *opt)
+{
+    switch (code) {
+        case SIGN_RAISE: return NULL;
+        case SIGN_OBJ:   return obj;
+        case SIGN_NAN:
+            if (opt->no_codeshift) return PyFloat_FromDouble(Py_NAN);
+            [[fallthrough]];
+        default:
+            return PyLong_FromLong(code + opt->c_codeshift); /* +2 is numeric code for NaN,
+                                                                 -2 is numeric code for detectable error */
+    }
+}
+
+/* Processing positional 'codeshift'; returns false with Python error set */
+static inline bool sign_parse_codeshift(PyObject *a2_obj, SignOptions *opt)
+{
+    if (a2_obj == Py_None) return true;
+    if (PyLong_Check(a2_obj)) { /* 'int' is codeshift */
+        opt->c_codeshift = PyLong_AsLong(a2_obj);
+        if (opt->c_codeshift == -1 && PyErr_Occurred()) { opt->c_codeshift = 0; return false; }
+        opt->no_codeshift = false;
+    }
+    return true;
+}
+
+static PyObject *signum_sign(PyObject *self, PyObject *const *args, Py_ssize_t nargs, PyObject *kwnames)
+{
+    SignumState *st = signum_state(self);
+    /* Check positional arguments */
+
+    SignOptions opt = {true, 0, Py_None, Py_None, false, st};
+
+    switch (nargs) {
+        case 2: /* Processing 'codeshift' */
+            if (!sign_parse_codeshift(args[1], &opt)) return NULL;
+            break;
+        case 1:
+            break;
+        case 0:
+            [[fallthrough]];
+        default:
+            PyErr_Format(PyExc_TypeError, "signum.sign() takes 1 or 2 positional arguments, got %zd", nargs);
+            return NULL;
+    }
+
+    /* Parse keyword-only arguments using interned strings */
+    if (kwnames != NULL) {
+        Py_ssize_t nkwargs = PyTuple_GET_SIZE(kwnames);
+        for (Py_ssize_t i = 0; i < nkwargs; i++) {
+            PyObject *key = PyTuple_GET_ITEM(kwnames, i);
+            PyObject *val = args[nargs + i];
+
+            if (key == st->kw_codeshift) {
+                if (!st->warn_flag.load(std::memory_order_relaxed))
+                    st->warn_flag.store(true, std::memory_order_relaxed);
+                if (nargs != 2) {
+                    /* Convert to 'long' without checking */
+                    if (val != Py_None) {
+                        opt.c_codeshift = PyLong_AsLong(val);
+                        if (opt.c_codeshift == -1 && PyErr_Occurred()) { opt.c_codeshift = 0; return NULL; }
+                        opt.no_codeshift = false;
+                    }
+                } else {
+                    PyErr_Format(PyExc_TypeError,
+                                 "signum.sign(): the 2nd positional argument used; 'codeshift=' is not permitted");
+                    return NULL;
+                }
+            } else if (key == st->kw_if_exc) {
+                opt.if_exc = val;
+            } else if (key == st->kw_preprocess) {
+                opt.preprocess = val;
+            } else {
+                PyErr_Format(PyExc_TypeError, "signum.sign() got an unexpected keyword argument '%U'", key);
+                return NULL;
+            }
+        }
+    }
+
+    PyObject *obj = NULL;
+    int code = sign_apply(args[0], &opt, &obj);
+    return sign_result(code, obj, &opt);
+}
+
+/* 'fastsign': fast straightforward signum */
+static inline PyObject *fastsign_result(SignumState *st, PyObject *x)
+{
+    if (PyErr_Occurred()) PyErr_Clear();
+
+    switch (fastsign_code(st, x)) {
+        case SIGN_NEG:  Py_INCREF(st->Py_m_one);     return st->Py_m_one;
+        case SIGN_ZERO: Py_INCREF(st->Py_zero);      return st->Py_zero;
+        case SIGN_POS:  Py_INCREF(st->Py_one);       return st->Py_one;
+        case SIGN_NAN:
+            #ifdef Py_GIL_DISABLED
+                return PyFloat_FromDouble(Py_NAN); /* Threads would contend for the reference count of a shared NaN */
+            #else
+                Py_INCREF(st->Py_float_nan); return st->Py_float_nan;
+            #endif
+    }
+    if (!PyErr_Occurred()) invalid_raise(st, x, true);
+    return NULL;
+}
+
+static PyObject *signum_fastsign(PyObject *self, PyObject *x)
+{
+    SignumState *st = signum_state(self);
+    if (!profile_due(st)) return fastsign_result(st, x);
+    uint64_t start = profile_now();
+    PyObject *res = fastsign_result(st, x);
+    profile_record(st, Py_TYPE(x), PROF_FAST, profile_now() - start);
+    return res;
+}
+
+/* --- PRE-BOUND SIGNERS --- */
+
+/* 'signum.Signer': the options of 'sign' parsed once; calling it costs no keyword processing */
+struct SignerObject {
+    PyObject_HEAD
+    SignOptions    opt;        /* Strong references to 'if_exc' and 'preprocess' */
+    PyObject      *codeshift;  /* As given: None or 'int' */
+    vectorcallfunc vectorcall;
+};
+
+static int signer_traverse(SignerObject *self, visitproc visit, void *arg)
+{
+    #if PY_VERSION_HEX >= 0x03090000
+        Py_VISIT(Py_TYPE(self));
+    #endif
+    Py_VISIT(self->opt.if_exc);
+    Py_VISIT(self->opt.preprocess);
+    return 0;
+}
+
+static int signer_clear(SignerObject *self)
+{
+    Py_CLEAR(self->opt.if_exc);
+    Py_CLEAR(self->opt.preprocess);
+    Py_CLEAR(self->codeshift);
+    return 0;
+}
+
+static void signer_dealloc(SignerObject *self)
+{
+    PyTypeObject *tp = Py_TYPE(self);
+    PyObject_GC_UnTrack(self);
+    signer_clear(self);
+    tp->tp_free((PyObject *)self);
+    Py_DECREF(tp);
+}
+
+static PyObject *signer_vectorcall(PyObject *callable, PyObject *const *args, size_t nargsf, PyObject *kwnames)
+{
+    SignerObject *self = (SignerObject *)callable;
+    Py_ssize_t nargs = PyVectorcall_NARGS(nargsf);
+    if (nargs != 1 || (kwnames && PyTuple_GET_SIZE(kwnames))) {
+        PyErr_Format(PyExc_TypeError, "signum.Signer takes exactly 1 positional argument (%zd given)",
+                     nargs + (kwnames ? PyTuple_GET_SIZE(kwnames) : 0));
+        return NULL;
+    }
+    PyObject *obj = NULL;
+    int code = sign_apply(args[0], &self->opt, &obj);
+    return sign_result(code, obj, &self->opt);
+}
+
+#if PY_VERSION_HEX < 0x03090000
+/* Python 3.8: heap types cannot declare the vectorcall offset */
+static PyObject *signer_call(PyObject *self, PyObject *args, PyObject *kwargs)
+{
+    PyObject *names = kwargs && PyDict_GET_SIZE(kwargs) ? kwargs : NULL;
+    return signer_vectorcall(self, &PyTuple_GET_ITEM(args, 0), PyTuple_GET_SIZE(args), names);
+}
+#endif
+
+/* 'Signer(codeshift=None, if_exc=None, preprocess=None, mode='strict')' */
+static PyObject *signer_new(PyTypeObject *type, PyObject *args, PyObject *kwargs)
+{
+    SignumState *st = type_state(type);
+    static const char *kwlist[] = {"codeshift", "if_exc", "preprocess", "mode", NULL};
+    PyObject *codeshift = Py_None, *if_exc = Py_None, *preprocess = Py_None;
+    const char *mode = "strict";
+    if (!PyArg_ParseTupleAndKeywords(args, kwargs, "|OOOs:Signer", (char **)kwlist,
+                                     &codeshift, &if_exc, &preprocess, &mode)) return NULL;
+
+    SignOptions opt = {true, 0, if_exc, preprocess, false, st};
+    if (codeshift != Py_None) {
+        if (!PyLong_Check(codeshift)) {
+            PyErr_Format(PyExc_TypeError, "signum.Signer(): codeshift must be int or None, not '%.80s'",
+                         Py_TYPE(codeshift)->tp_name);
+            return NULL;
+        }
+        if (!sign_parse_codeshift(codeshift, &opt)) return NULL;
+    }
+    /* Checked once here, so calls need not check */
+    if (if_exc != Py_None && (!PyTuple_Check(if_exc) || PyTuple_GET_SIZE(if_exc) == 0)) {
+        PyErr_Format(PyExc_TypeError, "signum.Signer(): if_exc must be a non-empty tuple or None, not '%.80s'",
+                     Py_TYPE(if_exc)->tp_name);
+        return NULL;
+    }
+    if (preprocess != Py_None && !PyCallable_Check(preprocess)) {
+        PyErr_Format(PyExc_TypeError, "signum.Signer(): preprocess must be callable or None, not '%.80s'",
+                     Py_TYPE(preprocess)->tp_name);
+        return NULL;
+    }
+    if (strcmp(mode, "fast") == 0) {
+        opt.fast = true;
+    } else if (strcmp(mode, "strict") != 0) {
+        PyErr_Format(PyExc_ValueError, "signum.Signer(): mode must be 'strict' or 'fast', not '%s'", mode);
+        return NULL;
+    }
+
+    SignerObject *self = (SignerObject *)type->tp_alloc(type, 0);
+    if (self == NULL) return NULL;
+    self->opt = opt;
+    Py_INCREF(if_exc);
+    Py_INCREF(preprocess);
+    Py_INCREF(codeshift);
+    self->codeshift = codeshift;
+    self->vectorcall = signer_vectorcall;
+    return (PyObject *)self;
+}
+
+static PyObject *signer_repr(SignerObject *self)
+{
+    return PyUnicode_FromFormat("signum.Signer(codeshift=%R, if_exc=%R, preprocess=%R, mode='%s')",
+                                self->codeshift, self->opt.if_exc, self->opt.preprocess,
+                                self->opt.fast ? "fast" : "strict");
+}
+
+/* Pickle as the constructor call with all options */
+static PyObject *signer_reduce(SignerObject *self, PyObject *Py_UNUSED(ignored))
+{
+    return Py_BuildValue("O(OOOs)", Py_TYPE(self), self->codeshift, self->opt.if_exc, self->opt.preprocess,
+                         self->opt.fast ? "fast" : "strict");
+}
+
+static PyObject *signer_get_mode(SignerObject *self, void *closure)
+{
+    return PyUnicode_FromString(self->opt.fast ? "fast" : "strict");
+}
+
+static PyMethodDef signer_methods[] = {
+    {"__reduce__", (PyCFunction)signer_reduce, METH_NOARGS, NULL},
+    {NULL, NULL, 0, NULL}
+};
+
+static PyMemberDef signer_members[] = {
+    {"codeshift",  T_OBJECT, offsetof(SignerObject, codeshift), READONLY, NULL},
+    {"if_exc",     T_OBJECT, offsetof(SignerObject, opt.if_exc), READONLY, NULL},
+    {"preprocess", T_OBJECT, offsetof(SignerObject, opt.preprocess), READONLY, NULL},
+    #if PY_VERSION_HEX >= 0x03090000
+        {"__vectorcalloffset__", T_PYSSIZET, offsetof(SignerObject, vectorcall), READONLY, NULL},
+    #endif
+    {NULL, 0, 0, 0, NULL}
+};
+
+static PyGetSetDef signer_getset[] = {
+    {"mode", (getter)signer_get_mode, NULL, NULL, NULL},
+    {NULL, NULL, NULL, NULL, NULL}
+};
+
+static PyType_Slot signer_slots[] = {
+    {Py_tp_doc,      (void *)"Signer(codeshift=None, if_exc=None, preprocess=None, mode='strict')\n"
+                             "A callable with pre-bound options: Signer(...)(x) is sign(x, ...), "
+                             "or fastsign semantics with mode='fast'."},
+    {Py_tp_new,      (void *)signer_new},
+    {Py_tp_dealloc,  (void *)signer_dealloc},
+    {Py_tp_traverse, (void *)signer_traverse},
+    {Py_tp_clear,    (void *)signer_clear},
+    {Py_tp_repr,     (void *)signer_repr},
+    #if PY_VERSION_HEX >= 0x03090000
+        {Py_tp_call, (void *)PyVectorcall_Call},
+    #else
+        {Py_tp_call, (void *)signer_call},
+    #endif
+    {Py_tp_methods,  (void *)signer_methods},
+    {Py_tp_members,  (void *)signer_members},
+    {Py_tp_getset,   (void *)signer_getset},
+    {0, NULL}
+};
+
+static PyType_Spec signer_spec = {
+    "signum.Signer",
+    sizeof(SignerObject),
+    0,
+    #if PY_VERSION_HEX >= 0x03090000
+        Py_TPFLAGS_DEFAULT | Py_TPFLAGS_HAVE_GC | Py_TPFLAGS_HAVE_VECTORCALL,
+    #else
+        Py_TPFLAGS_DEFAULT | Py_TPFLAGS_HAVE_GC,
+    #endif
+    signer_slots
+};
+
+/* --- BULK PROCESSING --- */
+
+/* Common keyword arguments of the bulk functions: 'if_exc', 'preprocess', 'fast'.
+   Returns 1 if 'key' is processed, 0 if it is unknown, -1 with Python error set */
+static int sign_parse_keyword(PyObject *key, PyObject *val, SignOptions *opt)
+{
+    SignumState *st = opt->st;
+    if (key == st->kw_if_exc) {
+        opt->if_exc = val;
+    } else if (key == st->kw_preprocess) {
+        opt->preprocess = val;
+    } else if (key == st->kw_fast) {
+        int flag = PyObject_IsTrue(val);
+        if (flag < 0) return -1;
+        opt->fast = flag;
+    } else {
+        return 0;
+    }
+    return 1;
+}
+
+/* Codes are stored as int8: 'codeshift' defaults to 0 to encode NaN and errors.
+   Returns false with Python error set if the shifted codes do not fit */
+static bool sign_int8_codeshift(SignOptions *opt, const char *fname)
+{
+    opt->no_codeshift = false;
+    if (opt->c_codeshift < -128 - SIGN_ERR || opt->c_codeshift > 127 - SIGN_NAN) {
+        PyErr_Format(PyExc_OverflowError,
+                     "signum.%s(): codeshift %ld does not fit into array('b')", fname, opt->c_codeshift);
+        return false;
+    }
+    return true;
+}
+
+/* Convert the outcome of 'sign_apply' into an int8 code; returns false with Python error set */
+static inline bool sign_result_int8(int code, PyObject *obj, const SignOptions *opt, const char *fname,
+                                    signed char *dst)
+{
+    long v;
+    switch (code) {
+        case SIGN_RAISE: return false;
+        case SIGN_OBJ:   /* 'if_exc' or 'preprocess' result must be a small 'int' */
+            v = PyLong_AsLong(obj);
+            Py_DECREF(obj);
+            if (v == -1 && PyErr_Occurred()) return false;
+            if (v < -128 || v > 127) {
+                PyErr_Format(PyExc_OverflowError, "signum.%s(): result %ld does not fit into array('b')", fname, v);
+                return false;
+            }
+            break;
+        default:
+            v = code + opt->c_codeshift;
+    }
+    *dst = (signed char)v;
+    return true;
+}
+
+/* Items of an iterable: lists and tuples are read directly, other iterables through their iterator */
+struct ItemSource {
+    PyObject   *seq;  /* List or tuple from 'PySequence_Fast' */
+    PyObject   *it;   /* Iterator of other iterables */
+    Py_ssize_t  i;
+};
+
+/* Open 'src'; '*hint' receives the size or '__length_hint__'. Returns false with Python error set */
+static bool source_open(ItemSource *src, PyObject *obj, Py_ssize_t *hint)
+{
+    src->seq = src->it = NULL;
+    src->i = 0;
+    if (PyList_CheckExact(obj) || PyTuple_CheckExact(obj)) {
+        src->seq = PySequence_Fast(obj, "argument must be iterable");
+        if (src->seq == NULL) return false;
+        if (hint) *hint = PySequence_Fast_GET_SIZE(src->seq);
+    } else {
+        src->it = PyObject_GetIter(obj);
+        if (src->it == NULL) return false;
+        if (hint) {
+            *hint = PyObject_LengthHint(obj, 0);
+            if (*hint < 0) { Py_CLEAR(src->it); return false; }
+        }
+    }
+    return true;
+}
+
+/* New reference to the next item; NULL at the end or with Python error set */
+static inline PyObject *source_next(ItemSource *src)
+{
+    if (src->seq) { /* The list may be changed by 'preprocess' or comparisons: check its size every time */
+        if (src->i >= PySequence_Fast_GET_SIZE(src->seq)) return NULL;
+        PyObject *item = PySequence_Fast_GET_ITEM(src->seq, src->i++);
+        Py_INCREF(item);
+        return item;
+    }
+    return PyIter_Next(src->it);
+}
+
+static inline void source_close(ItemSource *src)
+{
+    Py_CLEAR(src->seq);
+    Py_CLEAR(src->it);
+}
+
+/* New 'array' of 'typecode' holding a copy of 'nbytes' bytes from 'buf' */
+static PyObject *array_from(SignumState *st, PyObject *typecode, const void *buf, Py_ssize_t nbytes)
+{
+    PyObject *arr = PyObject_CallFunctionObjArgs(st->Py_array_type, typecode, NULL);
+    if (arr == NULL || nbytes == 0) return arr;
+
+    PyObject *mv = PyMemoryView_FromMemory((char *)buf, nbytes, PyBUF_READ);
+    PyObject *res = mv ? PyObject_CallMethodObjArgs(arr, st->kw_frombytes, mv, NULL) : NULL;
+    Py_XDECREF(mv);
+    if (res == NULL) { Py_DECREF(arr); return NULL; }
+    Py_DECREF(res);
+    return arr;
+}
+
+/* New 'array('b')' holding a copy of 'n' codes from 'buf' */
+static inline PyObject *int8_array_from(SignumState *st, const signed char *buf, Py_ssize_t n)
+{
+    return array_from(st, st->Py_typecode_b, buf, n);
+}
+
+/* 'sign_many': signs of all items of a sequence or iterable in one call */
+static PyObject *signum_sign_many(PyObject *self, PyObject *const *args, Py_ssize_t nargs, PyObject *kwnames)
+{
+    SignumState *st = signum_state(self);
+    SignOptions opt = {true, 0, Py_None, Py_None, false, st};
+    bool as_array = false;
+
+    switch (nargs) {
+        case 2: /* Processing 'codeshift' */
+            if (!sign_parse_codeshift(args[1], &opt)) return NULL;
+            break;
+        case 1:
+            break;
+        default:
+            PyErr_Format(PyExc_TypeError, "signum.sign_many() takes 1 or 2 positional arguments, got %zd", nargs);
+            return NULL;
+    }
+
+    /* Parse keyword-only arguments using interned strings */
+    if (kwnames != NULL) {
+        Py_ssize_t nkwargs = PyTuple_GET_SIZE(kwnames);
+        for (Py_ssize_t i = 0; i < nkwargs; i++) {
+            PyObject *key = PyTuple_GET_ITEM(kwnames, i);
+            PyObject *val = args[nargs + i];
+
+            int rc = sign_parse_keyword(key, val, &opt);
+            if (rc < 0) return NULL;
+            if (rc > 0) continue;
+            if (key == st->kw_as_array) {
+                int flag = PyObject_IsTrue(val);
+                if (flag < 0) return NULL;
+                as_array = flag;
+            } else {
+                PyErr_Format(PyExc_TypeError, "signum.sign_many() got an unexpected keyword argument '%U'", key);
+                return NULL;
+            }
+        }
+    }
+
+    if (as_array && !sign_int8_codeshift(&opt, "sign_many")) return NULL;
+
+    /* Lists and tuples are read directly, other iterables are presized by '__length_hint__' */
+    ItemSource src;
+    Py_ssize_t n;
+    if (!source_open(&src, args[0], &n)) return NULL;
+
+    PyObject *list = NULL;
+    signed char *buf = NULL;
+    Py_ssize_t k = 0, cap = n > 0 ? n : 16;
+
+    if (as_array) {
+        buf = (signed char *)PyMem_Malloc(cap);
+        if (buf == NULL) { PyErr_NoMemory(); goto fail; }
+    } else {
+        list = PyList_New(n);
+        if (list == NULL) goto fail;
+    }
+
+    for (;;) {
+        PyObject *item = source_next(&src);
+        if (item == NULL) {
+            if (PyErr_Occurred()) goto fail;
+            break;
+        }
+
+        PyObject *obj = NULL;
+        int code = sign_apply(item, &opt, &obj);
+        Py_DECREF(item);
+
+        if (as_array) {
+            if (k == cap) {
+                signed char *nbuf = (signed char *)PyMem_Realloc(buf, cap <<= 1);
+                if (nbuf == NULL) { PyErr_NoMemory(); goto fail; }
+                buf = nbuf;
+            }
+            if (!sign_result_int8(code, obj, &opt, "sign_many", buf + k)) goto fail;
+            k++;
+        } else {
+            PyObject *r = sign_result(code, obj, &opt);
+            if (r == NULL) goto fail;
+            if (k < n) {
+                PyList_SET_ITEM(list, k, r);
+            } else {
+                int rc = PyList_Append(list, r);
+                Py_DECREF(r);
+                if (rc < 0) goto fail;
+            }
+            k++;
+        }
+    }
+
+    source_close(&src);
+
+    if (as_array) {
+        PyObject *arr = int8_array_from(st, buf, k);
+        PyMem_Free(buf);
+        return arr;
+    }
+    if (k < n && PyList_SetSlice(list, k, n, NULL) < 0) { /* Shorter than the length hint */
+        Py_DECREF(list);
+        return NULL;
+    }
+    return list;
+
+fail:
+    source_close(&src);
+    Py_XDECREF(list);
+    PyMem_Free(buf);
+    return NULL;
+}
+
+/* --- STREAMING --- */
+
+/* Lazy iterator of 'isign': signs of the items of an upstream iterator, one by one or in 'array('b')' batches */
+struct IsignObject {
+    PyObject_HEAD
+    PyObject    *it;     /* Upstream iterator; NULL when exhausted */
+    SignOptions  opt;    /* Strong references to 'if_exc' and 'preprocess' */
+    Py_ssize_t   batch;  /* 0: yield single results */
+    signed char *buf;    /* Batch buffer */
+};
+
+static int isign_traverse(IsignObject *self, visitproc visit, void *arg)
+{
+    #if PY_VERSION_HEX >= 0x03090000
+        Py_VISIT(Py_TYPE(self));
+    #endif
+    Py_VISIT(self->it);
+    Py_VISIT(self->opt.if_exc);
+    Py_VISIT(self->opt.preprocess);
+    return 0;
+}
+
+static int isign_clear(IsignObject *self)
+{
+    Py_CLEAR(self->it);
+    Py_CLEAR(self->opt.if_exc);
+    Py_CLEAR(self->opt.preprocess);
+    return 0;
+}
+
+static void isign_dealloc(IsignObject *self)
+{
+    PyTypeObject *tp = Py_TYPE(self);
+    PyObject_GC_UnTrack(self);
+    isign_clear(self);
+    PyMem_Free(self->buf);
+    tp->tp_free((PyObject *)self);
+    Py_DECREF(tp);
+}
+
+static PyObject *isign_next_unlocked(IsignObject *self)
+{
+    SignumState *st = self->opt.st;
+    if (self->it == NULL) return NULL;
+
+    if (self->batch == 0) {
+        PyObject *item = PyIter_Next(self->it);
+        if (item == NULL) {
+            if (!PyErr_Occurred()) Py_CLEAR(self->it);
+            return NULL;
+        }
+        PyObject *obj = NULL;
+        int code = sign_apply(item, &self->opt, &obj);
+        Py_DECREF(item);
+        return sign_result(code, obj, &self->opt);
+    }
+
+    Py_ssize_t k = 0;
+    while (k < self->batch) {
+        PyObject *item = PyIter_Next(self->it);
+        if (item == NULL) {
+            if (PyErr_Occurred()) return NULL;
+            Py_CLEAR(self->it);
+            break;
+        }
+        PyObject *obj = NULL;
+        int code = sign_apply(item, &self->opt, &obj);
+        Py_DECREF(item);
+        if (!sign_result_int8(code, obj, &self->opt, "isign", self->buf + k)) return NULL;
+        k++;
+    }
+    return k ? int8_array_from(st, self->buf, k) : NULL;
+}
+
+/* Threads sharing one iterator get distinct items or batches */
+static PyObject *isign_next(IsignObject *self)
+{
+    PyObject *res;
+    Py_BEGIN_CRITICAL_SECTION(self);
+    res = isign_next_unlocked(self);
+    Py_END_CRITICAL_SECTION();
+    return res;
+}
+
+static PyType_Slot isign_slots[] = {
+    {Py_tp_doc,      (void *)"Lazy iterator returned by signum.isign()."},
+    {Py_tp_dealloc,  (void *)isign_dealloc},
+    {Py_tp_traverse, (void *)isign_traverse},
+    {Py_tp_clear,    (void *)isign_clear},
+    {Py_tp_iter,     (void *)PyObject_SelfIter},
+    {Py_tp_iternext, (void *)isign_next},
+    {0, NULL}
+};
+
+static PyType_Spec isign_spec = {
+    "signum.SignIterator",
+    sizeof(IsignObject),
+    0,
+    #ifdef Py_TPFLAGS_DISALLOW_INSTANTIATION
+        Py_TPFLAGS_DEFAULT | Py_TPFLAGS_HAVE_GC | Py_TPFLAGS_DISALLOW_INSTANTIATION,
+    #else
+        Py_TPFLAGS_DEFAULT | Py_TPFLAGS_HAVE_GC,
+    #endif
+    isign_slots
+};
+
+/* 'isign': lazy C-level iterator over the signs of an iterable */
+static PyObject *signum_isign(PyObject *self, PyObject *const *args, Py_ssize_t nargs, PyObject *kwnames)
+{
+    SignumState *st = signum_state(self);
+    SignOptions opt = {true, 0, Py_None, Py_None, false, st};
+    Py_ssize_t batch = 0;
+
+    switch (nargs) {
+        case 2: /* Processing 'codeshift' */
+            if (!sign_parse_codeshift(args[1], &opt)) return NULL;
+            break;
+        case 1:
+            break;
+        default:
+            PyErr_Format(PyExc_TypeError, "signum.isign() takes 1 or 2 positional arguments, got %zd", nargs);
+            return NULL;
+    }
+
+    /* Parse keyword-only arguments using interned strings */
+    if (kwnames != NULL) {
+        Py_ssize_t nkwargs = PyTuple_GET_SIZE(kwnames);
+        for (Py_ssize_t i = 0; i < nkwargs; i++) {
+            PyObject *key = PyTuple_GET_ITEM(kwnames, i);
+            PyObject *val = args[nargs + i];
+
+            int rc = sign_parse_keyword(key, val, &opt);
+            if (rc < 0) return NULL;
+            if (rc > 0) continue;
+            if (key == st->kw_batch) {
+                if (val == Py_None) continue;
+                batch = PyLong_AsSsize_t(val);
+                if (batch == -1 && PyErr_Occurred()) return NULL;
+                if (batch <= 0) {
+                    PyErr_Format(PyExc_ValueError, "signum.isign(): batch must be positive, got %zd", batch);
+                    return NULL;
+                }
+            } else {
+                PyErr_Format(PyExc_TypeError, "signum.isign() got an unexpected keyword argument '%U'", key);
+                return NULL;
+            }
+        }
+    }
+
+    if (batch && !sign_int8_codeshift(&opt, "isign")) return NULL;
+
+    PyObject *it = PyObject_GetIter(args[0]);
+    if (it == NULL) return NULL;
+
+    IsignObject *res = PyObject_GC_New(IsignObject, (PyTypeObject *)st->Isign_Type);
+    if (res == NULL) { Py_DECREF(it); return NULL; }
+    res->it = it;
+    res->opt = opt;
+    Py_INCREF(opt.if_exc);
+    Py_INCREF(opt.preprocess);
+    res->batch = batch;
+    res->buf = NULL;
+    if (batch) {
+        res->buf = (signed char *)PyMem_Malloc(batch);
+        if (res->buf == NULL) { Py_DECREF(res); return PyErr_NoMemory(); }
+    }
+    PyObject_GC_Track(res);
+    return (PyObject *)res;
+}
+
+/* --- SIMD KERNELS --- */
+
+/* Vector compares classify float64 items: GT and LT are ordered (false for NaN), UNORD is true for NaN only.
+   For a group of lanes two bit masks, 'hi = GT | UNORD' and 'lo = LT | UNORD', give the code of lane 'k':
+   hi_k - lo_k + 2 * (hi_k & lo_k), i.e. 1, -1, 0 (±0.0), and 2 (NaN) exactly as 'sign_code_of'.
+   The SSE2 and AVX2 kernels look the codes of 4 lanes up in a table indexed by their masks, already shifted */
+enum SimdLevel { SIMD_SCALAR = 0, SIMD_SSE2, SIMD_AVX2, SIMD_AVX512 };
+static const char *const simd_names[] = {"scalar", "sse2", "avx2", "avx512"};
+
+#define SIMD_MIN_ITEMS 64 /* Shorter buffers don't pay for building the table */
+
+/* The best instruction set of the CPU and the OS */
+static SimdLevel simd_detect()
+{
+#if !defined(SIGNUM_X86)
+    return SIMD_SCALAR;
+#elif defined(_MSC_VER) && !defined(__clang__)
+    int r[4];
+    __cpuid(r, 0);
+    int max_leaf = r[0];
+    __cpuid(r, 1);
+    bool avx = (r[2] & (1 << 27)) && (r[2] & (1 << 28)); /* OSXSAVE and AVX */
+    unsigned long long xcr0 = avx ? _xgetbv(0) : 0;
+    if (max_leaf >= 7 && (xcr0 & 0x06) == 0x06) { /* The OS saves the XMM and YMM registers */
+        __cpuidex(r, 7, 0);
+        if ((r[1] & (1 << 16)) && (xcr0 & 0xE0) == 0xE0) return SIMD_AVX512; /* ... and the ZMM and mask ones */
+        if (r[1] & (1 << 5)) return SIMD_AVX2;
+    }
+    return SIMD_SSE2;
+#else
+    __builtin_cpu_init(); /* Also checks that the OS saves the registers */
+    if (__builtin_cpu_supports("avx512f")) return SIMD_AVX512;
+    if (__builtin_cpu_supports("avx2"))    return SIMD_AVX2;
+    return SIMD_SSE2;
+#endif
+}
+
+/* The instruction set of the kernels: detected once per process, possibly lowered by the environment variable
+   'SIGNUM_SIMD' ('scalar', 'sse2', 'avx2', or 'avx512') to compare or work around implementations */
+static SimdLevel simd_level()
+{
+    static const SimdLevel level = [] {
+        SimdLevel best = simd_detect();
+        const char *env = getenv("SIGNUM_SIMD");
+        for (int i = SIMD_SCALAR; env != NULL && i < best; i++) {
+            if (strcmp(env, simd_names[i]) == 0) return (SimdLevel)i;
+        }
+        return best;
+    }();
+    return level;
+}
+
+#if defined(SIGNUM_X86)
+
+/* Fill the table of codes of 4 lanes: index 'hi | lo << 4' */
+static void simd_table(uint32_t *table, signed char shift)
+{
+    for (unsigned i = 0; i < 256; i++) {
+        uint32_t quad = 0;
+        for (int k = 0; k < 4; k++) {
+            int hi = i >> k & 1, lo = i >> (k + 4) & 1;
+            quad |= (uint32_t)(uint8_t)(hi - lo + 2 * (hi & lo) + shift) << 8 * k;
+        }
+        table[i] = quad;
+    }
+}
+
+/* Add the counts of 'done' items, of which 'pos', 'neg', and 'nan' were classified by a vector kernel */
+static inline void simd_counts_add(Py_ssize_t *cnt, Py_ssize_t done, Py_ssize_t pos, Py_ssize_t neg, Py_ssize_t nan)
+{
+    cnt[SIGN_NEG - SIGN_ERR]  += neg;
+    cnt[SIGN_ZERO - SIGN_ERR] += done - pos - neg - nan;
+    cnt[SIGN_POS - SIGN_ERR]  += pos;
+    cnt[SIGN_NAN - SIGN_ERR]  += nan;
+}
+
+/* Each kernel processes whole groups and returns the number of items done; the caller finishes the tail.
+   Codes of a group are stored after all its items are read, so 'dst' may overlap 'src' from its start.
+   Weighted sums go to 4 lanes, item 'i' to lane 'i % 4', as in 'count_kernel' */
+
+static Py_ssize_t sign_f64_sse2(const double *s, signed char *dst, Py_ssize_t n, const uint32_t *table)
+{
+    const __m128d zero = _mm_setzero_pd();
+    Py_ssize_t i = 0;
+    for (; i + 4 <= n; i += 4) {
+        __m128d a = _mm_loadu_pd(s + i), b = _mm_loadu_pd(s + i + 2);
+        __m128d na = _mm_cmpunord_pd(a, a), nb = _mm_cmpunord_pd(b, b);
+        int hi = _mm_movemask_pd(_mm_or_pd(_mm_cmpgt_pd(a, zero), na))
+               | _mm_movemask_pd(_mm_or_pd(_mm_cmpgt_pd(b, zero), nb)) << 2;
+        int lo = _mm_movemask_pd(_mm_or_pd(_mm_cmplt_pd(a, zero), na))
+               | _mm_movemask_pd(_mm_or_pd(_mm_cmplt_pd(b, zero), nb)) << 2;
+        memcpy(dst + i, &table[hi | lo << 4], 4);
+    }
+    return i;
+}
+
+/* The counting kernels subtract the compare masks (-1 where true) from 64-bit lane counters */
+static Py_ssize_t count_f64_sse2(const double *s, Py_ssize_t n, Py_ssize_t *cnt, const double *w, double *lane)
+{
+    const __m128d zero = _mm_setzero_pd(), one = _mm_set1_pd(1.0), m_one = _mm_set1_pd(-1.0);
+    __m128d acc01 = _mm_loadu_pd(lane), acc23 = _mm_loadu_pd(lane + 2);
+    __m128i pos = _mm_setzero_si128(), neg = _mm_setzero_si128(), nan = _mm_setzero_si128();
+    Py_ssize_t i = 0;
+    for (; i + 4 <= n; i += 4) {
+        __m128d a = _mm_loadu_pd(s + i), b = _mm_loadu_pd(s + i + 2);
+        __m128d ga = _mm_cmpgt_pd(a, zero), gb = _mm_cmpgt_pd(b, zero);
+        __m128d la = _mm_cmplt_pd(a, zero), lb = _mm_cmplt_pd(b, zero);
+        pos = _mm_sub_epi64(_mm_sub_epi64(pos, _mm_castpd_si128(ga)), _mm_castpd_si128(gb));
+        neg = _mm_sub_epi64(_mm_sub_epi64(neg, _mm_castpd_si128(la)), _mm_castpd_si128(lb));
+        nan = _mm_sub_epi64(_mm_sub_epi64(nan, _mm_castpd_si128(_mm_cmpunord_pd(a, a))),
+                            _mm_castpd_si128(_mm_cmpunord_pd(b, b)));
+        if (w != NULL) {
+            __m128d sa = _mm_or_pd(_mm_and_pd(ga, one), _mm_and_pd(la, m_one));
+            __m128d sb = _mm_or_pd(_mm_and_pd(gb, one), _mm_and_pd(lb, m_one));
+            acc01 = _mm_add_pd(acc01, _mm_mul_pd(_mm_loadu_pd(w + i), sa));
+            acc23 = _mm_add_pd(acc23, _mm_mul_pd(_mm_loadu_pd(w + i + 2), sb));
+        }
+    }
+    _mm_storeu_pd(lane, acc01);
+    _mm_storeu_pd(lane + 2, acc23);
+    int64_t c[3][2];
+    _mm_storeu_si128((__m128i *)c[0], pos);
+    _mm_storeu_si128((__m128i *)c[1], neg);
+    _mm_storeu_si128((__m128i *)c[2], nan);
+    simd_counts_add(cnt, i, c[0][0] + c[0][1], c[1][0] + c[1][1], c[2][0] + c[2][1]);
+    return i;
+}
+
+SIGNUM_TARGET("avx2")
+static Py_ssize_t sign_f64_avx2(const double *s, signed char *dst, Py_ssize_t n, const uint32_t *table)
+{
+    const __m256d zero = _mm256_setzero_pd();
+    Py_ssize_t i = 0;
+    for (; i + 8 <= n; i += 8) {
+        __m256d a = _mm256_loadu_pd(s + i), b = _mm256_loadu_pd(s + i + 4);
+        __m256d na = _mm256_cmp_pd(a, a, _CMP_UNORD_Q), nb = _mm256_cmp_pd(b, b, _CMP_UNORD_Q);
+        int hi_a = _mm256_movemask_pd(_mm256_or_pd(_mm256_cmp_pd(a, zero, _CMP_GT_OQ), na));
+        int lo_a = _mm256_movemask_pd(_mm256_or_pd(_mm256_cmp_pd(a, zero, _CMP_LT_OQ), na));
+        int hi_b = _mm256_movemask_pd(_mm256_or_pd(_mm256_cmp_pd(b, zero, _CMP_GT_OQ), nb));
+        int lo_b = _mm256_movemask_pd(_mm256_or_pd(_mm256_cmp_pd(b, zero, _CMP_LT_OQ), nb));
+        uint64_t codes = table[hi_a | lo_a << 4] | (uint64_t)table[hi_b | lo_b << 4] << 32;
+        memcpy(dst + i, &codes, 8);
+    }
+    return i;
+}
+
+SIGNUM_TARGET("avx2")
+static Py_ssize_t count_f64_avx2(const double *s, Py_ssize_t n, Py_ssize_t *cnt, const double *w, double *lane)
+{
+    const __m256d zero = _mm256_setzero_pd(), one = _mm256_set1_pd(1.0), m_one = _mm256_set1_pd(-1.0);
+    __m256d acc = _mm256_loadu_pd(lane);
+    __m256i pos = _mm256_setzero_si256(), neg = _mm256_setzero_si256(), nan = _mm256_setzero_si256();
+    Py_ssize_t i = 0;
+    for (; i + 4 <= n; i += 4) {
+        __m256d a = _mm256_loadu_pd(s + i);
+        __m256d gt = _mm256_cmp_pd(a, zero, _CMP_GT_OQ), lt = _mm256_cmp_pd(a, zero, _CMP_LT_OQ);
+        pos = _mm256_sub_epi64(pos, _mm256_castpd_si256(gt));
+        neg = _mm256_sub_epi64(neg, _mm256_castpd_si256(lt));
+        nan = _mm256_sub_epi64(nan, _mm256_castpd_si256(_mm256_cmp_pd(a, a, _CMP_UNORD_Q)));
+        if (w != NULL) {
+            __m256d sg = _mm256_or_pd(_mm256_and_pd(gt, one), _mm256_and_pd(lt, m_one));
+            acc = _mm256_add_pd(acc, _mm256_mul_pd(_mm256_loadu_pd(w + i), sg));
+        }
+    }
+    _mm256_storeu_pd(lane, acc);
+    int64_t c[3][4];
+    _mm256_storeu_si256((__m256i *)c[0], pos);
+    _mm256_storeu_si256((__m256i *)c[1], neg);
+    _mm256_storeu_si256((__m256i *)c[2], nan);
+    simd_counts_add(cnt, i, c[0][0] + c[0][1] + c[0][2] + c[0][3], c[1][0] + c[1][1] + c[1][2] + c[1][3],
+                    c[2][0] + c[2][1] + c[2][2] + c[2][3]);
+    return i;
+}
+
+/* AVX-512 keeps the codes in 64-bit lanes, set under the compare masks, and narrows them to bytes */
+SIGNUM_TARGET("avx512f")
+static Py_ssize_t sign_f64_avx512(const double *s, signed char *dst, Py_ssize_t n, signed char shift)
+{
+    const __m512d zero = _mm512_setzero_pd();
+    const __m512i base = _mm512_set1_epi64(shift), pos = _mm512_set1_epi64(SIGN_POS + shift),
+                  neg = _mm512_set1_epi64(SIGN_NEG + shift), nan = _mm512_set1_epi64(SIGN_NAN + shift);
+    Py_ssize_t i = 0;
+    for (; i + 8 <= n; i += 8) {
+        __m512d a = _mm512_loadu_pd(s + i);
+        __m512i codes = _mm512_mask_mov_epi64(base, _mm512_cmp_pd_mask(a, zero, _CMP_GT_OQ), pos);
+        codes = _mm512_mask_mov_epi64(codes, _mm512_cmp_pd_mask(a, zero, _CMP_LT_OQ), neg);
+        codes = _mm512_mask_mov_epi64(codes, _mm512_cmp_pd_mask(a, a, _CMP_UNORD_Q), nan);
+        _mm_storel_epi64((__m128i *)(dst + i), _mm512_maskz_cvtepi64_epi8(0xFF, codes));
+    }
+    return i;
+}
+
+SIGNUM_TARGET("avx512f")
+static Py_ssize_t count_f64_avx512(const double *s, Py_ssize_t n, Py_ssize_t *cnt)
+{
+    const __m512d zero = _mm512_setzero_pd();
+    const __m512i one = _mm512_set1_epi64(1);
+    __m512i pos = _mm512_setzero_si512(), neg = _mm512_setzero_si512(), nan = _mm512_setzero_si512();
+    Py_ssize_t i = 0;
+    for (; i + 8 <= n; i += 8) {
+        __m512d a = _mm512_loadu_pd(s + i);
+        pos = _mm512_mask_add_epi64(pos, _mm512_cmp_pd_mask(a, zero, _CMP_GT_OQ), pos, one);
+        neg = _mm512_mask_add_epi64(neg, _mm512_cmp_pd_mask(a, zero, _CMP_LT_OQ), neg, one);
+        nan = _mm512_mask_add_epi64(nan, _mm512_cmp_pd_mask(a, a, _CMP_UNORD_Q), nan, one);
+    }
+    int64_t c[3][8];
+    _mm512_storeu_si512(c[0], pos);
+    _mm512_storeu_si512(c[1], neg);
+    _mm512_storeu_si512(c[2], nan);
+    Py_ssize_t sum[3] = {0, 0, 0};
+    for (int k = 0; k < 3; k++) {
+        for (int l = 0; l < 8; l++) sum[k] += c[k][l];
+    }
+    simd_counts_add(cnt, i, sum[0], sum[1], sum[2]);
+    return i;
+}
+
+#endif /* SIGNUM_X86 */
+
+/* Codes of the leading items of a float64 buffer; returns the number of items done */
+static Py_ssize_t sign_f64_simd(const double *s, signed char *dst, Py_ssize_t n, signed char shift)
+{
+#if defined(SIGNUM_X86)
+    SimdLevel level = simd_level();
+    if (n < SIMD_MIN_ITEMS || level == SIMD_SCALAR) return 0;
+    if (level == SIMD_AVX512) return sign_f64_avx512(s, dst, n, shift);
+
+    uint32_t table[256];
+    simd_table(table, shift);
+    return level == SIMD_AVX2 ? sign_f64_avx2(s, dst, n, table) : sign_f64_sse2(s, dst, n, table);
+#else
+    return 0;
+#endif
+}
+
+/* Counts (and weighted lanes, with float64 weights 'w') of the leading items of a float64 buffer;
+   returns the number of items done, a multiple of 4 */
+static Py_ssize_t count_f64_simd(const double *s, Py_ssize_t n, Py_ssize_t *cnt, const double *w, double *lane)
+{
+#if defined(SIGNUM_X86)
+    switch (simd_level()) {
+        case SIMD_AVX512: if (w == NULL) return count_f64_avx512(s, n, cnt);
+                          [[fallthrough]]; /* Weighted lanes of 256 bits keep the order of the sum */
+        case SIMD_AVX2:   return count_f64_avx2(s, n, cnt, w, lane);
+        case SIMD_SSE2:   return count_f64_sse2(s, n, cnt, w, lane);
+        default:          return 0;
+    }
+#else
+    return 0;
+#endif
+}
+
+/* --- BUFFER PROCESSING --- */
+
+/* Element kinds of numeric buffers processed without Python objects */
+enum BufKind { BUF_BAD = 0, BUF_F64, BUF_I64, BUF_U64 };
+
+/* Detect the element kind of a buffer from its 'struct' format; only native 8-byte items are accepted */
+static BufKind buffer_kind(const Py_buffer *view)
+{
+    const char *f = view->format ? view->format : "B";
+    if (view->itemsize != 8) return BUF_BAD;
+
+    switch (*f) { /* Native byte order prefixes */
+        case '@': case '=':
+            f++; break;
+        #if PY_LITTLE_ENDIAN
+        case '<':
+        #else
+        case '>': case '!':
+        #endif
+            f++; break;
+    }
+    if (f[0] == '\0' || f[1] != '\0') return BUF_BAD;
+
+    switch (f[0]) {
+        case 'd':                     return BUF_F64;
+        case 'q': case 'l': case 'n': return BUF_I64;
+        case 'Q': case 'L': case 'N': return BUF_U64;
+    }
+    return BUF_BAD;
+}
+
+/* Call 'f' with the data pointer of 'kind' cast to its element type */
+template <typename F>
+static inline auto buffer_dispatch(BufKind kind, const void *p, F &&f)
+{
+    switch (kind) {
+        case BUF_I64: return f((const int64_t *)p);
+        case BUF_U64: return f((const uint64_t *)p);
+        default:      return f((const double *)p);
+    }
+}
+
+/* Write the codes of 'n' items of 'src' shifted by 'shift' into 'dst'.
+   'dst' may overlap 'src' from its start: the byte 'i' is written after the item 'i' is read */
+static void sign_kernel(BufKind kind, const void *src, signed char *dst, Py_ssize_t n, signed char shift)
+{
+    Py_ssize_t done = kind == BUF_F64 ? sign_f64_simd((const double *)src, dst, n, shift) : 0;
+    buffer_dispatch(kind, src, [&](auto s) {
+        for (Py_ssize_t i = done; i < n; i++) dst[i] = sign_code_of(s[i]) + shift;
+    });
+}
+
+/* Large buffers are cut into blocks of a fixed size, processed without the GIL by up to 'threads' native threads.
+   Blocks don't depend on the number of threads, so neither do the results, floating-point sums included */
+#define PAR_BLOCK        65536   /* Items per block */
+#define PAR_MIN_ITEMS    524288  /* A thread that gets fewer items costs more to start than it saves */
+#define PAR_MAX_THREADS  64
+
+/* Parse 'threads=': None is one thread per core, otherwise a positive int; returns false with Python error set */
+static bool parse_threads(PyObject *val, int *threads, const char *fname)
+{
+    if (val == Py_None) {
+        *threads = 0;
+        return true;
+    }
+    long n = PyLong_AsLong(val);
+    if (n == -1 && PyErr_Occurred()) return false;
+    if (n < 1) {
+        PyErr_Format(PyExc_ValueError, "signum.%s(): 'threads' must be None or a positive int, got %ld", fname, n);
+        return false;
+    }
+    *threads = n < PAR_MAX_THREADS ? (int)n : PAR_MAX_THREADS;
+    return true;
+}
+
+/* The number of threads worth starting for 'n' items; 'threads' is the parsed 'threads=' */
+static int parallel_threads(Py_ssize_t n, int threads)
+{
+    if (threads == 0) {
+        unsigned cores = std::thread::hardware_concurrency();
+        threads = cores == 0 ? 1 : cores < PAR_MAX_THREADS ? (int)cores : PAR_MAX_THREADS;
+    }
+    Py_ssize_t worth = n / PAR_MIN_ITEMS;
+    return worth < 1 ? 1 : worth < threads ? (int)worth : threads;
+}
+
+/* Call 'f(first, last, t)' for 'nthreads' contiguous ranges of 'nblocks' blocks, range 't' in thread 't'.
+   The GIL is released; the calling thread takes range 0 and every range no thread could be started for */
+template <typename F>
+static void parallel_for(Py_ssize_t nblocks, int nthreads, F &&f)
+{
+    auto range = [&](int t) { f(nblocks * t / nthreads, nblocks * (t + 1) / nthreads, t); };
+
+    Py_BEGIN_ALLOW_THREADS
+    std::thread pool[PAR_MAX_THREADS];
+    for (int t = 1; t < nthreads; t++) {
+        try {
+            pool[t] = std::thread(range, t);
+        } catch (...) { /* No more threads: run it here */
+            range(t);
+        }
+    }
+    range(0);
+    for (int t = 1; t < nthreads; t++) {
+        if (pool[t].joinable()) pool[t].join();
+    }
+    Py_END_ALLOW_THREADS
+}
+
+/* 'sign_kernel' over blocks in parallel; a 'dst' that overlaps 'src' is written by one thread (see 'sign_kernel') */
+static void sign_kernel_parallel(BufKind kind, const void *src, signed char *dst, Py_ssize_t n, signed char shift,
+                                 int threads)
+{
+    if (n < PAR_BLOCK) { /* Not worth releasing the GIL */
+        sign_kernel(kind, src, dst, n, shift);
+        return;
+    }
+    const char *s = (const char *)src;
+    bool overlap = (const char *)dst < s + n * 8 && s < (const char *)dst + n;
+    int nthreads = overlap ? 1 : parallel_threads(n, threads);
+
+    parallel_for((n + PAR_BLOCK - 1) / PAR_BLOCK, nthreads, [&](Py_ssize_t first, Py_ssize_t last, int) {
+        Py_ssize_t i = first * PAR_BLOCK, end = last * PAR_BLOCK < n ? last * PAR_BLOCK : n;
+        sign_kernel(kind, s + i * 8, dst + i, end - i, shift);
+    });
+}
+
+/* Get a C-contiguous float64/int64 buffer; returns false with Python error set */
+static bool get_numeric_buffer(PyObject *obj, Py_buffer *view, const char *fname)
+{
+    if (PyObject_GetBuffer(obj, view, PyBUF_FORMAT | PyBUF_C_CONTIGUOUS) < 0) return false;
+    if (buffer_kind(view) == BUF_BAD) {
+        PyErr_Format(PyExc_TypeError,
+                     "signum.%s(): unsupported buffer format '%s' (itemsize %zd); float64 or int64 expected",
+                     fname, view->format ? view->format : "B", view->itemsize);
+        PyBuffer_Release(view);
+        return false;
+    }
+    return true;
+}
+
+/* 'sign_buffer': codes of a float64/int64 buffer written into an int8 buffer */
+static PyObject *signum_sign_buffer(PyObject *self, PyObject *const *args, Py_ssize_t nargs, PyObject *kwnames)
+{
+    SignumState *st = signum_state(self);
+    PyObject *src = NULL, *out = Py_None, *shift_obj = Py_None;
+    int threads = 0;
+
+    switch (nargs) {
+        case 3: shift_obj = args[2]; [[fallthrough]];
+        case 2: out = args[1];       [[fallthrough]];
+        case 1: src = args[0];       break;
+        default:
+            PyErr_Format(PyExc_TypeError, "signum.sign_buffer() takes from 1 to 3 positional arguments, got %zd", nargs);
+            return NULL;
+    }
+
+    /* Parse keyword-only arguments using interned strings */
+    if (kwnames != NULL) {
+        Py_ssize_t nkwargs = PyTuple_GET_SIZE(kwnames);
+        for (Py_ssize_t i = 0; i < nkwargs; i++) {
+            PyObject *key = PyTuple_GET_ITEM(kwnames, i);
+            if (key == st->kw_out && nargs < 2) {
+                out = args[nargs + i];
+            } else if (key == st->kw_threads) {
+                if (!parse_threads(args[nargs + i], &threads, "sign_buffer")) return NULL;
+            } else {
+                PyErr_Format(PyExc_TypeError, "signum.sign_buffer() got an unexpected keyword argument '%U'", key);
+                return NULL;
+            }
+        }
+    }
+
+    long shift = 0;
+    if (shift_obj != Py_None) {
+        shift = PyLong_AsLong(shift_obj);
+        if (shift == -1 && PyErr_Occurred()) return NULL;
+        if (shift < -128 - SIGN_NEG || shift > 127 - SIGN_NAN) {
+            PyErr_Format(PyExc_OverflowError, "signum.sign_buffer(): codeshift %ld does not fit into int8", shift);
+            return NULL;
+        }
+    }
+
+    Py_buffer sv;
+    if (!get_numeric_buffer(src, &sv, "sign_buffer")) return NULL;
+    BufKind kind = buffer_kind(&sv);
+    Py_ssize_t n = sv.len / sv.itemsize;
+    PyObject *res = NULL;
+
+    if (out == Py_None) { /* New 'array('b')' */
+        signed char *buf = (signed char *)PyMem_Malloc(n > 0 ? n : 1);
+        if (buf == NULL) {
+            PyErr_NoMemory();
+        } else {
+            sign_kernel_parallel(kind, sv.buf, buf, n, (signed char)shift, threads);
+            res = int8_array_from(st, buf, n);
+            PyMem_Free(buf);
+        }
+    } else {              /* Caller-supplied int8 buffer, possibly the source itself */
+        Py_buffer ov;
+        if (PyObject_GetBuffer(out, &ov, PyBUF_WRITABLE | PyBUF_FORMAT | PyBUF_C_CONTIGUOUS) == 0) {
+            const char *f = ov.format ? ov.format : "B";
+            if (*f == '@' || *f == '=' || *f == '<' || *f == '>' || *f == '!') f++;
+            if (ov.itemsize != 1 || strcmp(f, "b") != 0) {
+                PyErr_Format(PyExc_TypeError, "signum.sign_buffer(): 'out' must be an int8 buffer (format 'b'), "
+                                              "got format '%s'", ov.format ? ov.format : "B");
+            } else if (ov.len != n) {
+                PyErr_Format(PyExc_ValueError, "signum.sign_buffer(): 'out' has %zd items, %zd expected", ov.len, n);
+            } else {
+                sign_kernel_parallel(kind, sv.buf, (signed char *)ov.buf, n, (signed char)shift, threads);
+                Py_INCREF(out);
+                res = out;
+            }
+            PyBuffer_Release(&ov);
+        }
+    }
+
+    PyBuffer_Release(&sv);
+    return res;
+}
+
+/* --- REDUCTIONS --- */
+
+/* Counts of the quinary classes are indexed by 'code - SIGN_ERR', in the order of 'sign(x, 2)' */
+static PyObject *counts_tuple(const Py_ssize_t *cnt)
+{
+    PyObject *res = PyTuple_New(5);
+    if (res == NULL) return NULL;
+    for (int c = 0; c < 5; c++) {
+        PyObject *v = PyLong_FromSsize_t(cnt[c]);
+        if (v == NULL) { Py_DECREF(res); return NULL; }
+        PyTuple_SET_ITEM(res, c, v);
+    }
+    return res;
+}
+
+/* Count the classes of 'n' items of 'src'; with weights 'w', return the weighted sum of signs (NaN is 0).
+   The sum has 4 lanes, item 'i' is added to lane 'i % 4': the same order for the scalar and vector kernels */
+static double count_kernel(BufKind kind, const void *src, Py_ssize_t n, Py_ssize_t *cnt,
+                           BufKind wkind = BUF_BAD, const void *w = NULL)
+{
+    return buffer_dispatch(kind, src, [&](auto s) {
+        constexpr bool f64 = std::is_same_v<decltype(s), const double *>;
+        double lane[4] = {0.0, 0.0, 0.0, 0.0};
+        Py_ssize_t done = 0;
+
+        if (w == NULL) {
+            if constexpr (f64) done = count_f64_simd(s, n, cnt, NULL, lane);
+            for (Py_ssize_t i = done; i < n; i++) cnt[sign_code_of(s[i]) - SIGN_ERR]++;
+            return 0.0;
+        }
+        if constexpr (f64) {
+            if (wkind == BUF_F64) done = count_f64_simd(s, n, cnt, (const double *)w, lane);
+        }
+        buffer_dispatch(wkind, w, [&](auto ws) {
+            for (Py_ssize_t i = done; i < n; i++) {
+                cnt[sign_code_of(s[i]) - SIGN_ERR]++;
+                lane[i & 3] += (double)ws[i] * ((s[i] > 0) - (s[i] < 0));
+            }
+            return 0;
+        });
+        return (lane[0] + lane[1]) + (lane[2] + lane[3]);
+    });
+}
+
+/* 'count_kernel' over blocks in parallel; the weighted sums of blocks are added in block order.
+   Returns false with Python error set */
+static bool count_kernel_parallel(BufKind kind, const void *src, Py_ssize_t n, Py_ssize_t *cnt, double *sum,
+                                  BufKind wkind, const void *w, int threads)
+{
+    if (n <= PAR_BLOCK) { /* Not worth releasing the GIL */
+        *sum = count_kernel(kind, src, n, cnt, wkind, w);
+        return true;
+    }
+    Py_ssize_t nblocks = (n + PAR_BLOCK - 1) / PAR_BLOCK;
+    double *sums = NULL;
+    if (w != NULL && (sums = PyMem_New(double, nblocks)) == NULL) {
+        PyErr_NoMemory();
+        return false;
+    }
+    const char *s = (const char *)src, *ws = (const char *)w;
+    Py_ssize_t part[PAR_MAX_THREADS][5];
+
+    int nthreads = parallel_threads(n, threads);
+    parallel_for(nblocks, nthreads, [&](Py_ssize_t first, Py_ssize_t last, int t) {
+        Py_ssize_t local[5] = {0, 0, 0, 0, 0}; /* On the stack of its thread: no false sharing */
+        for (Py_ssize_t b = first; b < last; b++) {
+            Py_ssize_t i = b * PAR_BLOCK, m = n - i < PAR_BLOCK ? n - i : PAR_BLOCK;
+            double bsum = count_kernel(kind, s + i * 8, m, local, wkind, sums ? ws + i * 8 : NULL);
+            if (sums) sums[b] = bsum;
+        }
+        memcpy(part[t], local, sizeof(local));
+    });
+
+    for (int t = 0; t < nthreads; t++) {
+        for (int c = 0; c < 5; c++) cnt[c] += part[t][c];
+    }
+    *sum = 0.0;
+    if (sums) {
+        for (Py_ssize_t b = 0; b < nblocks; b++) *sum += sums[b];
+        PyMem_Free(sums);
+    }
+    return true;
+}
+
+/* 'sign_counts': one-pass histogram of the quinary classes of a buffer or an iterable */
+static PyObject *signum_sign_counts(PyObject *self, PyObject *const *args, Py_ssize_t nargs, PyObject *kwnames)
+{
+    SignumState *st = signum_state(self);
+    SignOptions opt = {false, 0, Py_None, Py_None, false, st}; /* Errors are counted, not raised */
+    PyObject *data = NULL, *weights = Py_None;
+    int threads = 0;
+
+    switch (nargs) {
+        case 2: weights = args[1]; [[fallthrough]];
+        case 1: data = args[0];    break;
+        default:
+            PyErr_Format(PyExc_TypeError, "signum.sign_counts() takes 1 or 2 positional arguments, got %zd", nargs);
+            return NULL;
+    }
+
+    /* Parse keyword-only arguments using interned strings */
+    if (kwnames != NULL) {
+        Py_ssize_t nkwargs = PyTuple_GET_SIZE(kwnames);
+        for (Py_ssize_t i = 0; i < nkwargs; i++) {
+            PyObject *key = PyTuple_GET_ITEM(kwnames, i);
+            PyObject *val = args[nargs + i];
+
+            if (key == st->kw_fast) {
+                int flag = PyObject_IsTrue(val);
+                if (flag < 0) return NULL;
+                opt.fast = flag;
+            } else if (key == st->kw_weights && nargs < 2) {
+                weights = val;
+            } else if (key == st->kw_threads) {
+                if (!parse_threads(val, &threads, "sign_counts")) return NULL;
+            } else {
+                PyErr_Format(PyExc_TypeError, "signum.sign_counts() got an unexpected keyword argument '%U'", key);
+                return NULL;
+            }
+        }
+    }
+
+    Py_buffer wv;
+    BufKind wkind = BUF_BAD;
+    if (weights != Py_None) {
+        if (!get_numeric_buffer(weights, &wv, "sign_counts")) return NULL;
+        wkind = buffer_kind(&wv);
+    }
+    Py_ssize_t nw = wkind ? wv.len / wv.itemsize : 0;
+
+    Py_ssize_t cnt[5] = {0, 0, 0, 0, 0};
+    double sum = 0.0;
+    Py_ssize_t n = 0;
+
+    /* Numeric buffers are counted without Python objects */
+    Py_buffer sv;
+    BufKind kind = BUF_BAD;
+    if (PyObject_CheckBuffer(data)) {
+        if (PyObject_GetBuffer(data, &sv, PyBUF_FORMAT | PyBUF_C_CONTIGUOUS) < 0) {
+            PyErr_Clear(); /* Not contiguous: process it as an iterable */
+        } else if ((kind = buffer_kind(&sv)) == BUF_BAD) {
+            PyBuffer_Release(&sv);
+        }
+    }
+
+    if (kind) {
+        n = sv.len / sv.itemsize;
+        bool ok = (wkind && nw != n) /* Reported below */
+                  || count_kernel_parallel(kind, sv.buf, n, cnt, &sum, wkind, wkind ? wv.buf : NULL, threads);
+        PyBuffer_Release(&sv);
+        if (!ok) goto fail;
+    } else {
+        ItemSource src;
+        if (!source_open(&src, data, NULL)) goto fail;
+        for (PyObject *item; (item = source_next(&src)) != NULL; n++) {
+            PyObject *obj = NULL;
+            int code = sign_apply(item, &opt, &obj);
+            Py_DECREF(item);
+            if (code == SIGN_RAISE) break;
+            cnt[code - SIGN_ERR]++;
+            if (wkind && n < nw && code != SIGN_NAN && code != SIGN_ERR) {
+                sum += code * buffer_dispatch(wkind, wv.buf, [&](auto ws) { return (double)ws[n]; });
+            }
+        }
+        source_close(&src);
+        if (PyErr_Occurred()) goto fail;
+    }
+
+    if (wkind) {
+        PyBuffer_Release(&wv);
+        if (nw != n) {
+            PyErr_Format(PyExc_ValueError, "signum.sign_counts(): %zd weights for %zd items", nw, n);
+            return NULL;
+        }
+        PyObject *counts = counts_tuple(cnt);
+        return counts ? Py_BuildValue("(Nd)", counts, sum) : NULL;
+    }
+    return counts_tuple(cnt);
+
+fail:
+    if (wkind) PyBuffer_Release(&wv);
+    return NULL;
+}
+
+/* --- PACKED SIGNS --- */
+
+/* 2-bit two's complement fields: 00 zero, 01 positive, 11 negative, 10 NaN.
+   Invalid items are stored as NaN, and their indices are kept in the escape list.
+   The item 'i' occupies the bits '2 * (i & 3)' of the byte 'i >> 2'; padding bits are 0 */
+static const signed char unpack2[4] = {SIGN_ZERO, SIGN_POS, SIGN_NAN, SIGN_NEG};
+
+static inline unsigned char pack2(int code)
+{
+    return (unsigned char)(code & 3); /* 'SIGN_ERR' (-2) is 10, the same as 'SIGN_NAN' */
+}
+
+/* Pack 'n' items of a numeric buffer into 'dst' of '(n + 3) / 4' bytes */
+static void pack_kernel(BufKind kind, const void *src, unsigned char *dst, Py_ssize_t n)
+{
+    buffer_dispatch(kind, src, [&](auto s) {
+        Py_ssize_t full = n >> 2, i = 0;
+        for (Py_ssize_t b = 0; b < full; b++, i += 4) {
+            dst[b] = (unsigned char)(pack2(sign_code_of(s[i]))
+                                   | pack2(sign_code_of(s[i + 1])) << 2
+                                   | pack2(sign_code_of(s[i + 2])) << 4
+                                   | pack2(sign_code_of(s[i + 3])) << 6);
+        }
+        if (i < n) {
+            unsigned char last = 0;
+            for (int sh = 0; i < n; i++, sh += 2) last |= (unsigned char)(pack2(sign_code_of(s[i])) << sh);
+            dst[full] = last;
+        }
+    });
+}
+
+/* 'sign_pack': 2-bit packed signs of a numeric buffer or an iterable; returns '(packed, n, invalid)' */
+static PyObject *signum_sign_pack(PyObject *self, PyObject *const *args, Py_ssize_t nargs, PyObject *kwnames)
+{
+    SignumState *st = signum_state(self);
+    SignOptions opt = {false, 0, Py_None, Py_None, false, st}; /* Errors are escaped, not raised */
+
+    if (nargs != 1) {
+        PyErr_Format(PyExc_TypeError, "signum.sign_pack() takes exactly 1 positional argument, got %zd", nargs);
+        return NULL;
+    }
+    if (kwnames != NULL) {
+        Py_ssize_t nkwargs = PyTuple_GET_SIZE(kwnames);
+        for (Py_ssize_t i = 0; i < nkwargs; i++) {
+            PyObject *key = PyTuple_GET_ITEM(kwnames, i);
+            if (key == st->kw_fast) {
+                int flag = PyObject_IsTrue(args[nargs + i]);
+                if (flag < 0) return NULL;
+                opt.fast = flag;
+            } else {
+                PyErr_Format(PyExc_TypeError, "signum.sign_pack() got an unexpected keyword argument '%U'", key);
+                return NULL;
+            }
+        }
+    }
 
-/* Static objects for keywords (argument names) */
-static PyObject *kw_if_exc     = NULL;
-static PyObject *kw_preprocess = NULL;
-static PyObject *kw_codeshift  = NULL;
+    PyObject *data = args[0];
+    PyObject *packed = NULL;
+    Py_ssize_t n = 0;
+    int64_t *inv = NULL;
+    Py_ssize_t n_inv = 0, inv_cap = 0;
 
-/* 'int(-1)', 'int(0)', 'int(1)', "float('nan')" */
-static PyObject *Py_m_one       = NULL;
-static PyObject *Py_zero        = NULL;
-static PyObject *Py_one         = NULL;
-static PyObject *Py_float_nan   = NULL;
+    /* Numeric buffers are packed without Python objects */
+    Py_buffer sv;
+    BufKind kind = BUF_BAD;
+    if (PyObject_CheckBuffer(data)) {
+        if (PyObject_GetBuffer(data, &sv, PyBUF_FORMAT | PyBUF_C_CONTIGUOUS) < 0) {
+            PyErr_Clear(); /* Not contiguous: process it as an iterable */
+        } else if ((kind = buffer_kind(&sv)) == BUF_BAD) {
+            PyBuffer_Release(&sv);
+        }
+    }
 
-/* Deprecation warning control */
-static bool warn_flag           = false;
+    if (kind) {
+        n = sv.len / sv.itemsize;
+        packed = PyBytes_FromStringAndSize(NULL, (n + 3) >> 2);
+        if (packed) pack_kernel(kind, sv.buf, (unsigned char *)PyBytes_AS_STRING(packed), n);
+        PyBuffer_Release(&sv);
+        if (packed == NULL) return NULL;
+    } else {
+        ItemSource src;
+        Py_ssize_t hint, cap;
+        if (!source_open(&src, data, &hint)) return NULL;
+        cap = hint > 0 ? (hint + 3) >> 2 : 16;
+        unsigned char *buf = (unsigned char *)PyMem_Calloc(cap, 1);
+        if (buf == NULL) { source_close(&src); return PyErr_NoMemory(); }
 
-/* Finalisation at module unload */
-static void signum_free(void *m) {
-    /* Warning: deprecated 'codeshift=' keyword argument was used */
-    if (warn_flag) {
-        fputs("DeprecationWarning: signum.sign: 'codeshift=' keyword is deprecated and "
-              "will be removed in August 2026; use the second positional argument instead\n", stderr);
-        fflush(stderr);
+        for (PyObject *item; (item = source_next(&src)) != NULL; n++) {
+            PyObject *obj = NULL;
+            int code = sign_apply(item, &opt, &obj);
+            Py_DECREF(item);
+            if (code == SIGN_RAISE) break;
+
+            if ((n >> 2) == cap) {
+                unsigned char *nbuf = (unsigned char *)PyMem_Realloc(buf, cap << 1);
+                if (nbuf == NULL) { PyErr_NoMemory(); break; }
+                memset(nbuf + cap, 0, cap);
+                buf = nbuf;
+                cap <<= 1;
+            }
+            buf[n >> 2] |= (unsigned char)(pack2(code) << ((n & 3) << 1));
+
+            if (code == SIGN_ERR) { /* Escape */
+                if (n_inv == inv_cap) {
+                    int64_t *ninv = (int64_t *)PyMem_Realloc(inv, (inv_cap = inv_cap ? inv_cap << 1 : 16) * sizeof(int64_t));
+                    if (ninv == NULL) { PyErr_NoMemory(); break; }
+                    inv = ninv;
+                }
+                inv[n_inv++] = n;
+            }
+        }
+        source_close(&src);
+        if (!PyErr_Occurred()) packed = PyBytes_FromStringAndSize((const char *)buf, (n + 3) >> 2);
+        PyMem_Free(buf);
+        if (packed == NULL) { PyMem_Free(inv); return NULL; }
     }
-    Py_XDECREF(kw_if_exc);
-    Py_XDECREF(kw_preprocess);
-    Py_XDECREF(kw_codeshift);
-    Py_XDECREF(Py_m_one);
-    Py_XDECREF(Py_zero);
-    Py_XDECREF(Py_one);
-    Py_XDECREF(Py_float_nan);
+
+    PyObject *invalid = array_from(st, st->Py_typecode_q, inv, n_inv * (Py_ssize_t)sizeof(int64_t));
+    PyMem_Free(inv);
+    if (invalid == NULL) { Py_DECREF(packed); return NULL; }
+    return Py_BuildValue("(NnN)", packed, n, invalid);
 }
 
-/* Light-type thread-safe cache for 'fastsign' */
-static thread_local PyTypeObject *fs_prev_type = NULL;
-static thread_local richcmpfunc fs_f_cmp = NULL;
+/* Parse '(packed, n, invalid=None)' of 'sign_unpack' and 'sign_pack_counts'; returns false with Python error set */
+static bool parse_packed(SignumState *st, PyObject *const *args, Py_ssize_t nargs, PyObject *kwnames, const char *fname,
+                         Py_buffer *pv, Py_ssize_t *n, PyObject **invalid)
+{
+    *invalid = Py_None;
+    switch (nargs) {
+        case 3: *invalid = args[2]; [[fallthrough]];
+        case 2: break;
+        default:
+            PyErr_Format(PyExc_TypeError, "signum.%s() takes 2 or 3 positional arguments, got %zd", fname, nargs);
+            return false;
+    }
+    if (kwnames != NULL) {
+        Py_ssize_t nkwargs = PyTuple_GET_SIZE(kwnames);
+        for (Py_ssize_t i = 0; i < nkwargs; i++) {
+            PyObject *key = PyTuple_GET_ITEM(kwnames, i);
+            if (key == st->kw_invalid && nargs < 3) {
+                *invalid = args[nargs + i];
+            } else {
+                PyErr_Format(PyExc_TypeError, "signum.%s() got an unexpected keyword argument '%U'", fname, key);
+                return false;
+            }
+        }
+    }
+
+    *n = PyLong_AsSsize_t(args[1]);
+    if (*n == -1 && PyErr_Occurred()) return false;
+    if (PyObject_GetBuffer(args[0], pv, PyBUF_SIMPLE) < 0) return false;
+    if (*n < 0 || pv->len < ((*n + 3) >> 2)) {
+        PyErr_Format(PyExc_ValueError, "signum.%s(): %zd bytes cannot hold %zd packed items", fname, pv->len, *n);
+        PyBuffer_Release(pv);
+        return false;
+    }
+    return true;
+}
 
-static PyObject *signum_sign(PyObject *self, PyObject *const *args, Py_ssize_t nargs, PyObject *kwnames)
+/* 'sign_unpack': codes of packed signs as 'array('b')' */
+static PyObject *signum_sign_unpack(PyObject *self, PyObject *const *args, Py_ssize_t nargs, PyObject *kwnames)
 {
-    /* Check positional arguments */
+    SignumState *st = signum_state(self);
+    Py_buffer pv;
+    Py_ssize_t n;
+    PyObject *invalid;
+    if (!parse_packed(st, args, nargs, kwnames, "sign_unpack", &pv, &n, &invalid)) return NULL;
 
-    bool no_codeshift = true;
-    long c_codeshift  = 0;
+    signed char *buf = (signed char *)PyMem_Malloc(n > 0 ? n : 1);
+    if (buf == NULL) { PyBuffer_Release(&pv); return PyErr_NoMemory(); }
 
-    switch (nargs) {
-        case 2: /* Processing 'codeshift' */
-            {
-                PyObject *a2_obj = args[1];
-                if (a2_obj == Py_None) break;
-                if (PyLong_Check(a2_obj)) { /* 'int' is codeshift */
-                    c_codeshift = PyLong_AsLong(a2_obj);
-                    if (c_codeshift == -1 && PyErr_Occurred()) { c_codeshift = 0; return NULL; }
-                    no_codeshift = false;
-                }
+    const unsigned char *p = (const unsigned char *)pv.buf;
+    for (Py_ssize_t i = 0; i < n; i++) buf[i] = unpack2[(p[i >> 2] >> ((i & 3) << 1)) & 3];
+    PyBuffer_Release(&pv);
+
+    if (invalid != Py_None) { /* Escaped items */
+        ItemSource src;
+        if (!source_open(&src, invalid, NULL)) { PyMem_Free(buf); return NULL; }
+        for (PyObject *item; (item = source_next(&src)) != NULL; ) {
+            Py_ssize_t idx = PyLong_AsSsize_t(item);
+            Py_DECREF(item);
+            if (idx == -1 && PyErr_Occurred()) break;
+            if (idx < 0 || idx >= n || buf[idx] != SIGN_NAN) {
+                PyErr_Format(PyExc_ValueError, "signum.sign_unpack(): invalid index %zd is not an escaped item", idx);
                 break;
             }
-        case 1:
-            break;
-        case 0:
-            [[fallthrough]];
-        default:
-            PyErr_Format(PyExc_TypeError, "signum.sign() takes 1 or 2 positional arguments, got %zd", nargs);
+            buf[idx] = SIGN_ERR;
+        }
+        source_close(&src);
+        if (PyErr_Occurred()) { PyMem_Free(buf); return NULL; }
+    }
+
+    PyObject *res = int8_array_from(st, buf, n);
+    PyMem_Free(buf);
+    return res;
+}
+
+/* 'sign_pack_counts': counts of the quinary classes of packed signs by popcount, without unpacking */
+static PyObject *signum_sign_pack_counts(PyObject *self, PyObject *const *args, Py_ssize_t nargs, PyObject *kwnames)
+{
+    SignumState *st = signum_state(self);
+    Py_buffer pv;
+    Py_ssize_t n;
+    PyObject *invalid;
+    if (!parse_packed(st, args, nargs, kwnames, "sign_pack_counts", &pv, &n, &invalid)) return NULL;
+
+    const unsigned char *p = (const unsigned char *)pv.buf;
+    const uint64_t LOW = 0x5555555555555555ULL; /* The low bit of every field */
+    Py_ssize_t full = n >> 2, b = 0;
+    Py_ssize_t cnt[5] = {0, 0, 0, 0, 0};
+
+    auto count_word = [&](uint64_t w) {
+        uint64_t lo = w & LOW, hi = (w >> 1) & LOW;
+        cnt[SIGN_POS - SIGN_ERR] += std::popcount(lo & ~hi);
+        cnt[SIGN_NEG - SIGN_ERR] += std::popcount(lo & hi);
+        cnt[SIGN_NAN - SIGN_ERR] += std::popcount(hi & ~lo);
+    };
+
+    for (; b + 8 <= full; b += 8) { /* Byte order does not matter: fields never cross bytes */
+        uint64_t w;
+        memcpy(&w, p + b, 8);
+        count_word(w);
+    }
+    for (; b < full; b++) count_word(p[b]);
+    if (n & 3) count_word(p[full] & ((1u << ((n & 3) << 1)) - 1)); /* Padding is ignored */
+    PyBuffer_Release(&pv);
+
+    if (invalid != Py_None) {
+        Py_ssize_t n_inv = PyObject_Length(invalid);
+        if (n_inv < 0) return NULL;
+        if (n_inv > cnt[SIGN_NAN - SIGN_ERR]) {
+            PyErr_Format(PyExc_ValueError, "signum.sign_pack_counts(): %zd invalid indices for %zd escaped items",
+                         n_inv, cnt[SIGN_NAN - SIGN_ERR]);
             return NULL;
+        }
+        cnt[SIGN_NAN - SIGN_ERR] -= n_inv;
+        cnt[SIGN_ERR - SIGN_ERR] = n_inv;
+    }
+    cnt[SIGN_ZERO - SIGN_ERR] = n - cnt[0] - cnt[SIGN_NEG - SIGN_ERR] - cnt[SIGN_POS - SIGN_ERR] - cnt[SIGN_NAN - SIGN_ERR];
+    return counts_tuple(cnt);
+}
+
+/* --- MAPPED FILES --- */
+
+/* 'sign_file' maps the source and the destination in windows of one chunk and unmaps them after the chunk, so the
+   resident memory depends on the chunk size, not on the file size */
+#define FILE_CHUNK (1 << 23) /* Default items per chunk: 64 MiB of input */
+
+/* An open file and its mapping granularity */
+struct MappedFile {
+    #ifdef _WIN32
+        HANDLE file = INVALID_HANDLE_VALUE;
+        HANDLE mapping = NULL;
+    #else
+        int fd = -1;
+    #endif
+    PyObject *path = NULL;   /* For error messages; borrowed */
+    uint64_t size = 0;
+    bool writable = false;
+};
+
+static uint64_t map_granularity()
+{
+    #ifdef _WIN32
+        SYSTEM_INFO si;
+        GetSystemInfo(&si);
+        return si.dwAllocationGranularity;
+    #else
+        long page = sysconf(_SC_PAGESIZE);
+        return page > 0 ? (uint64_t)page : 4096;
+    #endif
+}
+
+static void mfile_close(MappedFile *f)
+{
+    #ifdef _WIN32
+        if (f->mapping) CloseHandle(f->mapping);
+        if (f->file != INVALID_HANDLE_VALUE) CloseHandle(f->file);
+        f->mapping = NULL;
+        f->file = INVALID_HANDLE_VALUE;
+    #else
+        if (f->fd >= 0) close(f->fd);
+        f->fd = -1;
+    #endif
+}
+
+/* Set the OSError of the last failed call on the file */
+static void mfile_error(MappedFile *f)
+{
+    #ifdef _WIN32
+        PyErr_SetExcFromWindowsErrWithFilenameObject(PyExc_OSError, 0, f->path);
+    #else
+        PyErr_SetFromErrnoWithFilenameObject(PyExc_OSError, f->path);
+    #endif
+}
+
+/* Open 'path' (str, bytes, or os.PathLike) for reading, or create it for writing; returns false with error set */
+static bool mfile_open(MappedFile *f, PyObject *path, bool writable)
+{
+    f->path = path;
+    f->writable = writable;
+    #ifdef _WIN32
+        PyObject *name = NULL;
+        if (!PyUnicode_FSDecoder(path, &name)) return false;
+        wchar_t *wname = PyUnicode_AsWideCharString(name, NULL);
+        Py_DECREF(name);
+        if (wname == NULL) return false;
+        Py_BEGIN_ALLOW_THREADS
+        f->file = CreateFileW(wname, writable ? GENERIC_READ | GENERIC_WRITE : GENERIC_READ, FILE_SHARE_READ, NULL,
+                              writable ? OPEN_ALWAYS : OPEN_EXISTING, FILE_ATTRIBUTE_NORMAL, NULL);
+        Py_END_ALLOW_THREADS
+        PyMem_Free(wname);
+        LARGE_INTEGER size;
+        if (f->file == INVALID_HANDLE_VALUE || !GetFileSizeEx(f->file, &size)) {
+            mfile_error(f);
+            mfile_close(f);
+            return false;
+        }
+        f->size = (uint64_t)size.QuadPart;
+    #else
+        PyObject *name = NULL;
+        if (!PyUnicode_FSConverter(path, &name)) return false;
+        Py_BEGIN_ALLOW_THREADS
+        f->fd = open(PyBytes_AS_STRING(name), writable ? O_RDWR | O_CREAT : O_RDONLY, 0666);
+        Py_END_ALLOW_THREADS
+        Py_DECREF(name);
+        struct stat sb;
+        if (f->fd < 0 || fstat(f->fd, &sb) < 0) {
+            mfile_error(f);
+            mfile_close(f);
+            return false;
+        }
+        f->size = (uint64_t)sb.st_size;
+    #endif
+    return true;
+}
+
+/* Whether two open files are the same file */
+static bool mfile_same(MappedFile *a, MappedFile *b)
+{
+    #ifdef _WIN32
+        BY_HANDLE_FILE_INFORMATION ia, ib;
+        return GetFileInformationByHandle(a->file, &ia) && GetFileInformationByHandle(b->file, &ib)
+               && ia.dwVolumeSerialNumber == ib.dwVolumeSerialNumber
+               && ia.nFileIndexHigh == ib.nFileIndexHigh && ia.nFileIndexLow == ib.nFileIndexLow;
+    #else
+        struct stat sa, sb;
+        return fstat(a->fd, &sa) == 0 && fstat(b->fd, &sb) == 0 && sa.st_dev == sb.st_dev && sa.st_ino == sb.st_ino;
+    #endif
+}
+
+/* Set the size of a writable file and prepare its mapping; returns false with error set */
+static bool mfile_resize(MappedFile *f, uint64_t size)
+{
+    f->size = size;
+    #ifdef _WIN32
+        LARGE_INTEGER end;
+        end.QuadPart = (LONGLONG)size;
+        if (!SetFilePointerEx(f->file, end, NULL, FILE_BEGIN) || !SetEndOfFile(f->file)) {
+            mfile_error(f);
+            return false;
+        }
+    #else
+        if (ftruncate(f->fd, (off_t)size) < 0) {
+            mfile_error(f);
+            return false;
+        }
+    #endif
+    return true;
+}
+
+/* A window of 'len' bytes from 'offset'. '*base' and '*base_len' are what 'mfile_unmap' needs; NULL with error set */
+static unsigned char *mfile_map(MappedFile *f, uint64_t offset, size_t len, void **base, size_t *base_len)
+{
+    uint64_t start = offset - offset % map_granularity();
+    size_t delta = (size_t)(offset - start);
+    *base_len = len + delta;
+    #ifdef _WIN32
+        if (f->mapping == NULL) { /* The mapping object of the whole file, created with the first window */
+            f->mapping = CreateFileMappingW(f->file, NULL, f->writable ? PAGE_READWRITE : PAGE_READONLY, 0, 0, NULL);
+            if (f->mapping == NULL) { mfile_error(f); return NULL; }
+        }
+        *base = MapViewOfFile(f->mapping, f->writable ? FILE_MAP_WRITE : FILE_MAP_READ,
+                              (DWORD)(start >> 32), (DWORD)start, *base_len);
+        if (*base == NULL) { mfile_error(f); return NULL; }
+    #else
+        *base = mmap(NULL, *base_len, f->writable ? PROT_READ | PROT_WRITE : PROT_READ, MAP_SHARED, f->fd,
+                     (off_t)start);
+        if (*base == MAP_FAILED) { mfile_error(f); return NULL; }
+        #ifdef MADV_SEQUENTIAL
+            if (!f->writable) madvise(*base, *base_len, MADV_SEQUENTIAL);
+        #endif
+    #endif
+    return (unsigned char *)*base + delta;
+}
+
+static void mfile_unmap(void *base, size_t base_len)
+{
+    #ifdef _WIN32
+        UnmapViewOfFile(base);
+    #else
+        munmap(base, base_len);
+    #endif
+}
+
+/* Parse 'dtype': 'float64', 'int64', 'uint64', or numpy-style 'f8', 'i8', 'u8' and 'struct' 'd', 'q', 'Q', with
+   an optional byte order '<' (little-endian, the default), '>', or '=' (native). Any object is taken by 'str()',
+   so numpy dtypes work too. Returns BUF_BAD with error set */
+static BufKind parse_file_dtype(PyObject *dtype, bool *swap)
+{
+    PyObject *str = PyObject_Str(dtype);
+    const char *s = str ? PyUnicode_AsUTF8(str) : NULL;
+    if (s == NULL) { Py_XDECREF(str); return BUF_BAD; }
+
+    bool little = true;
+    switch (*s) {
+        case '<': s++; break;
+        case '>': s++; little = false; break;
+        case '=': s++; little = PY_LITTLE_ENDIAN; break;
+    }
+    BufKind kind = BUF_BAD;
+    if (!strcmp(s, "float64") || !strcmp(s, "f8") || !strcmp(s, "d"))      kind = BUF_F64;
+    else if (!strcmp(s, "int64") || !strcmp(s, "i8") || !strcmp(s, "q"))   kind = BUF_I64;
+    else if (!strcmp(s, "uint64") || !strcmp(s, "u8") || !strcmp(s, "Q"))  kind = BUF_U64;
+    if (kind == BUF_BAD)
+        PyErr_Format(PyExc_ValueError, "signum.sign_file(): unsupported dtype %R; 'float64', 'int64', or 'uint64' "
+                                       "expected, optionally with the byte order '<', '>', or '='", str);
+    Py_DECREF(str);
+    *swap = little != PY_LITTLE_ENDIAN;
+    return kind;
+}
+
+static inline uint64_t byteswap64(uint64_t v)
+{
+    v = (v & 0x00FF00FF00FF00FFull) << 8 | (v >> 8 & 0x00FF00FF00FF00FFull);
+    v = (v & 0x0000FFFF0000FFFFull) << 16 | (v >> 16 & 0x0000FFFF0000FFFFull);
+    return v << 32 | v >> 32;
+}
+
+/* Pack 'n' codes into 2-bit fields (see 'pack2'): the low 2 bits of 4 codes are gathered by 2 shifts */
+static void pack_codes(const signed char *codes, unsigned char *dst, Py_ssize_t n)
+{
+    const unsigned char *c = (const unsigned char *)codes;
+    Py_ssize_t full = n >> 2, i = 0;
+    for (Py_ssize_t b = 0; b < full; b++, i += 4) {
+        uint32_t v = c[i] | (uint32_t)c[i + 1] << 8 | (uint32_t)c[i + 2] << 16 | (uint32_t)c[i + 3] << 24;
+        v &= 0x03030303u;
+        v |= v >> 6;
+        v |= v >> 12;
+        dst[b] = (unsigned char)v;
+    }
+    if (i < n) {
+        unsigned char last = 0;
+        for (int sh = 0; i < n; i++, sh += 2) last |= (unsigned char)(pack2(codes[i]) << sh);
+        dst[full] = last;
+    }
+}
+
+/* Codes, or packed codes, and counts of 'n' items of a mapped chunk; 'dst' may be NULL (counts only).
+   Blocks are counted while they are in the cache; 'swapbuf[t]' of thread 't' receives byte-swapped blocks */
+static void file_kernel(BufKind kind, const unsigned char *src, unsigned char *dst, bool packed, Py_ssize_t n,
+                        Py_ssize_t *cnt, int nthreads, uint64_t *const *swapbuf)
+{
+    Py_ssize_t part[PAR_MAX_THREADS][5];
+    parallel_for((n + PAR_BLOCK - 1) / PAR_BLOCK, nthreads, [&](Py_ssize_t first, Py_ssize_t last, int t) {
+        Py_ssize_t local[5] = {0, 0, 0, 0, 0};
+        signed char codes[PAR_BLOCK]; /* Of a block to be packed */
+        for (Py_ssize_t b = first; b < last; b++) {
+            Py_ssize_t i = b * PAR_BLOCK, m = n - i < PAR_BLOCK ? n - i : PAR_BLOCK;
+            const void *s = src + i * 8;
+            if (swapbuf) {
+                uint64_t *tmp = swapbuf[t];
+                for (Py_ssize_t j = 0; j < m; j++) {
+                    uint64_t v;
+                    memcpy(&v, (const unsigned char *)s + j * 8, 8);
+                    tmp[j] = byteswap64(v);
+                }
+                s = tmp;
+            }
+            if (dst && packed) { /* 'PAR_BLOCK' is a multiple of 4 */
+                sign_kernel(kind, s, codes, m, 0);
+                pack_codes(codes, dst + i / 4, m);
+            } else if (dst) {
+                sign_kernel(kind, s, (signed char *)dst + i, m, 0);
+            }
+            count_kernel(kind, s, m, local);
+        }
+        memcpy(part[t], local, sizeof(local));
+    });
+    for (int t = 0; t < nthreads; t++) {
+        for (int c = 0; c < 5; c++) cnt[c] += part[t][c];
     }
+}
+
+/* 'sign_file(src_path, dtype, dst_path=None, *, packed=False, chunk=None, progress=None, threads=None)':
+   the codes of a raw file of 8-byte numbers written into 'dst_path'; returns the counts of the five classes */
+static PyObject *signum_sign_file(PyObject *self, PyObject *const *args, Py_ssize_t nargs, PyObject *kwnames)
+{
+    SignumState *st = signum_state(self);
+    PyObject *src_path = NULL, *dtype = NULL, *dst_path = Py_None, *progress = Py_None;
+    bool packed = false;
+    Py_ssize_t chunk = FILE_CHUNK;
+    int threads = 0;
 
-    PyObject *x          = args[0];
-    PyObject *if_exc     = Py_None;
-    PyObject *preprocess = Py_None;
+    switch (nargs) {
+        case 3: dst_path = args[2]; [[fallthrough]];
+        case 2: dtype = args[1]; src_path = args[0]; break;
+        default:
+            PyErr_Format(PyExc_TypeError, "signum.sign_file() takes from 2 to 3 positional arguments, got %zd", nargs);
+            return NULL;
+    }
 
     /* Parse keyword-only arguments using interned strings */
     if (kwnames != NULL) {
@@ -88,340 +3647,742 @@ static PyObject *signum_sign(PyObject *self, PyObject *const *args, Py_ssize_t n
             PyObject *key = PyTuple_GET_ITEM(kwnames, i);
             PyObject *val = args[nargs + i];
 
-            if (key == kw_codeshift) {
-                warn_flag = true;
-                if (nargs != 2) {
-                    /* Convert to 'long' without checking */
-                    if (val != Py_None) {
-                        c_codeshift = PyLong_AsLong(val);
-                        if (c_codeshift == -1 && PyErr_Occurred()) { c_codeshift = 0; return NULL; }
-                        no_codeshift = false;
+            if (key == st->kw_packed) {
+                int flag = PyObject_IsTrue(val);
+                if (flag < 0) return NULL;
+                packed = flag;
+            } else if (key == st->kw_chunk) {
+                if (val != Py_None) {
+                    chunk = PyLong_AsSsize_t(val);
+                    if (chunk == -1 && PyErr_Occurred()) return NULL;
+                    if (chunk < 1) {
+                        PyErr_Format(PyExc_ValueError, "signum.sign_file(): 'chunk' must be None or a positive int, "
+                                                       "got %zd", chunk);
+                        return NULL;
                     }
-                } else {
-                    PyErr_Format(PyExc_TypeError,
-                                 "signum.sign(): the 2nd positional argument used; 'codeshift=' is not permitted");
-                    return NULL;
                 }
-            } else if (key == kw_if_exc) {
-                if_exc = val;
-            } else if (key == kw_preprocess) {
-                preprocess = val;
+            } else if (key == st->kw_progress) {
+                progress = val;
+            } else if (key == st->kw_threads) {
+                if (!parse_threads(val, &threads, "sign_file")) return NULL;
             } else {
-                PyErr_Format(PyExc_TypeError, "signum.sign() got an unexpected keyword argument '%U'", key);
+                PyErr_Format(PyExc_TypeError, "signum.sign_file() got an unexpected keyword argument '%U'", key);
                 return NULL;
             }
         }
     }
+    if (progress != Py_None && !PyCallable_Check(progress)) {
+        PyErr_Format(PyExc_TypeError, "signum.sign_file(): 'progress' must be callable or None, not '%.80s'",
+                     Py_TYPE(progress)->tp_name);
+        return NULL;
+    }
 
-    /* preprocess */
-    PyObject *to_free = NULL;
-    if (preprocess != Py_None) { /* 'preprocess' argument exists, call it without checking */
-        PyObject *ppres = PyObject_CallFunctionObjArgs(preprocess, x, NULL);
-        if (ppres == NULL) { /* Error inside 'preprocess(x)': ignore */
-            PyErr_Clear();
+    bool swap;
+    BufKind kind = parse_file_dtype(dtype, &swap);
+    if (kind == BUF_BAD) return NULL;
+    /* Whole blocks per chunk: window offsets are then multiples of 4 items for the packed output */
+    chunk = chunk < PAR_BLOCK ? PAR_BLOCK : chunk / PAR_BLOCK * PAR_BLOCK;
+
+    MappedFile src, dst;
+    Py_ssize_t cnt[5] = {0, 0, 0, 0, 0};
+    uint64_t *swapbuf[PAR_MAX_THREADS] = {NULL};
+    PyObject *res = NULL;
+    int nthreads = 1;
+    Py_ssize_t n = 0;
+
+    if (!mfile_open(&src, src_path, false)) return NULL;
+    if (src.size % 8 != 0) {
+        PyErr_Format(PyExc_ValueError, "signum.sign_file(): the size of %R, %llu bytes, is not a multiple of 8",
+                     src_path, (unsigned long long)src.size);
+        goto finish;
+    }
+    if ((uint64_t)(n = (Py_ssize_t)(src.size / 8)) != src.size / 8) {
+        PyErr_Format(PyExc_OverflowError, "signum.sign_file(): %R is too large for this platform", src_path);
+        goto finish;
+    }
+    if (dst_path != Py_None) {
+        if (!mfile_open(&dst, dst_path, true)) goto finish;
+        if (mfile_same(&src, &dst)) {
+            PyErr_Format(PyExc_ValueError, "signum.sign_file(): %R and %R are the same file", src_path, dst_path);
+            goto finish;
+        }
+        if (!mfile_resize(&dst, packed ? ((uint64_t)n + 3) / 4 : (uint64_t)n)) goto finish;
+    }
+
+    nthreads = parallel_threads(n < chunk ? n : chunk, threads);
+    if (swap) {
+        for (int t = 0; t < nthreads; t++) {
+            if ((swapbuf[t] = PyMem_New(uint64_t, PAR_BLOCK)) == NULL) { PyErr_NoMemory(); goto finish; }
+        }
+    }
+
+    for (Py_ssize_t pos = 0; pos < n; ) {
+        Py_ssize_t m = n - pos < chunk ? n - pos : chunk;
+        void *sbase, *dbase = NULL;
+        size_t slen, dlen = 0;
+        unsigned char *s = mfile_map(&src, (uint64_t)pos * 8, (size_t)m * 8, &sbase, &slen), *d = NULL;
+        if (s == NULL) goto finish;
+        if (dst_path != Py_None) {
+            d = packed ? mfile_map(&dst, (uint64_t)pos / 4, (size_t)(m + 3) / 4, &dbase, &dlen)
+                       : mfile_map(&dst, (uint64_t)pos, (size_t)m, &dbase, &dlen);
+            if (d == NULL) { mfile_unmap(sbase, slen); goto finish; }
+        }
+
+        file_kernel(kind, s, d, packed, m, cnt, nthreads, swap ? swapbuf : NULL);
+
+        Py_BEGIN_ALLOW_THREADS /* Dirty pages may be written back */
+        if (dbase) mfile_unmap(dbase, dlen);
+        mfile_unmap(sbase, slen);
+        Py_END_ALLOW_THREADS
+        pos += m;
+
+        if (progress != Py_None) { /* Raising in 'progress' stops the processing */
+            PyObject *r = PyObject_CallFunction(progress, "nn", pos, n);
+            if (r == NULL) goto finish;
+            Py_DECREF(r);
+        } else if (PyErr_CheckSignals() < 0) {
+            goto finish;
+        }
+    }
+    res = counts_tuple(cnt);
+
+finish:
+    for (int t = 0; t < nthreads; t++) PyMem_Free(swapbuf[t]);
+    mfile_close(&src);
+    mfile_close(&dst);
+    return res;
+}
+
+/* --- PARTITIONING --- */
+
+/* Codes of all items of a numeric buffer or an iterable in a new 'PyMem' buffer '*codes' of '*n' items.
+   Errors are classified as 'SIGN_ERR'; returns false with Python error set */
+static bool classify_all(PyObject *data, const SignOptions *opt, signed char **codes, Py_ssize_t *n)
+{
+    *codes = NULL;
+    *n = 0;
+
+    /* Numeric buffers are classified without Python objects */
+    Py_buffer sv;
+    if (PyObject_CheckBuffer(data)) {
+        if (PyObject_GetBuffer(data, &sv, PyBUF_FORMAT | PyBUF_C_CONTIGUOUS) < 0) {
+            PyErr_Clear(); /* Not contiguous: process it as an iterable */
         } else {
-            if (PyTuple_Check(ppres)) { /* 'ppres' is a tuple */
-                Py_ssize_t t_size = PyTuple_Size(ppres);
+            BufKind kind = buffer_kind(&sv);
+            if (kind) {
+                *n = sv.len / sv.itemsize;
+                *codes = (signed char *)PyMem_Malloc(*n > 0 ? *n : 1);
+                if (*codes) sign_kernel(kind, sv.buf, *codes, *n, 0);
+                PyBuffer_Release(&sv);
+                if (*codes == NULL) { PyErr_NoMemory(); return false; }
+                return true;
+            }
+            PyBuffer_Release(&sv);
+        }
+    }
 
-                /* Optimization: Tell the compiler that 'tsize' >= 0 */
-                #if __has_cpp_attribute(assume)
-                    [[assume(0 <= t_size)]];
-                #elif defined(_MSC_VER)
-                    __assume(0 <= t_size);
-                #elif defined(__GNUC__) || defined(__clang__)
-                    if (t_size < 0) __builtin_unreachable();
-                #endif
+    ItemSource src;
+    Py_ssize_t cap;
+    if (!source_open(&src, data, &cap)) return false;
+    if (cap < 16) cap = 16;
+    signed char *buf = (signed char *)PyMem_Malloc(cap);
+    if (buf == NULL) { source_close(&src); PyErr_NoMemory(); return false; }
 
-                switch (t_size) {
-                    case 0: break; /* Ignore the empty tuple */
-                    case 1: {      /* Replace argument */
-                        PyObject *item0 = PyTuple_GetItem(ppres, 0);
-                        Py_INCREF(item0);
-                        x = item0;
-                        to_free = item0;
-                        break;
-                    }
-                    default: {     /* 't_size' > 1: replace result */
-                        PyObject *item1 = PyTuple_GetItem(ppres, 1);
-                        Py_INCREF(item1);
-                        Py_DECREF(ppres);
-                        return item1;
-                    }
-                }
+    Py_ssize_t k = 0;
+    for (PyObject *item; (item = source_next(&src)) != NULL; k++) {
+        PyObject *obj = NULL;
+        int code = sign_apply(item, opt, &obj);
+        Py_DECREF(item);
+        if (code == SIGN_RAISE) break;
+        if (k == cap) {
+            signed char *nbuf = (signed char *)PyMem_Realloc(buf, cap <<= 1);
+            if (nbuf == NULL) { PyErr_NoMemory(); break; }
+            buf = nbuf;
+        }
+        buf[k] = (signed char)code;
+    }
+    source_close(&src);
+    if (PyErr_Occurred()) { PyMem_Free(buf); return false; }
+    *codes = buf;
+    *n = k;
+    return true;
+}
+
+/* 'sign_partition': indices of the items grouped by their quinary class, or a stable in-place regrouping of a list */
+static PyObject *signum_sign_partition(PyObject *self, PyObject *const *args, Py_ssize_t nargs, PyObject *kwnames)
+{
+    SignumState *st = signum_state(self);
+    SignOptions opt = {false, 0, Py_None, Py_None, false, st}; /* Errors are grouped, not raised */
+    bool reorder = false;
+
+    if (nargs != 1) {
+        PyErr_Format(PyExc_TypeError, "signum.sign_partition() takes exactly 1 positional argument, got %zd", nargs);
+        return NULL;
+    }
+    if (kwnames != NULL) {
+        Py_ssize_t nkwargs = PyTuple_GET_SIZE(kwnames);
+        for (Py_ssize_t i = 0; i < nkwargs; i++) {
+            PyObject *key = PyTuple_GET_ITEM(kwnames, i);
+            if (key == st->kw_fast || key == st->kw_reorder) {
+                int flag = PyObject_IsTrue(args[nargs + i]);
+                if (flag < 0) return NULL;
+                if (key == st->kw_fast) opt.fast = flag; else reorder = flag;
+            } else {
+                PyErr_Format(PyExc_TypeError, "signum.sign_partition() got an unexpected keyword argument '%U'", key);
+                return NULL;
             }
-            Py_DECREF(ppres);
         }
     }
 
-    /* Check for numeric NaN */
-    double d = PyFloat_AsDouble(x);
-    if (Py_IS_NAN(d)) {
-        Py_XDECREF(to_free);
-        if (no_codeshift) {
-            return PyFloat_FromDouble(Py_NAN);
+    PyObject *data = args[0];
+    PyObject *snapshot = NULL; /* Items of the list to reorder, safe against changes during comparisons */
+    if (reorder) {
+        if (!PyList_Check(data)) {
+            PyErr_Format(PyExc_TypeError, "signum.sign_partition(): reorder=True requires a list, not '%.80s'",
+                         Py_TYPE(data)->tp_name);
+            return NULL;
+        }
+        snapshot = PyList_GetSlice(data, 0, PyList_GET_SIZE(data));
+        if (snapshot == NULL) return NULL;
+    }
+
+    signed char *codes;
+    Py_ssize_t n;
+    if (!classify_all(snapshot ? snapshot : data, &opt, &codes, &n)) { Py_XDECREF(snapshot); return NULL; }
+
+    /* Counting sort: 'start[c]' is the position of the first item of the class 'c' */
+    Py_ssize_t cnt[5] = {0, 0, 0, 0, 0}, start[5];
+    for (Py_ssize_t i = 0; i < n; i++) cnt[codes[i] - SIGN_ERR]++;
+    start[0] = 0;
+    for (int c = 1; c < 5; c++) start[c] = start[c - 1] + cnt[c - 1];
+
+    PyObject *res = NULL;
+    if (reorder) {
+        PyObject *grouped = PyList_New(n);
+        if (grouped != NULL) {
+            Py_ssize_t pos[5] = {start[0], start[1], start[2], start[3], start[4]};
+            for (Py_ssize_t i = 0; i < n; i++) {
+                PyObject *item = PyList_GET_ITEM(snapshot, i);
+                Py_INCREF(item);
+                PyList_SET_ITEM(grouped, pos[codes[i] - SIGN_ERR]++, item);
+            }
+            if (PyList_SetSlice(data, 0, PY_SSIZE_T_MAX, grouped) == 0) res = counts_tuple(cnt);
+            Py_DECREF(grouped);
+        }
+    } else {
+        int64_t *idx = (int64_t *)PyMem_Malloc((n > 0 ? n : 1) * sizeof(int64_t));
+        if (idx == NULL) {
+            PyErr_NoMemory();
         } else {
-            return PyLong_FromLong(c_codeshift + 2); /* +2 is numeric code for NaN */
+            Py_ssize_t pos[5] = {start[0], start[1], start[2], start[3], start[4]};
+            for (Py_ssize_t i = 0; i < n; i++) idx[pos[codes[i] - SIGN_ERR]++] = i;
+            res = PyTuple_New(5);
+            for (int c = 0; res != NULL && c < 5; c++) {
+                PyObject *arr = array_from(st, st->Py_typecode_q, idx + start[c], cnt[c] * (Py_ssize_t)sizeof(int64_t));
+                if (arr == NULL) { Py_CLEAR(res); break; }
+                PyTuple_SET_ITEM(res, c, arr);
+            }
+            PyMem_Free(idx);
         }
     }
-    /* If it is something special, we will nevertheless try comparisons */
-    if (PyErr_Occurred()) PyErr_Clear();
 
-    /* Start of the ternary logic block */
-    int gt, lt, eq, stat_idx, self_eq;
-    long res;
+    PyMem_Free(codes);
+    Py_XDECREF(snapshot);
+    return res;
+}
 
-    gt = PyObject_RichCompareBool(x, Py_zero, Py_GT) + 1; /* 0: Error; 1: False; 2: True */
-    stat_idx = gt;
+/* --- QUINARY DISPATCH --- */
 
-    lt = PyObject_RichCompareBool(x, Py_zero, Py_LT) + 1;
-    res = (long)gt - lt; /* Result, if nothing special */
+/* Parse '(x, table, *, fast=False)' of the dispatch functions; '*table' receives a new reference
+   to the list or tuple of 5 items. Returns false with Python error set */
+static bool parse_dispatch(SignumState *st, PyObject *const *args, Py_ssize_t nargs, PyObject *kwnames,
+                           const char *fname, SignOptions *opt, PyObject **table)
+{
+    if (nargs != 2) {
+        PyErr_Format(PyExc_TypeError, "signum.%s() takes exactly 2 positional arguments, got %zd", fname, nargs);
+        return false;
+    }
+    if (kwnames != NULL) {
+        Py_ssize_t nkwargs = PyTuple_GET_SIZE(kwnames);
+        for (Py_ssize_t i = 0; i < nkwargs; i++) {
+            PyObject *key = PyTuple_GET_ITEM(kwnames, i);
+            if (key == st->kw_fast) {
+                int flag = PyObject_IsTrue(args[nargs + i]);
+                if (flag < 0) return false;
+                opt->fast = flag;
+            } else {
+                PyErr_Format(PyExc_TypeError, "signum.%s() got an unexpected keyword argument '%U'", fname, key);
+                return false;
+            }
+        }
+    }
 
-    /* Optimization: Tell the compiler that 'lt' is strictly within [0, 2] */
-    #if __has_cpp_attribute(assume)
-        [[assume(0 <= lt && lt <= 2)]];
-    #elif defined(_MSC_VER)
-        __assume(0 <= lt && lt <= 2);
-    #elif defined(__GNUC__) || defined(__clang__)
-        if (!(0 <= lt && lt <= 2)) __builtin_unreachable();
-    #endif
+    *table = PySequence_Fast(args[1], "the 2nd argument must be a sequence of 5 items");
+    if (*table == NULL) return false;
+    if (PySequence_Fast_GET_SIZE(*table) != 5) {
+        PyErr_Format(PyExc_ValueError, "signum.%s(): the 2nd argument must have 5 items, got %zd",
+                     fname, PySequence_Fast_GET_SIZE(*table));
+        Py_CLEAR(*table);
+        return false;
+    }
+    return true;
+}
 
-    switch (lt) {
-        case 0: goto error;
-        case 1: break; /* 'stat_idx == gt' is mutiplied by 'lt == 1' */
-        case 2: stat_idx = (stat_idx << 1) & 3; /* 'stat_idx == gt' is shift-mutiplied by 'lt == 2'
-                                                    and truncated mod 4 */
+/* Item of 'table' for the class of 'x' as in 'sign(x, 2)': a borrowed reference, or NULL with Python error set */
+static inline PyObject *dispatch_item(PyObject *x, const SignOptions *opt, PyObject *table)
+{
+    PyObject *obj = NULL;
+    int code = sign_apply(x, opt, &obj);
+    if (code == SIGN_RAISE) return NULL;
+    return PySequence_Fast_GET_ITEM(table, code - SIGN_ERR);
+}
+
+/* 'sign_select' and 'sign_dispatch', single and bulk: 'table[sign(x, 2)]' or 'table[sign(x, 2)](x)' */
+static PyObject *dispatch_impl(SignumState *st, PyObject *const *args, Py_ssize_t nargs, PyObject *kwnames,
+                               const char *fname, bool call, bool many)
+{
+    SignOptions opt = {false, 0, Py_None, Py_None, false, st}; /* Errors select the 0th item */
+    PyObject *table;
+    if (!parse_dispatch(st, args, nargs, kwnames, fname, &opt, &table)) return NULL;
+
+    PyObject *res = NULL;
+    if (!many) {
+        PyObject *item = dispatch_item(args[0], &opt, table);
+        if (item != NULL) {
+            if (call) {
+                res = PyObject_Vectorcall(item, args, 1, NULL);
+            } else {
+                Py_INCREF(item);
+                res = item;
+            }
+        }
+        Py_DECREF(table);
+        return res;
+    }
+
+    ItemSource src;
+    Py_ssize_t n;
+    if (!source_open(&src, args[0], &n)) { Py_DECREF(table); return NULL; }
+    res = PyList_New(n);
+    Py_ssize_t k = 0;
+
+    for (PyObject *x; res != NULL && (x = source_next(&src)) != NULL; k++) {
+        PyObject *r = dispatch_item(x, &opt, table);
+        if (r != NULL) {
+            if (call) {
+                r = PyObject_Vectorcall(r, &x, 1, NULL);
+            } else {
+                Py_INCREF(r);
+            }
+        }
+        Py_DECREF(x);
+        if (r == NULL) break;
+        if (k < n) {
+            PyList_SET_ITEM(res, k, r);
+        } else {
+            int rc = PyList_Append(res, r);
+            Py_DECREF(r);
+            if (rc < 0) break;
+        }
     }
+    source_close(&src);
+    Py_DECREF(table);
 
-    eq = PyObject_RichCompareBool(x, Py_zero, Py_EQ) + 1; /* Used only to process NaN and errors */
+    if (PyErr_Occurred() || (k < n && PyList_SetSlice(res, k, n, NULL) < 0)) { /* Shorter than the length hint */
+        Py_XDECREF(res);
+        return NULL;
+    }
+    return res;
+}
 
-    #if __has_cpp_attribute(assume)
-        [[assume(0 <= eq && eq <= 2)]];
-    #elif defined(_MSC_VER)
-        __assume(0 <= eq && eq <= 2);
-    #elif defined(__GNUC__) || defined(__clang__)
-        if (!(0 <= eq && eq <= 2)) __builtin_unreachable();
-    #endif
+static PyObject *signum_sign_select(PyObject *self, PyObject *const *args, Py_ssize_t nargs, PyObject *kwnames)
+{
+    return dispatch_impl(signum_state(self), args, nargs, kwnames, "sign_select", false, false);
+}
 
-    switch (eq) {
-        case 0: goto error;
-        case 1: break; /* 'stat_idx == (gt * lt) & 3' is mutiplied by 'eq == 1' */
-        case 2: stat_idx = (stat_idx << 1) & 3; /* 'stat_idx == (gt * lt) & 3' is shift-mutiplied by 'eq == 2'
-                                                   and truncated mod 4 */
-    }
+static PyObject *signum_sign_dispatch(PyObject *self, PyObject *const *args, Py_ssize_t nargs, PyObject *kwnames)
+{
+    return dispatch_impl(signum_state(self), args, nargs, kwnames, "sign_dispatch", true, false);
+}
 
-    /* Short Logic Overview:
-       - 'stat_idx == 0': Multiple 'True' flags or an error occurred. Maps to 0, 4, 8; this is 0 mod 4.
-       - 'stat_idx == 1': Triple 'False' state (1,1,1). Potential NaN; requires self-comparison.
-       - 'stat_idx == 2': Exactly one 'True' flag, no errors. Valid numeric state.
-    */
+static PyObject *signum_sign_select_many(PyObject *self, PyObject *const *args, Py_ssize_t nargs, PyObject *kwnames)
+{
+    return dispatch_impl(signum_state(self), args, nargs, kwnames, "sign_select_many", false, true);
+}
 
-    /* Detailed Logic Overview:
-       'gt', 'lt', 'eq' can be 0 for 'Error', 1 for 'False', 2 for 'True' (ternary logic).
-       'stat_idx = (gt*lt*eq) & 3'; equivalent is '(gt*lt*eq) % 4'.
-       'stat_idx' is 0:
-         - if we have one, two, or three errors; then the product is 0;
-           (we already processed errors in 'lt' or 'eq' directly by 'goto error;');
-         - if we have two 'True' and one 'False', or three 'True'; the product is 4 or 8,
-              which gives 0 (mod 4).
-       'stat_idx' is 1:
-         - if we have triple 'False', that indicates a potential NaN, and we perform
-           an additional self-comparison;
-       'stat_idx' is 2:
-         - only if we have one 'True' and two 'False': it's a valid number */
+static PyObject *signum_sign_dispatch_many(PyObject *self, PyObject *const *args, Py_ssize_t nargs, PyObject *kwnames)
+{
+    return dispatch_impl(signum_state(self), args, nargs, kwnames, "sign_dispatch_many", true, true);
+}
 
-    #if __has_cpp_attribute(assume)
-        [[assume(0 <= stat_idx && stat_idx <= 2)]];
-    #elif defined(_MSC_VER)
-        __assume(0 <= stat_idx && stat_idx <= 2);
-    #elif defined(__GNUC__) || defined(__clang__)
-        if (!(0 <= stat_idx && stat_idx <= 2)) __builtin_unreachable();
-    #endif
+/* --- NUMERIC TEXT --- */
 
-    switch (stat_idx) {
-        case 0: goto error;
-        case 1: { /* possible NaN '(False, False, False)' */
-            self_eq = PyObject_RichCompareBool(x, x, Py_EQ);
+static inline bool text_space(char c) { return c == ' ' || (c >= '\t' && c <= '\r'); }
+static inline bool text_digit(char c) { return c >= '0' && c <= '9'; }
 
-            #if __has_cpp_attribute(assume)
-                [[assume(-1 <= self_eq && self_eq <= 1)]];
-            #elif defined(_MSC_VER)
-                __assume(-1 <= self_eq && self_eq <= 1);
-            #elif defined(__GNUC__) || defined(__clang__)
-                if (!(-1 <= self_eq && self_eq <= 1)) __builtin_unreachable();
-            #endif
+/* Case-insensitive comparison of 'n' chars with the lowercase ASCII word 'w' */
+static inline bool text_word(const char *p, const char *w, size_t n)
+{
+    for (size_t i = 0; i < n; i++)
+        if ((p[i] | 0x20) != w[i]) return false;
+    return true;
+}
 
-            switch (self_eq) {
-                case -1: { /* Error in __eq__, we keep current Python error */
-                    Py_XDECREF(to_free);
-                    return NULL;
-                }
-                case  0: { /* NaN: not equal to itself */
-                    Py_XDECREF(to_free);
-                    if (no_codeshift) {
-                        return PyFloat_FromDouble(Py_NAN);
-                    } else {
-                        return PyLong_FromLong(c_codeshift + 2); /* +2 is numeric code for NaN */
-                    }
-                }
-                case  1: goto error; /* Not a NaN: equals to itself; not comparable to 0 */
-            }
-        }
-        case 2: {
-            Py_XDECREF(to_free);
-            return PyLong_FromLong(res + c_codeshift);
+/* Digits with single underscores between them, as in 'float()'; returns false if there are no digits.
+   '*nonzero' is set if a nonzero digit is met */
+static inline bool text_digits(const char *&p, const char *e, bool *nonzero)
+{
+    const char *start = p;
+    while (p < e) {
+        if (text_digit(*p)) {
+            *nonzero |= *p != '0';
+            p++;
+        } else if (*p == '_' && p > start && p + 1 < e && text_digit(p[1])) {
+            p++;
+        } else {
+            break;
         }
     }
-    goto error;
+    return p > start;
+}
 
-error:
+/* Sign of the decimal or scientific number written in 'p[0..n)', by its characters only:
+   zero only if all digits of the mantissa are zero, so '1e-400' is positive. Accepts what 'float()' accepts
+   in ASCII: surrounding whitespace, a sign, 'nan', 'inf', 'infinity'. 'SIGN_ERR' for anything else */
+static int text_code(const char *p, Py_ssize_t n)
+{
+    const char *e = p + n;
+    while (p < e && text_space(*p)) p++;
+    while (e > p && text_space(e[-1])) e--;
 
-    if (if_exc != Py_None) { /* 'if_exc' argument exists, return its 0th element instead of error */
-        PyErr_Clear();
-        PyObject *item = PyTuple_GetItem(if_exc, 0); /* We don't check 'if_exc' that should be tuple */
-        Py_INCREF(item);
-        Py_XDECREF(to_free);
-        return item;
+    bool neg = false;
+    if (p < e && (*p == '+' || *p == '-')) neg = *p++ == '-';
+    size_t len = (size_t)(e - p);
+    if (len == 3 && text_word(p, "nan", 3)) return SIGN_NAN;
+    if ((len == 3 && text_word(p, "inf", 3)) || (len == 8 && text_word(p, "infinity", 8)))
+        return neg ? SIGN_NEG : SIGN_POS;
+
+    bool nonzero = false, exp_nonzero = false;
+    bool digits = text_digits(p, e, &nonzero);
+    if (p < e && *p == '.') {
+        p++;
+        digits |= text_digits(p, e, &nonzero);
     }
+    if (!digits) return SIGN_ERR;
+    if (p < e && (*p == 'e' || *p == 'E')) {
+        p++;
+        if (p < e && (*p == '+' || *p == '-')) p++;
+        if (!text_digits(p, e, &exp_nonzero)) return SIGN_ERR;
+    }
+    if (p != e) return SIGN_ERR;
+    return nonzero ? (neg ? SIGN_NEG : SIGN_POS) : SIGN_ZERO;
+}
 
-    if (!no_codeshift) {
-        if (PyErr_Occurred()) PyErr_Clear();
-        return PyLong_FromLong(c_codeshift - 2); /* -2 is numeric stat_idx for detectable error */
+/* UTF-8 chars of 'str', or bytes of 'bytes'/'bytearray'; false if 'obj' is not text (no Python error) */
+static inline bool text_chars(PyObject *obj, const char **p, Py_ssize_t *n)
+{
+    if (PyUnicode_Check(obj)) {
+        *p = PyUnicode_AsUTF8AndSize(obj, n);
+        if (*p == NULL) { PyErr_Clear(); return false; }
+        return true;
+    }
+    if (PyBytes_Check(obj)) {
+        *p = PyBytes_AS_STRING(obj);
+        *n = PyBytes_GET_SIZE(obj);
+        return true;
+    }
+    if (PyByteArray_Check(obj)) {
+        *p = PyByteArray_AS_STRING(obj);
+        *n = PyByteArray_GET_SIZE(obj);
+        return true;
     }
+    return false;
+}
 
-    if (PyErr_Occurred()) {
-        PyObject *type, *value, *traceback;
-        /* Extract the current error */
-        PyErr_Fetch(&type, &value, &traceback);
-        PyErr_NormalizeException(&type, &value, &traceback);
+/* 'sign_text(s, codeshift=None, *, if_exc=None)': the exact sign of a number written as 'str' or bytes */
+static PyObject *signum_sign_text(PyObject *self, PyObject *const *args, Py_ssize_t nargs, PyObject *kwnames)
+{
+    SignumState *st = signum_state(self);
+    SignOptions opt = {true, 0, Py_None, Py_None, false, st};
+
+    switch (nargs) {
+        case 2: /* Processing 'codeshift' */
+            if (!sign_parse_codeshift(args[1], &opt)) return NULL;
+            break;
+        case 1:
+            break;
+        default:
+            PyErr_Format(PyExc_TypeError, "signum.sign_text() takes 1 or 2 positional arguments, got %zd", nargs);
+            return NULL;
+    }
 
-        /* Prepare the argument details */
-        PyObject *repr = PyObject_Repr(x);
-        const char *type_name = Py_TYPE(x)->tp_name;
+    /* Parse keyword-only arguments using interned strings */
+    if (kwnames != NULL) {
+        Py_ssize_t nkwargs = PyTuple_GET_SIZE(kwnames);
+        for (Py_ssize_t i = 0; i < nkwargs; i++) {
+            PyObject *key = PyTuple_GET_ITEM(kwnames, i);
+            if (key == st->kw_if_exc) {
+                opt.if_exc = args[nargs + i];
+            } else {
+                PyErr_Format(PyExc_TypeError, "signum.sign_text() got an unexpected keyword argument '%U'", key);
+                return NULL;
+            }
+        }
+    }
 
-        /* Prepare the old error as string */
-        PyObject *old_msg = PyObject_Str(value);
-        const char *old_msg_str = old_msg ? PyUnicode_AsUTF8(old_msg) : "unknown error";
+    PyObject *x = args[0];
+    const char *p;
+    Py_ssize_t n;
+    bool is_text = text_chars(x, &p, &n);
+    int code = is_text ? text_code(p, n) : SIGN_ERR;
 
-        /* Format the new message */
-        PyErr_Format(PyExc_TypeError,
-            "signum.sign: invalid argument `%.160s` (type '%.80s'). "
-            "Cause: %.320s",
-            repr ? PyUnicode_AsUTF8(repr) : "???",
-            type_name,
-            old_msg_str);
-
-        /* Clean memory */
-        Py_XDECREF(repr);
-        Py_XDECREF(old_msg);
-        Py_XDECREF(type);
-        Py_XDECREF(value);
-        Py_XDECREF(traceback);
+    if (code == SIGN_ERR) {
+        if (opt.if_exc != Py_None) { /* 'if_exc' argument exists, return its 0th element instead of error */
+            PyObject *item = PyTuple_GetItem(opt.if_exc, 0); /* We don't check 'if_exc' that should be tuple */
+            Py_XINCREF(item);
+            return item;
+        }
+        if (opt.no_codeshift) {
+            if (is_text) PyErr_Format(PyExc_ValueError, "signum.sign_text(): invalid numeric text %.200R", x);
+            else PyErr_Format(PyExc_TypeError, "signum.sign_text(): expected str, bytes, or bytearray, not '%.80s'",
+                              Py_TYPE(x)->tp_name);
+            return NULL;
+        }
     }
-    else {
-        PyObject *repr = PyObject_Repr(x);
-        const char *type_name = Py_TYPE(x)->tp_name;
+    return sign_result(code, NULL, &opt);
+}
 
-        if (repr) {
-            PyErr_Format(PyExc_TypeError,
-                "signum.sign: invalid argument `%.160s`. "
-                "Type '%.80s' does not support order comparisons (>, <, ==) "
-                "or NaN detection.",
-                PyUnicode_AsUTF8(repr),
-                type_name);
-            Py_DECREF(repr);
+/* The field 'column' of the line 'p[0..n)' split by 'delim[0..dn)', or by runs of whitespace if 'dn == 0';
+   surrounding double quotes are removed. False if there is no such field */
+static bool text_field(const char *p, Py_ssize_t n, Py_ssize_t column, const char *delim, Py_ssize_t dn,
+                       const char **fp, Py_ssize_t *fn)
+{
+    const char *e = p + n;
+    while (e > p && (e[-1] == '\n' || e[-1] == '\r')) e--;
+
+    if (dn == 0) {
+        for (;;) {
+            while (p < e && text_space(*p)) p++;
+            if (p == e) return false;
+            const char *f = p;
+            while (p < e && !text_space(*p)) p++;
+            if (column-- == 0) { *fp = f; *fn = p - f; break; }
         }
-        else {
-            PyErr_Format(PyExc_TypeError,
-                "signum.sign: invalid argument of type '%.80s', "
-                "which does not support order comparisons (>, <, ==) and printing.",
-                type_name);
+    } else {
+        for (;;) {
+            const char *f = p;
+            while (p < e && !(*p == delim[0] && e - p >= dn && memcmp(p, delim, dn) == 0)) p++;
+            if (column-- == 0) { *fp = f; *fn = p - f; break; }
+            if (p == e) return false;
+            p += dn;
         }
     }
-    Py_XDECREF(to_free);
-    return NULL;
+
+    /* "quoted" field */
+    const char *f = *fp, *fe = f + *fn;
+    while (f < fe && text_space(*f)) f++;
+    while (fe > f && text_space(fe[-1])) fe--;
+    if (fe - f >= 2 && *f == '"' && fe[-1] == '"') { f++; fe--; }
+    *fp = f;
+    *fn = fe - f;
+    return true;
 }
 
-/* 'fastsign': fast straightforward signum */
-static PyObject *signum_fastsign(PyObject *self, PyObject *x)
+/* 'sign_column(lines, column=0, delimiter=',', codeshift=None, *, skip=0)': sign codes of a column of text lines */
+static PyObject *signum_sign_column(PyObject *self, PyObject *const *args, Py_ssize_t nargs, PyObject *kwnames)
 {
-    if (PyErr_Occurred()) PyErr_Clear();
+    SignumState *st = signum_state(self);
+    PyObject *lines = NULL, *column_obj = Py_None, *delim_obj = NULL, *shift_obj = Py_None, *skip_obj = Py_None;
 
-    PyTypeObject *T = Py_TYPE(x);
+    switch (nargs) {
+        case 4: shift_obj = args[3];  [[fallthrough]];
+        case 3: delim_obj = args[2];  [[fallthrough]];
+        case 2: column_obj = args[1]; [[fallthrough]];
+        case 1: lines = args[0];      break;
+        default:
+            PyErr_Format(PyExc_TypeError, "signum.sign_column() takes from 1 to 4 positional arguments, got %zd", nargs);
+            return NULL;
+    }
 
-    if (T != fs_prev_type) {
-        fs_prev_type = T;
-        fs_f_cmp = T->tp_richcompare;
+    /* Parse keyword arguments using interned strings */
+    if (kwnames != NULL) {
+        Py_ssize_t nkwargs = PyTuple_GET_SIZE(kwnames);
+        for (Py_ssize_t i = 0; i < nkwargs; i++) {
+            PyObject *key = PyTuple_GET_ITEM(kwnames, i);
+            PyObject *val = args[nargs + i];
+            if (key == st->kw_column && nargs < 2) {
+                column_obj = val;
+            } else if (key == st->kw_delimiter && nargs < 3) {
+                delim_obj = val;
+            } else if (key == st->kw_codeshift && nargs < 4) {
+                shift_obj = val;
+            } else if (key == st->kw_skip) {
+                skip_obj = val;
+            } else {
+                PyErr_Format(PyExc_TypeError, "signum.sign_column() got an unexpected keyword argument '%U'", key);
+                return NULL;
+            }
+        }
     }
 
-    if (fs_f_cmp) {
-        PyObject *res = NULL;
+    Py_ssize_t column = column_obj == Py_None ? 0 : PyLong_AsSsize_t(column_obj);
+    if (column == -1 && PyErr_Occurred()) return NULL;
+    Py_ssize_t skip = skip_obj == Py_None ? 0 : PyLong_AsSsize_t(skip_obj);
+    if (skip == -1 && PyErr_Occurred()) return NULL;
+    if (column < 0 || skip < 0) {
+        PyErr_SetString(PyExc_ValueError, "signum.sign_column(): 'column' and 'skip' must be non-negative");
+        return NULL;
+    }
 
-        // x > 0
-        res = fs_f_cmp(x, Py_zero, Py_GT);
-        if (res == Py_True) {
-            Py_DECREF(res); Py_INCREF(Py_one); return Py_one;
+    const char *delim = ",";
+    Py_ssize_t dn = 1;
+    if (delim_obj == Py_None) {
+        dn = 0; /* Runs of whitespace */
+    } else if (delim_obj != NULL && (!text_chars(delim_obj, &delim, &dn) || dn == 0)) {
+        PyErr_SetString(PyExc_TypeError, "signum.sign_column(): 'delimiter' must be a non-empty str or bytes, or None");
+        return NULL;
+    }
+
+    SignOptions opt = {false, 0, Py_None, Py_None, false, st};
+    if (!sign_parse_codeshift(shift_obj, &opt) || !sign_int8_codeshift(&opt, "sign_column")) return NULL;
+
+    ItemSource src;
+    Py_ssize_t n;
+    if (!source_open(&src, lines, &n)) return NULL;
+
+    Py_ssize_t k = 0, cap = n > 16 ? n : 16;
+    signed char *buf = (signed char *)PyMem_Malloc(cap);
+    if (buf == NULL) { source_close(&src); return PyErr_NoMemory(); }
+
+    for (Py_ssize_t line_no = 0; ; line_no++) {
+        PyObject *line = source_next(&src);
+        if (line == NULL) {
+            if (PyErr_Occurred()) goto fail;
+            break;
         }
-        long flag = (res == NULL) || (res == Py_NotImplemented);
-        Py_XDECREF(res);
-        if (flag) goto fs_error;
+        if (line_no < skip) { Py_DECREF(line); continue; }
 
-        // x < 0
-        res = fs_f_cmp(x, Py_zero, Py_LT);
-        if (res == Py_True) {
-            Py_DECREF(res); Py_INCREF(Py_m_one); return Py_m_one;
+        const char *p, *f;
+        Py_ssize_t len, fn;
+        if (!text_chars(line, &p, &len)) {
+            PyErr_Format(PyExc_TypeError, "signum.sign_column(): lines must be str or bytes, not '%.80s'",
+                         Py_TYPE(line)->tp_name);
+            Py_DECREF(line);
+            goto fail;
         }
-        flag = (res == NULL) || (res == Py_NotImplemented);
-        Py_XDECREF(res);
-        if (flag) goto fs_error;
+        int code = text_field(p, len, column, delim, dn, &f, &fn) ? text_code(f, fn) : SIGN_ERR;
+        Py_DECREF(line);
 
-        // x == 0
-        res = fs_f_cmp(x, Py_zero, Py_EQ);
-        if (res == Py_True) {
-            Py_DECREF(res); Py_INCREF(Py_zero); return Py_zero;
+        if (k == cap) {
+            signed char *nbuf = (signed char *)PyMem_Realloc(buf, cap <<= 1);
+            if (nbuf == NULL) { PyErr_NoMemory(); goto fail; }
+            buf = nbuf;
         }
-        Py_XDECREF(res);
+        buf[k++] = (signed char)(code + opt.c_codeshift);
     }
 
-fs_error:
+    source_close(&src);
     {
-        std::string inner_error = "";
-
-        if (PyErr_Occurred()) {
-            PyObject *t = NULL, *v = NULL, *tb = NULL;
-            PyErr_Fetch(&t, &v, &tb);
-
-            if (v) {
-                PyObject *old_msg = PyObject_Str(v);
-                if (old_msg) {
-                    const char *temp = PyUnicode_AsUTF8(old_msg);
-                    inner_error = temp;
-                    Py_DECREF(old_msg);
-                }
-            }
+        PyObject *arr = int8_array_from(st, buf, k);
+        PyMem_Free(buf);
+        return arr;
+    }
 
-            Py_XDECREF(t); Py_XDECREF(v); Py_XDECREF(tb);
-        }
+fail:
+    source_close(&src);
+    PyMem_Free(buf);
+    return NULL;
+}
+
+/* --- REGISTRATION --- */
+
+/* 'register(cls, impl)': use 'impl' for the sign of instances of 'cls' and its subclasses.
+   'impl' is a callable 'impl(x)' or the name of an attribute of 'x' with the same sign; None removes it */
+static PyObject *signum_register(PyObject *self, PyObject *const *args, Py_ssize_t nargs)
+{
+    SignumState *st = signum_state(self);
+    if (nargs != 2) {
+        PyErr_Format(PyExc_TypeError, "signum.register() takes exactly 2 positional arguments, got %zd", nargs);
+        return NULL;
+    }
+    PyObject *cls = args[0], *impl = args[1];
+    if (!PyType_Check(cls)) {
+        PyErr_Format(PyExc_TypeError, "signum.register(): the 1st argument must be a type, not '%.80s'",
+                     Py_TYPE(cls)->tp_name);
+        return NULL;
+    }
 
-        if (inner_error.empty()) {
-            inner_error = "comparison with 'int' not implemented for type '";
-            inner_error += T->tp_name;
-            inner_error += "'";
+    if (impl == Py_None) {
+        if (PyDict_DelItem(st->sign_registry, cls) < 0) {
+            if (!PyErr_ExceptionMatches(PyExc_KeyError)) return NULL;
+            PyErr_Clear();
         }
+    } else if (PyUnicode_Check(impl) || PyCallable_Check(impl)) {
+        registry_keep(st, impl);
+        if (PyDict_SetItem(st->sign_registry, cls, impl) < 0) return NULL;
+    } else {
+        PyErr_Format(PyExc_TypeError,
+                     "signum.register(): the 2nd argument must be callable, an attribute name, or None, not '%.80s'",
+                     Py_TYPE(impl)->tp_name);
+        return NULL;
+    }
+
+    st->registry_epoch = new_epoch(); /* Cached strategies of all threads become stale */
+    Py_RETURN_NONE;
+}
 
-        if (!PyUnicode_Check(x)) {
-            double d = PyFloat_AsDouble(x);
-            if (d == -1.0 && PyErr_Occurred()) return NULL;
+/* 'register_zero(cls, zero)': compare instances of 'cls' and its subclasses with 'zero' instead of 'int(0)';
+   None removes it */
+static PyObject *signum_register_zero(PyObject *self, PyObject *const *args, Py_ssize_t nargs)
+{
+    SignumState *st = signum_state(self);
+    if (nargs != 2) {
+        PyErr_Format(PyExc_TypeError, "signum.register_zero() takes exactly 2 positional arguments, got %zd", nargs);
+        return NULL;
+    }
+    PyObject *cls = args[0], *zero = args[1];
+    if (!PyType_Check(cls)) {
+        PyErr_Format(PyExc_TypeError, "signum.register_zero(): the 1st argument must be a type, not '%.80s'",
+                     Py_TYPE(cls)->tp_name);
+        return NULL;
+    }
 
-            if (std::isnan(d)) { Py_INCREF(Py_float_nan); return Py_float_nan; }
-            if (d == 0.0)      { Py_INCREF(Py_zero);      return Py_zero;      }
-            if (d >  0.0)      { Py_INCREF(Py_one);       return Py_one;       }
-            if (d <  0.0)      { Py_INCREF(Py_m_one);     return Py_m_one;     }
+    if (zero == Py_None) {
+        if (PyDict_DelItem(st->zero_registry, cls) < 0) {
+            if (!PyErr_ExceptionMatches(PyExc_KeyError)) return NULL;
+            PyErr_Clear();
         }
+    } else {
+        registry_keep(st, zero);
+        if (PyDict_SetItem(st->zero_registry, cls, zero) < 0) return NULL;
+    }
+
+    st->registry_epoch = new_epoch(); /* Cached strategies of all threads become stale */
+    Py_RETURN_NONE;
+}
 
-        PyErr_Format(PyExc_TypeError, "signum.fastsign(): cannot compare or check for NaN. Cause: %.320s",
-                                      inner_error.c_str());
+/* 'register_invalid(cls, invalid=True)': instances of 'cls' and its subclasses are invalid arguments at once,
+   without the NaN probe and comparisons; 'invalid=False' removes the registration */
+static PyObject *signum_register_invalid(PyObject *self, PyObject *const *args, Py_ssize_t nargs)
+{
+    SignumState *st = signum_state(self);
+    if (nargs != 1 && nargs != 2) {
+        PyErr_Format(PyExc_TypeError, "signum.register_invalid() takes 1 or 2 positional arguments, got %zd", nargs);
+        return NULL;
     }
-    return NULL;
+    PyObject *cls = args[0];
+    if (!PyType_Check(cls)) {
+        PyErr_Format(PyExc_TypeError, "signum.register_invalid(): the 1st argument must be a type, not '%.80s'",
+                     Py_TYPE(cls)->tp_name);
+        return NULL;
+    }
+    int invalid = nargs == 2 ? PyObject_IsTrue(args[1]) : 1;
+    if (invalid < 0) return NULL;
+
+    if ((invalid ? PySet_Add(st->invalid_registry, cls) : PySet_Discard(st->invalid_registry, cls)) < 0) return NULL;
+
+    st->registry_epoch = new_epoch(); /* Cached strategies of all threads become stale */
+    Py_RETURN_NONE;
 }
 
 /* --- FORMALITIES --- */
@@ -430,46 +4391,258 @@ fs_error:
 static PyMethodDef SignumMethods[] = {
     {"sign", (PyCFunction)signum_sign, METH_FASTCALL | METH_KEYWORDS, "Return the sign of x: -1, 0, 1, or NaN."},
     {"fastsign", (PyCFunction)signum_fastsign, METH_O, "Return the sign of x: -1, 0, 1, or NaN. Simlified variant."},
+    {"sign_many", (PyCFunction)signum_sign_many, METH_FASTCALL | METH_KEYWORDS,
+     "Return the signs of all items of an iterable as a list, or as array('b') of codes."},
+    {"isign", (PyCFunction)signum_isign, METH_FASTCALL | METH_KEYWORDS,
+     "Return a lazy iterator over the signs of an iterable; with 'batch=N', over array('b') chunks of codes."},
+    {"sign_buffer", (PyCFunction)signum_sign_buffer, METH_FASTCALL | METH_KEYWORDS,
+     "Write the sign codes of a float64/int64 buffer into an int8 buffer 'out' (new array('b') by default); "
+     "large buffers use up to 'threads' native threads."},
+    {"sign_counts", (PyCFunction)signum_sign_counts, METH_FASTCALL | METH_KEYWORDS,
+     "Return the counts of invalid, negative, zero, positive, and NaN items; with weights, also the weighted sign sum."},
+    {"sign_pack", (PyCFunction)signum_sign_pack, METH_FASTCALL | METH_KEYWORDS,
+     "Return (packed, n, invalid): 2-bit packed signs, the number of items, and array('q') of invalid indices."},
+    {"sign_unpack", (PyCFunction)signum_sign_unpack, METH_FASTCALL | METH_KEYWORDS,
+     "Return the codes of n packed signs as array('b'); 'invalid' indices get code -2."},
+    {"sign_pack_counts", (PyCFunction)signum_sign_pack_counts, METH_FASTCALL | METH_KEYWORDS,
+     "Return the counts of the five classes of n packed signs without unpacking them."},
+    {"sign_file", (PyCFunction)signum_sign_file, METH_FASTCALL | METH_KEYWORDS,
+     "Write the sign codes (or, with packed=True, 2-bit packed signs) of a raw float64/int64 file into dst_path "
+     "through bounded memory-mapped chunks; return the counts of the five classes."},
+    {"sign_partition", (PyCFunction)signum_sign_partition, METH_FASTCALL | METH_KEYWORDS,
+     "Return five array('q') of indices grouped by class; with reorder=True, regroup a list in place."},
+    {"sign_select", (PyCFunction)signum_sign_select, METH_FASTCALL | METH_KEYWORDS,
+     "Return choices[sign(x, 2)] for a sequence of 5 choices."},
+    {"sign_dispatch", (PyCFunction)signum_sign_dispatch, METH_FASTCALL | METH_KEYWORDS,
+     "Return handlers[sign(x, 2)](x) for a sequence of 5 handlers."},
+    {"sign_select_many", (PyCFunction)signum_sign_select_many, METH_FASTCALL | METH_KEYWORDS,
+     "Return the list of choices[sign(x, 2)] for all items x of an iterable."},
+    {"sign_dispatch_many", (PyCFunction)signum_sign_dispatch_many, METH_FASTCALL | METH_KEYWORDS,
+     "Return the list of handlers[sign(x, 2)](x) for all items x of an iterable."},
+    {"register", (PyCFunction)signum_register, METH_FASTCALL,
+     "Register impl(x), or the name of an attribute of x, as the sign of instances of a type; None unregisters."},
+    {"register_zero", (PyCFunction)signum_register_zero, METH_FASTCALL,
+     "Register the zero that instances of a type are compared with, e.g. timedelta(0); None unregisters."},
+    {"register_invalid", (PyCFunction)signum_register_invalid, METH_FASTCALL,
+     "Register a type whose instances are never ordered against zero; register_invalid(cls, False) unregisters."},
+    {"stats", (PyCFunction)signum_stats, METH_VARARGS | METH_KEYWORDS,
+     "Return {exit path: count} of sign and fastsign since the last reset; stats(True) also resets, "
+     "stats(enable=True) switches counting on (off by default)."},
+    {"profile", (PyCFunction)signum_profile, METH_VARARGS | METH_KEYWORDS,
+     "Return the sampled latencies of sign and fastsign by argument type and options, slowest total first; "
+     "profile(rate=N) times about one call in N, rate=0 stops, profile(True) also resets."},
+    {"profile_table", (PyCFunction)signum_profile_table, METH_VARARGS | METH_KEYWORDS,
+     "Return profile() as a text table; takes the same arguments."},
+    {"deadband", (PyCFunction)signum_deadband, METH_O,
+     "Return a native preprocessor: x with abs(x) < eps has the sign 0."},
+    {"rel_deadband", (PyCFunction)signum_rel_deadband, METH_FASTCALL,
+     "Return a native preprocessor: x with abs(x) < rtol * abs(ref) has the sign 0."},
+    {"round_to", (PyCFunction)signum_round_to, METH_O,
+     "Return a native preprocessor: the sign of round(x, ndigits)."},
+    {"sign_text", (PyCFunction)signum_sign_text, METH_FASTCALL | METH_KEYWORDS,
+     "Return the exact sign of a number written as str or bytes, without float conversion."},
+    {"sign_column", (PyCFunction)signum_sign_column, METH_FASTCALL | METH_KEYWORDS,
+     "Return array('b') of the sign codes of a column of text lines (file or iterable of str/bytes)."},
     {NULL, NULL, 0, NULL} /* Stop-string */
 };
 
 /* Module description */
-static struct PyModuleDef signummodule = {
-    PyModuleDef_HEAD_INIT,
-    "signum",
-    "Universal, Robust, High-Performance, Versatile Implementation of the 'sign' Function for Python.",
-    -1,
-    SignumMethods,
-    NULL, NULL, NULL,
-    signum_free
-};
+/* Module state: objects for garbage collection, release, and the deprecation warning at unload */
+static int signum_traverse(PyObject *m, visitproc visit, void *arg)
+{
+    SignumState *st = signum_state(m);
+    if (st == NULL) return 0;
+    Py_VISIT(st->Py_array_type);
+    Py_VISIT(st->Py_round);
+    Py_VISIT(st->Isign_Type);
+    Py_VISIT(st->Preproc_Type);
+    Py_VISIT(st->SignError_Type);
+    Py_VISIT(st->Signer_Type);
+    Py_VISIT(st->sign_registry);
+    Py_VISIT(st->zero_registry);
+    Py_VISIT(st->invalid_registry);
+    #ifdef Py_GIL_DISABLED
+        Py_VISIT(st->registry_kept);
+    #endif
+    if (st->profile)
+        for (int i = 0; i < PROFILE_SLOTS; i++) Py_VISIT(st->profile[i].type);
+    return 0;
+}
 
-/* Module initialization */
-#ifdef __cplusplus
-extern "C" {
-#endif
-PyMODINIT_FUNC PyInit_signum(void) {
-    PyObject *m = PyModule_Create(&signummodule);
-    if (m == NULL) return NULL;
+static int signum_clear(PyObject *m)
+{
+    SignumState *st = signum_state(m);
+    if (st == NULL) return 0;
+    st->profile_rate = 0;
+    ProfileEntry *tab = NULL;
+    {
+        std::lock_guard<std::mutex> lock(st->profile_mutex);
+        std::swap(tab, st->profile);
+    }
+    profile_release(tab);
+    Py_CLEAR(st->kw_if_exc);
+    Py_CLEAR(st->kw_preprocess);
+    Py_CLEAR(st->kw_codeshift);
+    Py_CLEAR(st->kw_fast);
+    Py_CLEAR(st->kw_as_array);
+    Py_CLEAR(st->kw_frombytes);
+    Py_CLEAR(st->kw_out);
+    Py_CLEAR(st->kw_batch);
+    Py_CLEAR(st->kw_weights);
+    Py_CLEAR(st->kw_invalid);
+    Py_CLEAR(st->kw_reorder);
+    Py_CLEAR(st->kw_column);
+    Py_CLEAR(st->kw_delimiter);
+    Py_CLEAR(st->kw_skip);
+    Py_CLEAR(st->kw_threads);
+    Py_CLEAR(st->kw_packed);
+    Py_CLEAR(st->kw_chunk);
+    Py_CLEAR(st->kw_progress);
+    Py_CLEAR(st->kw_numerator);
+    Py_CLEAR(st->kw_is_nan);
+    Py_CLEAR(st->kw_is_snan);
+    Py_CLEAR(st->kw_is_zero);
+    Py_CLEAR(st->kw_is_signed);
+    Py_CLEAR(st->kw_sign);
+    Py_XDECREF(st->fraction_type.exchange(NULL));
+    Py_XDECREF(st->decimal_type.exchange(NULL));
+    Py_CLEAR(st->sign_registry);
+    Py_CLEAR(st->zero_registry);
+    Py_CLEAR(st->invalid_registry);
+    #ifdef Py_GIL_DISABLED
+        Py_CLEAR(st->registry_kept);
+    #endif
+    st->registry_epoch = new_epoch(); /* Cached strategies must not borrow from the cleared registries */
+    Py_CLEAR(st->Py_m_one);
+    Py_CLEAR(st->Py_zero);
+    Py_CLEAR(st->Py_one);
+    Py_CLEAR(st->Py_float_nan);
+    Py_CLEAR(st->Py_array_type);
+    Py_CLEAR(st->Py_typecode_b);
+    Py_CLEAR(st->Py_typecode_q);
+    Py_CLEAR(st->Isign_Type);
+    Py_CLEAR(st->Preproc_Type);
+    Py_CLEAR(st->SignError_Type);
+    Py_CLEAR(st->Signer_Type);
+    Py_CLEAR(st->Py_round);
+    return 0;
+}
+
+/* Finalisation at module unload */
+static void signum_free(void *m)
+{
+    SignumState *st = signum_state((PyObject *)m);
+    if (st == NULL) return;
+    /* Warning: deprecated 'codeshift=' keyword argument was used */
+    if (st->warn_flag) {
+        fputs("DeprecationWarning: signum.sign: 'codeshift=' keyword is deprecated and "
+              "will be removed in August 2026; use the second positional argument instead\n", stderr);
+        fflush(stderr);
+    }
+    signum_clear((PyObject *)m);
+    st->~SignumState();
+}
+
+/* Create a heap type of the module, add it as an attribute if 'name' is given; returns false with error set */
+static bool signum_add_type(PyObject *m, PyType_Spec *spec, PyObject *base, const char *name, PyObject **slot)
+{
+    *slot = PyType_FromModuleAndSpec(m, spec, base);
+    if (*slot == NULL) return false;
+    #ifndef Py_TPFLAGS_DISALLOW_INSTANTIATION
+        if (name == NULL) ((PyTypeObject *)*slot)->tp_new = NULL;
+    #endif
+    if (name == NULL) return true;
+    Py_INCREF(*slot);
+    if (PyModule_AddObject(m, name, *slot) < 0) { Py_DECREF(*slot); return false; }
+    return true;
+}
+
+/* Module execution (PEP 489): runs once for every interpreter that imports the module */
+static int signum_exec(PyObject *m)
+{
+    SignumState *st = new (signum_state(m)) SignumState(); /* Zeroed memory; construct the atomics */
+    st->registry_epoch = new_epoch();
+    #if PY_VERSION_HEX < 0x03090000
+        signum_module = m; /* Borrowed: the module lives as long as the interpreter */
+    #endif
 
     /* Create interned strings */
-    kw_if_exc     = PyUnicode_InternFromString("if_exc");
-    kw_preprocess = PyUnicode_InternFromString("preprocess");
-    kw_codeshift  = PyUnicode_InternFromString("codeshift");
+    st->kw_if_exc     = PyUnicode_InternFromString("if_exc");
+    st->kw_preprocess = PyUnicode_InternFromString("preprocess");
+    st->kw_codeshift  = PyUnicode_InternFromString("codeshift");
+    st->kw_fast       = PyUnicode_InternFromString("fast");
+    st->kw_as_array   = PyUnicode_InternFromString("as_array");
+    st->kw_frombytes  = PyUnicode_InternFromString("frombytes");
+    st->kw_out        = PyUnicode_InternFromString("out");
+    st->kw_batch      = PyUnicode_InternFromString("batch");
+    st->kw_weights    = PyUnicode_InternFromString("weights");
+    st->kw_invalid    = PyUnicode_InternFromString("invalid");
+    st->kw_reorder    = PyUnicode_InternFromString("reorder");
+    st->kw_column     = PyUnicode_InternFromString("column");
+    st->kw_delimiter  = PyUnicode_InternFromString("delimiter");
+    st->kw_skip       = PyUnicode_InternFromString("skip");
+    st->kw_threads    = PyUnicode_InternFromString("threads");
+    st->kw_packed     = PyUnicode_InternFromString("packed");
+    st->kw_chunk      = PyUnicode_InternFromString("chunk");
+    st->kw_progress   = PyUnicode_InternFromString("progress");
+    st->kw_numerator  = PyUnicode_InternFromString("_numerator");
+    st->kw_is_nan     = PyUnicode_InternFromString("is_nan");
+    st->kw_is_snan    = PyUnicode_InternFromString("is_snan");
+    st->kw_is_zero    = PyUnicode_InternFromString("is_zero");
+    st->kw_is_signed  = PyUnicode_InternFromString("is_signed");
+    st->kw_sign       = PyUnicode_InternFromString("__sign__");
 
-    /* Create static Pythonic int(-1), int(0), int(1), and float('nan') */
-    Py_m_one      = PyLong_FromLong(-1);
-    Py_zero       = PyLong_FromLong( 0);
-    Py_one        = PyLong_FromLong( 1);
-    Py_float_nan  = PyFloat_FromDouble(Py_NAN);
+    /* Create Pythonic int(-1), int(0), int(1), and float('nan') */
+    st->Py_m_one      = PyLong_FromLong(-1);
+    st->Py_zero       = PyLong_FromLong( 0);
+    st->Py_one        = PyLong_FromLong( 1);
+    st->Py_float_nan  = PyFloat_FromDouble(Py_NAN);
 
-    if (!kw_if_exc || !kw_preprocess || !kw_codeshift || !Py_zero) {
-        return NULL; /* No memory */
+    if (!st->kw_if_exc || !st->kw_preprocess || !st->kw_codeshift || !st->kw_fast || !st->kw_as_array
+        || !st->kw_frombytes || !st->kw_out || !st->kw_batch || !st->kw_weights || !st->kw_invalid
+        || !st->kw_reorder || !st->kw_column || !st->kw_delimiter || !st->kw_skip || !st->kw_threads
+        || !st->kw_packed || !st->kw_chunk || !st->kw_progress
+        || !st->kw_numerator || !st->kw_is_nan || !st->kw_is_snan || !st->kw_is_zero || !st->kw_is_signed || !st->kw_sign
+        || !st->Py_m_one || !st->Py_zero || !st->Py_one || !st->Py_float_nan) {
+        return -1; /* No memory */
     }
 
+    /* 'array.array' for compact results */
+    PyObject *array_mod = PyImport_ImportModule("array");
+    if (array_mod == NULL) return -1;
+    st->Py_array_type = PyObject_GetAttrString(array_mod, "array");
+    Py_DECREF(array_mod);
+    st->Py_typecode_b = PyUnicode_InternFromString("b");
+    st->Py_typecode_q = PyUnicode_InternFromString("q");
+    if (!st->Py_array_type || !st->Py_typecode_b || !st->Py_typecode_q) return -1;
+
+    /* Registry of sign implementations */
+    st->sign_registry = PyDict_New();
+    st->zero_registry = PyDict_New();
+    st->invalid_registry = PySet_New(NULL);
+    if (st->sign_registry == NULL || st->zero_registry == NULL || st->invalid_registry == NULL) return -1;
+    #ifdef Py_GIL_DISABLED
+        st->registry_kept = PyList_New(0);
+        if (st->registry_kept == NULL) return -1;
+    #endif
+
+    /* Built-in 'round' */
+    PyObject *builtins_mod = PyImport_ImportModule("builtins");
+    if (builtins_mod == NULL) return -1;
+    st->Py_round = PyObject_GetAttrString(builtins_mod, "round");
+    Py_DECREF(builtins_mod);
+    if (st->Py_round == NULL) return -1;
+
+    /* Types */
+    if (!signum_add_type(m, &isign_spec, NULL, NULL, &st->Isign_Type)
+        || !signum_add_type(m, &preproc_spec, NULL, NULL, &st->Preproc_Type)
+        || !signum_add_type(m, &signer_spec, NULL, "Signer", &st->Signer_Type)
+        || !signum_add_type(m, &sign_error_spec, PyExc_TypeError, "SignError", &st->SignError_Type)) return -1;
+
     /* Provide '__all__' */
     /* List for 'fastsign' and 'sign' */
     PyObject *all_list = PyList_New(0);
+    if (all_list == NULL) return -1;
 
     /* Lambda-helper */
     auto add_to_all = [&](const char* name) {
@@ -481,13 +4654,90 @@ PyMODINIT_FUNC PyInit_signum(void) {
     /* Add functions to the list */
     add_to_all("fastsign");
     add_to_all("sign");
+    add_to_all("sign_many");
+    add_to_all("isign");
+    add_to_all("sign_buffer");
+    add_to_all("sign_counts");
+    add_to_all("sign_pack");
+    add_to_all("sign_unpack");
+    add_to_all("sign_pack_counts");
+    add_to_all("sign_file");
+    add_to_all("sign_partition");
+    add_to_all("sign_select");
+    add_to_all("sign_dispatch");
+    add_to_all("sign_select_many");
+    add_to_all("sign_dispatch_many");
+    add_to_all("register");
+    add_to_all("register_zero");
+    add_to_all("register_invalid");
+    add_to_all("stats");
+    add_to_all("profile");
+    add_to_all("profile_table");
+    add_to_all("deadband");
+    add_to_all("rel_deadband");
+    add_to_all("round_to");
+    add_to_all("sign_text");
+    add_to_all("sign_column");
+    add_to_all("SignError");
+    add_to_all("Signer");
 
     /* Add attribute 'signum.__all__' */
-    PyModule_AddObject(m, "__all__", all_list);
+    if (PyModule_AddObject(m, "__all__", all_list) < 0) { Py_DECREF(all_list); return -1; }
+
+    /* Latency sampling of 'signum.profile()' from the start: SIGNUM_PROFILE=N times about one call in N */
+    st->profile_overhead = profile_clock_overhead();
+    const char *profile_env = getenv("SIGNUM_PROFILE");
+    if (profile_env && *profile_env) {
+        char *end;
+        unsigned long rate = std::strtoul(profile_env, &end, 10);
+        if (*end == '\0' && rate <= PROFILE_MAX_RATE && !profile_set_rate(st, (unsigned int)rate)) return -1;
+    }
+
+    /* Counting of 'signum.stats()' from the start: SIGNUM_STATS set to anything but '' or '0' */
+    #if SIGNUM_STATS
+        const char *stats_env = getenv("SIGNUM_STATS");
+        if (stats_env && *stats_env && std::strcmp(stats_env, "0") != 0)
+            stats_enabled.store(true, std::memory_order_relaxed);
+    #endif
+
+    /* Add attribute 'signum.__simd__': the instruction set of the buffer kernels */
+    if (PyModule_AddStringConstant(m, "__simd__", simd_names[simd_level()]) < 0) return -1;
 
     /* Add attribute 'signum.__version__' */
-    PyModule_AddStringConstant(m, "__version__", "1.2.6");
-    return m;
+    return PyModule_AddStringConstant(m, "__version__", "1.2.6");
+}
+
+static PyModuleDef_Slot signum_slots[] = {
+    {Py_mod_exec, (void *)signum_exec},
+    #if PY_VERSION_HEX >= 0x030C0000
+        /* No process-global objects: each interpreter has its own module state, also with its own GIL */
+        {Py_mod_multiple_interpreters, Py_MOD_PER_INTERPRETER_GIL_SUPPORTED},
+    #endif
+    #if PY_VERSION_HEX >= 0x030D0000
+        /* Shared state is atomic, immutable, or thread-local; objects that threads share lock themselves */
+        {Py_mod_gil, Py_MOD_GIL_NOT_USED},
+    #endif
+    {0, NULL}
+};
+
+static struct PyModuleDef signummodule = {
+    PyModuleDef_HEAD_INIT,
+    "signum",
+    "Universal, Robust, High-Performance, Versatile Implementation of the 'sign' Function for Python.",
+    sizeof(SignumState),
+    SignumMethods,
+    signum_slots,
+    signum_traverse,
+    signum_clear,
+    signum_free
+};
+
+/* Module initialization: multi-phase (PEP 489) */
+#ifdef __cplusplus
+extern "C" {
+#endif
+PyMODINIT_FUNC PyInit_signum(void) {
+    return PyModuleDef_Init(&signummodule);
 }
 #ifdef __cplusplus
 }
@@ -0,0 +1,439 @@
+"""Reproducible micro-benchmarks of `sign` and `fastsign` with JSON results and regression comparison.
+
+    python bench.py run [-o results.json] [--repeat 20] [--warmup 3] [--sample-ms 5] [-k FILTER]
+    python bench.py compare old.json new.json [--threshold 2] [--alpha 0.01]
+    python bench.py workload [--corpus FILE | --mix int=60,float=25,... --error-rate 0.05 --size N]
+                             [--save FILE] [--batch 1000] [--passes 5] [-o results.json]
+
+Every case is one input type with one option combination, timed by `timeit` as a statement compiled inline.
+A case gets 'warmup' unrecorded samples and 'repeat' recorded ones; a sample is a loop calibrated once to last
+about 'sample-ms' milliseconds. Cases that the installed version does not support are skipped, so result files
+of different versions can be compared on their common cases.
+
+A workload replays a corpus of mixed values, so the type caches and the branch predictor see realistic traffic.
+The corpus is a JSON Lines file with one `[type, text]` or `[type, text, options]` record per line, e.g.
+`["Decimal", "2.5"]`, `["float", "nan"]`, `["None", ""]`, `["int", "-5", {"codeshift": 2}]`; or it is generated
+from a type mix and an error rate (invalid `None` and `str` items), and can be saved for replays.
+"""
+
+import signum
+from signum import sign
+from testing import MyNumber, set_high_priority, detect_version, success, OutputUTF8
+
+import argparse
+from decimal import Decimal
+from fractions import Fraction
+import json
+import math
+import os
+import platform
+import random
+import statistics
+import sys
+import time
+import timeit
+
+# (input name, expression); evaluated once per case, so the value itself is not timed
+INPUTS = [
+    ('int',          '-5'),
+    ('int zero',     '0'),
+    ('big int',      '10**1000'),
+    ('bool',         'True'),
+    ('float',        '5.5'),
+    ('float -0.0',   "float('-0.0')"),
+    ('float inf',    "float('-inf')"),
+    ('float NaN',    "float('nan')"),
+    ('Fraction',     'Fraction(-1, 3)'),
+    ('Decimal',      "Decimal('2.5')"),
+    ('Decimal NaN',  "Decimal('NaN')"),
+    ('sympy',        "sympy.Rational(-1, 3)"),
+    ('custom class', 'MyNumber(3)'),
+    ('str',          "'5.0'"),
+    ('None',         'None'),
+]
+INVALID = {'str', 'None'} # Invalid for both functions
+
+# (option name, statement); 'x' is the input
+OPTIONS = [
+    ('sign(x)',                   'sign(x)'),
+    ('sign(x, 2)',                'sign(x, 2)'),
+    ('sign(x, codeshift=2)',      'sign(x, codeshift=2)'),
+    ('sign(x, if_exc=...)',       'sign(x, if_exc=(-2,))'),
+    ('sign(x, preprocess=func)',  'sign(x, preprocess=no_prep)'),
+    ('sign(x, preprocess=native)', 'sign(x, preprocess=native_prep)'),
+    ('Signer(2)(x)',              'to_code(x)'),
+    ('fastsign(x)',               'fastsign(x)'),
+]
+HANDLES_INVALID = {'sign(x, if_exc=...)', 'Signer(2)(x)'} # Others raise on invalid inputs: the raise is timed
+
+def namespace():
+    """Globals of the timed statements; names missing in older versions stay absent"""
+    import sympy
+    import warnings
+    warnings.simplefilter('ignore', DeprecationWarning) # 'codeshift=' is deprecated but still measured
+    ns = {'Decimal': Decimal, 'Fraction': Fraction, 'sympy': sympy, 'MyNumber': MyNumber,
+          'sign': sign, 'no_prep': lambda x: None}
+    if hasattr(signum, 'fastsign'):
+        ns['fastsign'] = signum.fastsign
+    if hasattr(signum, 'deadband'):
+        ns['native_prep'] = signum.deadband(1e-9)
+    if hasattr(signum, 'Signer'):
+        ns['to_code'] = signum.Signer(2, if_exc=(-2,))
+    return ns
+
+def cases(ns, pattern=None):
+    """(name, statement, globals) of every case the installed version supports"""
+    for opt_name, stmt in OPTIONS:
+        try: # Is the option supported at all?
+            eval(stmt, dict(ns, x=1))
+        except Exception:
+            continue
+        for in_name, expr in INPUTS:
+            name = f'{opt_name} | {in_name}'
+            if pattern and pattern not in name:
+                continue
+            g = dict(ns, x=eval(expr, ns))
+            timed = stmt
+            if in_name in INVALID and opt_name not in HANDLES_INVALID:
+                timed = f'try:\n    {stmt}\nexcept TypeError:\n    pass'
+            try:
+                exec(timed, g)
+            except Exception: # E.g., a type not supported before some version
+                continue
+            yield name, timed, g
+
+def measure(stmt, g, repeat, warmup, sample_ms):
+    """Samples of ns per call"""
+    timer = timeit.Timer(stmt, globals=g)
+    number = 1
+    while timer.timeit(number) < sample_ms / 1000: # Calibrate the number of calls of a sample
+        number *= 2
+    samples = [timer.timeit(number) / number * 1e9 for _ in range(warmup + repeat)]
+    return samples[warmup:], number
+
+def environment():
+    return {
+        'version': detect_version(),
+        'python': sys.version.split()[0],
+        'implementation': platform.python_implementation(),
+        'platform': platform.platform(),
+        'machine': platform.machine(),
+        'processor': platform.processor(),
+        'cpus': os.cpu_count(),
+        'simd': getattr(signum, '__simd__', None),
+        'time': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+    }
+
+def run(args):
+    print(f'*** {set_high_priority()} ***\n')
+    ns = namespace()
+    results = {'environment': environment(),
+               'settings': {'repeat': args.repeat, 'warmup': args.warmup, 'sample_ms': args.sample_ms},
+               'cases': {}}
+
+    print(f"{'Case':<50} | {'median ns':>9} | {'stdev':>6} | {'min':>7}")
+    print('-' * 82)
+    for name, stmt, g in cases(ns, args.filter):
+        samples, number = measure(stmt, g, args.repeat, args.warmup, args.sample_ms)
+        median, stdev = statistics.median(samples), statistics.stdev(samples)
+        results['cases'][name] = {'median': median, 'stdev': stdev, 'min': min(samples), 'number': number,
+                                  'samples': samples}
+        print(f'{name:<50} | {median:>9.1f} | {stdev:>6.2f} | {min(samples):>7.1f}')
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=1)
+        print(f'\nResults saved to {args.output}')
+    print(f"\n{success(len(results['cases']))}")
+    return 0
+
+def mann_whitney_greater(a, b):
+    """One-sided p-value of the Mann-Whitney U test that 'b' tends to be greater than 'a' (normal approximation)"""
+    u = sum((y > x) + 0.5 * (y == x) for x in a for y in b)
+    n1, n2 = len(a), len(b)
+    sd = math.sqrt(n1 * n2 * (n1 + n2 + 1) / 12)
+    if sd == 0:
+        return 1.0
+    z = (u - n1 * n2 / 2) / sd
+    return 0.5 * math.erfc(z / math.sqrt(2))
+
+def compare(args):
+    with open(args.old, encoding='utf-8') as f:
+        old = json.load(f)
+    with open(args.new, encoding='utf-8') as f:
+        new = json.load(f)
+    for label, res in (('old', old), ('new', new)):
+        env = res['environment']
+        print(f"{label}: v{env['version']}, Python {env['python']}, {env['platform']}, SIMD {env['simd']}, {env['time']}")
+
+    common = [name for name in old['cases'] if name in new['cases']]
+    print(f"\n{'Case':<50} | {'old ns':>7} | {'new ns':>7} | {'change':>7} | {'p':>6} | verdict")
+    print('-' * 100)
+    regressions = improvements = 0
+    for name in common:
+        a, b = old['cases'][name], new['cases'][name]
+        change = (b['median'] / a['median'] - 1) * 100
+        p_slower = mann_whitney_greater(a['samples'], b['samples'])
+        p_faster = mann_whitney_greater(b['samples'], a['samples'])
+        verdict = ''
+        if change > args.threshold and p_slower < args.alpha:
+            verdict, p = 'REGRESSION', p_slower
+            regressions += 1
+        elif change < -args.threshold and p_faster < args.alpha:
+            verdict, p = 'faster', p_faster
+            improvements += 1
+        else:
+            p = min(p_slower, p_faster)
+        print(f"{name:<50} | {a['median']:>7.1f} | {b['median']:>7.1f} | {change:>+6.1f}% | {p:>6.4f} | {verdict}")
+
+    only = sorted(set(old['cases']) ^ set(new['cases']))
+    if only:
+        print(f'\nNot compared (in one file only): {len(only)} cases')
+    total = sum(math.log(new['cases'][n]['median'] / old['cases'][n]['median']) for n in common)
+    geomean = (math.exp(total / len(common)) - 1) * 100 if common else 0.0
+    print(f'\n{len(common)} cases: {regressions} regressions, {improvements} improvements '
+          f'(threshold {args.threshold}%, alpha {args.alpha}); geometric mean change {geomean:+.1f}%')
+    return 1 if regressions else 0
+
+# Corpus records: type -> value from its text
+DECODERS = {
+    'int':      int,
+    'bool':     lambda text: text == 'True',
+    'float':    float,
+    'Decimal':  Decimal,
+    'Fraction': Fraction,
+    'None':     lambda text: None,
+    'str':      str,
+}
+
+# Names of '--mix' -> random (type, text) records
+GENERATORS = {
+    'int':      lambda r: ('int', str(r.randint(-10**6, 10**6))),
+    'bigint':   lambda r: ('int', str(r.randint(-10**40, 10**40))),
+    'bool':     lambda r: ('bool', str(r.random() < 0.5)),
+    'float':    lambda r: ('float', repr(r.gauss(0.0, 100.0))),
+    'zero':     lambda r: ('float', r.choice(['0.0', '-0.0'])),
+    'inf':      lambda r: ('float', r.choice(['inf', '-inf'])),
+    'NaN':      lambda r: ('float', 'nan'),
+    'Decimal':  lambda r: ('Decimal', str(Decimal(r.randint(-10**6, 10**6)).scaleb(-2))),
+    'Fraction': lambda r: ('Fraction', f'{r.randint(-999, 999)}/{r.randint(1, 999)}'),
+}
+INVALID_GENERATORS = [
+    lambda r: ('None', ''),
+    lambda r: ('str', r.choice(['', 'n/a', '12.5', '-'])),
+]
+
+# Per-item configurations: (name, statement for 'x' with the record options 'o', required names)
+WORKLOAD_ITEMS = [
+    ('sign(x)',              'sign(x)',               ()),
+    ('sign(x, **options)',   'sign(x, **o)',          ()),
+    ('sign(x, if_exc=...)',  'sign(x, if_exc=(-2,))', ()),
+    ('Signer(2)(x)',         'to_code(x)',            ('to_code',)),
+    ('fastsign(x)',          'fastsign(x)',           ('fastsign',)),
+]
+# Bulk configurations: (name, statement for a batch 'x' of values, required names)
+WORKLOAD_BULK = [
+    ('sign_many(b, if_exc=...)',            'sign_many(x, if_exc=(-2,))',            ('sign_many',)),
+    ('sign_many(b, fast=True, if_exc=...)', 'sign_many(x, fast=True, if_exc=(-2,))', ('sign_many',)),
+    ('sign_many(b, 2, as_array=True)',      'sign_many(x, 2, as_array=True)',        ('sign_many',)),
+    ('sign_counts(b)',                      'sign_counts(x)',                        ('sign_counts',)),
+]
+
+# Invalid items raise in some configurations: the raise is part of the workload
+LOOP = """def loop(items):
+    for x, o in items:
+        try:
+            {stmt}
+        except (TypeError, ValueError):
+            pass
+"""
+LATENCY = """def latency(items, out):
+    for x, o in items:
+        t = ns()
+        try:
+            {stmt}
+        except (TypeError, ValueError):
+            pass
+        out.append(ns() - t)
+"""
+
+def corpus_load(path):
+    """Records of a JSON Lines corpus"""
+    records = []
+    with open(path, encoding='utf-8') as f:
+        for line_no, line in enumerate(f, 1):
+            if not line.strip():
+                continue
+            rec = json.loads(line)
+            if rec[0] not in DECODERS:
+                raise ValueError(f'{path}:{line_no}: unknown type {rec[0]!r}')
+            records.append(rec)
+    return records
+
+def corpus_generate(mix, error_rate, size, seed):
+    """'size' records: valid types drawn by the weights of 'mix', invalid ones with probability 'error_rate'"""
+    r = random.Random(seed)
+    names, weights = zip(*mix.items())
+    records = []
+    for _ in range(size):
+        if r.random() < error_rate:
+            records.append(list(r.choice(INVALID_GENERATORS)(r)))
+        else:
+            records.append(list(GENERATORS[r.choices(names, weights)[0]](r)))
+    return records
+
+def parse_mix(text):
+    mix = {}
+    for part in text.split(','):
+        name, _, weight = part.partition('=')
+        if name.strip() not in GENERATORS:
+            raise argparse.ArgumentTypeError(f'unknown type {name.strip()!r}; choose from {", ".join(GENERATORS)}')
+        mix[name.strip()] = float(weight or 1)
+    return mix
+
+def percentiles(samples):
+    samples = sorted(samples)
+    at = lambda q: samples[min(len(samples) - 1, int(q * len(samples)))]
+    return {'p50': at(0.5), 'p99': at(0.99), 'p99.9': at(0.999), 'max': samples[-1]}
+
+def workload(args):
+    print(f'*** {set_high_priority()} ***\n')
+    if args.corpus:
+        records = corpus_load(args.corpus)
+        source = {'corpus': args.corpus}
+    else:
+        records = corpus_generate(args.mix, args.error_rate, args.size, args.seed)
+        source = {'mix': args.mix, 'error_rate': args.error_rate, 'size': args.size, 'seed': args.seed}
+    if args.save:
+        with open(args.save, 'w', encoding='utf-8') as f:
+            f.writelines(json.dumps(rec) + '\n' for rec in records)
+        print(f'Corpus saved to {args.save}')
+
+    items = []
+    for rec in records:
+        options = dict(rec[2]) if len(rec) > 2 else {}
+        if 'if_exc' in options:
+            options['if_exc'] = tuple(options['if_exc'])
+        items.append((DECODERS[rec[0]](rec[1]), options))
+    values = [x for x, _ in items]
+    kinds = {}
+    for rec in records:
+        kinds[rec[0]] = kinds.get(rec[0], 0) + 1
+    print(f'{len(items)} items: ' + ', '.join(f'{k} {v / len(items):.1%}' for k, v in sorted(kinds.items())))
+
+    ns = namespace()
+    ns.update(ns=time.perf_counter_ns, sign_many=getattr(signum, 'sign_many', None),
+              sign_counts=getattr(signum, 'sign_counts', None))
+    has_options = any(options for _, options in items)
+
+    # The cost of reading the clock twice is subtracted from the latencies of single calls
+    g = dict(ns)
+    exec(LATENCY.format(stmt='pass'), g)
+    overhead = []
+    g['latency'](items, overhead)
+    overhead = int(statistics.median(overhead))
+    print(f'Timer overhead: {overhead} ns per call (subtracted)\n')
+
+    results = {'environment': environment(), 'source': source, 'items': len(items), 'batch': args.batch,
+               'configs': {}}
+
+    print(f"{'Per item':<38} | {'Mitems/s':>8} | {'p50 ns':>7} | {'p99 ns':>7} | {'p99.9 ns':>8} | {'max ns':>8}")
+    print('-' * 92)
+    for name, stmt, needs in WORKLOAD_ITEMS:
+        if any(ns.get(n) is None for n in needs) or (stmt == 'sign(x, **o)' and not has_options):
+            continue
+        g = dict(ns)
+        exec(LOOP.format(stmt=stmt), g)
+        exec(LATENCY.format(stmt=stmt), g)
+        g['loop'](items) # Warm up
+        times = []
+        for _ in range(args.passes):
+            start = time.perf_counter()
+            g['loop'](items)
+            times.append(time.perf_counter() - start)
+        lat = []
+        g['latency'](items, lat)
+        stats = percentiles([max(0, t - overhead) for t in lat])
+        stats['throughput'] = len(items) / statistics.median(times)
+        results['configs'][name] = stats
+        print(f"{name:<38} | {stats['throughput'] / 1e6:>8.2f} | {stats['p50']:>7} | {stats['p99']:>7} | "
+              f"{stats['p99.9']:>8} | {stats['max']:>8}")
+
+    batches = [values[i:i + args.batch] for i in range(0, len(values), args.batch)]
+    print(f"\n{f'Bulk, batches of {args.batch}':<38} | {'Mitems/s':>8} | {'p50 µs':>7} | {'p99 µs':>7} | "
+          f"{'p99.9 µs':>8} | {'max µs':>8}")
+    print('-' * 92)
+    for name, stmt, needs in WORKLOAD_BULK:
+        if any(ns.get(n) is None for n in needs):
+            continue
+        g = dict(ns)
+        exec(LATENCY.format(stmt=stmt), g)
+        pairs = [(b, None) for b in batches]
+        g['latency'](pairs, []) # Warm up
+        totals, lat = [], []
+        for _ in range(args.passes):
+            lat = []
+            g['latency'](pairs, lat)
+            totals.append(sum(lat))
+        stats = {k: v / 1000 for k, v in percentiles(lat).items()}
+        stats['throughput'] = len(values) / (statistics.median(totals) / 1e9)
+        results['configs'][name] = stats
+        print(f"{name:<38} | {stats['throughput'] / 1e6:>8.2f} | {stats['p50']:>7.1f} | {stats['p99']:>7.1f} | "
+              f"{stats['p99.9']:>8.1f} | {stats['max']:>8.1f}")
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=1)
+        print(f'\nResults saved to {args.output}')
+    print(f"\n{success(len(results['configs']))}")
+    return 0
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Micro-benchmarks of signum with JSON results')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    p_run = commands.add_parser('run', help='time every case')
+    p_run.add_argument('-o', '--output', help='JSON file for the results')
+    p_run.add_argument('--repeat', type=int, default=20, help='recorded samples per case (default: 20)')
+    p_run.add_argument('--warmup', type=int, default=3, help='unrecorded samples per case (default: 3)')
+    p_run.add_argument('--sample-ms', type=float, default=5.0, help='duration of a sample (default: 5 ms)')
+    p_run.add_argument('-k', '--filter', help='run only cases whose name contains this text')
+    p_run.set_defaults(func=run)
+
+    p_cmp = commands.add_parser('compare', help='flag significant changes between two result files')
+    p_cmp.add_argument('old')
+    p_cmp.add_argument('new')
+    p_cmp.add_argument('--threshold', type=float, default=2.0, help='minimal change of the median, %% (default: 2)')
+    p_cmp.add_argument('--alpha', type=float, default=0.01, help='significance level (default: 0.01)')
+    p_cmp.set_defaults(func=compare)
+
+    p_work = commands.add_parser('workload', help='replay a corpus of mixed values: throughput and tail latency')
+    p_work.add_argument('--corpus', help='JSON Lines corpus to replay (default: generate one)')
+    p_work.add_argument('--mix', type=parse_mix, default=parse_mix('int=50,float=30,Decimal=8,Fraction=2,NaN=5,zero=5'),
+                        help=f'weights of the valid types of a generated corpus, from: {", ".join(GENERATORS)} '
+                             '(default: int=50,float=30,Decimal=8,Fraction=2,NaN=5,zero=5)')
+    p_work.add_argument('--error-rate', type=float, default=0.05, help='share of invalid items (default: 0.05)')
+    p_work.add_argument('--size', type=int, default=100_000, help='items of a generated corpus (default: 100000)')
+    p_work.add_argument('--seed', type=int, default=0, help='seed of a generated corpus (default: 0)')
+    p_work.add_argument('--save', help='save the corpus as JSON Lines for replays')
+    p_work.add_argument('--batch', type=int, default=1000, help='items per call of the bulk APIs (default: 1000)')
+    p_work.add_argument('--passes', type=int, default=5, help='timed passes over the corpus (default: 5)')
+    p_work.add_argument('-o', '--output', help='JSON file for the results')
+    p_work.set_defaults(func=workload)
+
+    args = parser.parse_args(argv)
+    if args.command == 'run' and args.repeat < 2:
+        parser.error('--repeat must be at least 2')
+    return args.func(args)
+
+if __name__ == "__main__":
+    # Switch sys.stdout and sys.stderr to 'utf-8' encoding
+    outflows = OutputUTF8()
+    outflows.set_utf8()
+
+    print(f'***** Test: {__file__}')
+    status = main()
+
+    # Restore stdout and stderr
+    outflows.reset_from_utf8()
+    sys.exit(status)
@@ -0,0 +1,63 @@
+from signum import sign_file, __simd__
+from testing import get_passes, set_high_priority, success, OutputUTF8
+
+from array import array
+from math import nan
+import os
+import sys
+import tempfile
+import time
+
+MAX_PASSES = get_passes(__file__)
+
+BLOCK = array('d', [-2.5, 0.0, 7.0, nan, -0.0, 1e300, -1e-300, 4.0]) * (1 << 19) # 32 MiB
+SIZES_MIB = [64, 256, 1024] # Input files; the peak memory must not grow with them
+
+def peak_rss_mib():
+    """Peak resident memory of the process so far, MiB"""
+    try:
+        import resource
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak / (1 << 20) if sys.platform == 'darwin' else peak / 1024
+    except ImportError: # Windows
+        import psutil
+        return psutil.Process().memory_info().peak_wset / (1 << 20)
+
+def write_file(path, mib):
+    with open(path, 'wb') as f:
+        for _ in range(mib // 32):
+            BLOCK.tofile(f)
+
+if __name__ == "__main__":
+    # Switch sys.stdout and sys.stderr to 'utf-8' encoding
+    outflows = OutputUTF8()
+    outflows.set_utf8()
+
+    print(f'***** Test: {__file__}')
+    print(f'MAX_PASSES: {MAX_PASSES}')
+    print(f'*** {set_high_priority()} ***\n')
+
+    print(f"Python {sys.version.split()[0]}, {os.cpu_count() or 1} CPUs, SIMD: {__simd__}")
+    print(f"Peak RSS before: {peak_rss_mib():.0f} MiB (the buffers of this script included)\n")
+    print(f"{'Input':>8} | {'Output':>6} | {'Mitems/s':>9} | {'Peak RSS':>9}")
+    print("-" * 42)
+    counter = 0
+    with tempfile.TemporaryDirectory() as tmp:
+        src, dst = os.path.join(tmp, 'src.f64'), os.path.join(tmp, 'dst.bin')
+        for mib in SIZES_MIB:
+            write_file(src, mib)
+            for packed in (False, True):
+                best = float('inf')
+                for _ in range(max(1, MAX_PASSES // 500)):
+                    start = time.perf_counter()
+                    counts = sign_file(src, 'float64', dst, packed=packed)
+                    best = min(best, time.perf_counter() - start)
+                assert sum(counts) == mib << 17
+                counter += 1
+                print(f"{mib:>4} MiB | {'2-bit' if packed else 'int8':>6} | {sum(counts) / best / 1e6:>9.0f} | "
+                      f"{peak_rss_mib():>5.0f} MiB")
+
+    print(f'\n{success(counter, passes=MAX_PASSES)}')
+
+    # Restore stdout and stderr
+    outflows.reset_from_utf8()
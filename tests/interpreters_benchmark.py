@@ -0,0 +1,96 @@
+from signum import sign
+from testing import get_passes, set_high_priority, success, OutputUTF8
+
+import importlib
+import os
+import sys
+import threading
+import time
+
+MAX_PASSES = get_passes(__file__)
+
+# The work of one interpreter: 'signum' is imported into each of them and has its own module state
+WORKLOAD = f'''
+from signum import sign, sign_many
+from fractions import Fraction
+from math import nan
+data = [-5, 0, 7.5, nan, Fraction(-1, 3), True, 10**30, None, 'x', -0.0] * 10
+for _ in range({MAX_PASSES}):
+    [sign(x, 2, if_exc=(-2,)) for x in data]
+    sign_many(data, 2, if_exc=(-2,))
+'''
+CALLS_PER_RUN = MAX_PASSES * 200
+
+def interpreters_api():
+    """(create, run, close) of the available subinterpreter module, and whether interpreters have their own GIL"""
+    try:
+        from concurrent import interpreters # Python 3.14+
+        return (interpreters.create, lambda interp, code: interp.exec(code), lambda interp: interp.close()), True
+    except ImportError:
+        pass
+    for name, own_gil in (('_interpreters', True), ('_xxsubinterpreters', sys.version_info >= (3, 12))):
+        try:
+            mod = importlib.import_module(name)
+        except ImportError:
+            continue
+        run = getattr(mod, 'run_string', None) or getattr(mod, 'exec')
+        return (mod.create, run, mod.destroy), own_gil
+    return None, False
+
+def throughput(api, n_interp):
+    """Calls per second of 'n_interp' interpreters, each running WORKLOAD in its own thread"""
+    create, run, close = api
+    interps = [create() for _ in range(n_interp)]
+    for interp in interps: # Import and warm up outside the measurement
+        run(interp, 'import signum, fractions')
+
+    barrier = threading.Barrier(n_interp + 1)
+    def worker(interp):
+        barrier.wait()
+        run(interp, WORKLOAD)
+        barrier.wait()
+
+    threads = [threading.Thread(target=worker, args=(interp,)) for interp in interps]
+    for t in threads:
+        t.start()
+    barrier.wait()
+    start = time.perf_counter()
+    barrier.wait()
+    elapsed = time.perf_counter() - start
+    for t in threads:
+        t.join()
+    for interp in interps:
+        close(interp)
+    return n_interp * CALLS_PER_RUN / elapsed
+
+if __name__ == "__main__":
+    # Switch sys.stdout and sys.stderr to 'utf-8' encoding
+    outflows = OutputUTF8()
+    outflows.set_utf8()
+
+    print(f'***** Test: {__file__}')
+    print(f'MAX_PASSES: {MAX_PASSES}')
+    print(f'*** {set_high_priority()} ***\n')
+
+    api, own_gil = interpreters_api()
+    cpus = os.cpu_count() or 1
+    print(f"Python {sys.version.split()[0]}, {cpus} CPUs")
+    if api is None:
+        sys.exit('No subinterpreter support in this Python')
+    if not own_gil:
+        print('Subinterpreters share the GIL before Python 3.12: expect no scaling.')
+
+    print(f"\n{'Interpreters':>12} | {'Mcalls/s':>9} | {'Speedup':>7} | {'Efficiency':>10}")
+    print("-" * 47)
+    counter = 0
+    base = None
+    for n in sorted({1, 2, 4, 8, 16, cpus} & set(range(1, cpus + 1))):
+        rate = throughput(api, n)
+        base = base or rate
+        counter += 1
+        print(f"{n:>12} | {rate / 1e6:>9.2f} | {rate / base:>6.2f}x | {rate / base / n:>9.0%}")
+
+    print(f'\n{success(counter, passes=MAX_PASSES)}')
+
+    # Restore stdout and stderr
+    outflows.reset_from_utf8()
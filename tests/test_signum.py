@@ -1,14 +1,37 @@
-from signum import sign, fastsign
+from signum import sign, fastsign, sign_many, sign_buffer, isign, sign_counts, \
+                   sign_pack, sign_unpack, sign_pack_counts, sign_file, sign_partition, \
+                   sign_select, sign_dispatch, sign_select_many, sign_dispatch_many, register, \
+                   register_zero, register_invalid, deadband, rel_deadband, round_to, sign_text, sign_column, \
+                   stats, profile, profile_table, SignError, Signer
 
 from testing import EPS, PIRATES, n_extract, c_prep, \
                     MyNumber, ExplodingNumber, NotImplementedNumber, trace, success, OutputUTF8
 
 from decimal import Decimal
 from fractions import Fraction
+from datetime import timedelta
 from math import nan, isnan, inf
+from array import array
+from itertools import count, islice
 import sympy
+import io
+import os
+import pickle
+import signum as signum_module
+import subprocess
+import sys
+import tempfile
+import threading
 import unittest
 
+try:
+    import _interpreters as subinterpreters # Python 3.13+
+except ImportError:
+    try:
+        import _xxsubinterpreters as subinterpreters
+    except ImportError:
+        subinterpreters = None
+
 class TestSignum(unittest.TestCase):
 
     def test_sign(self):
@@ -503,6 +526,1153 @@ class TestSignum(unittest.TestCase):
         self.buffer.append(f'\n{success(counter, s_cnt=s_cnt)}\n')
         print('\n'.join(self.buffer), flush=True)
 
+    def test_sign_many(self):
+        self.buffer = []
+        s_cnt = 0
+        counter = 0
+        data = [-5, 0, 5.0, nan, 'error', Fraction(-1, 2), Decimal('NaN'), None]
+
+        # --- list, tuple, iterator and generator give the same results as sign
+        s_cnt += 1; prev_counter = counter
+        for src in (data, tuple(data), iter(data), (x for x in data), range(-3, 3)):
+            expected = [sign(x, 2) for x in (src if isinstance(src, range) else data)]
+            self.assertEqual(sign_many(src, 2), expected); counter += 1
+        self.buffer.append(trace(prev_counter, counter, s_cnt, what="sign_many: sequences and iterables"))
+
+        # --- results as objects, options
+        s_cnt += 1; prev_counter = counter
+        res = sign_many(data[:4])
+        self.assertEqual(res[:3], [-1, 0, 1]); counter += 1
+        self.assertTrue(isnan(res[3])); counter += 1
+        self.assertEqual(repr(sign_many(data, if_exc=(None,))[4:]), '[None, -1, nan, None]'); counter += 1
+        self.assertEqual(sign_many(['5.0', -1], preprocess=lambda a: (float(a),)), [1, -1]); counter += 1
+        self.assertEqual(sign_many([-1e-18, 3], 2, preprocess=lambda a: (0 if abs(a) < EPS else a,)), [2, 3]); counter += 1
+        self.assertEqual(sign_many([5, -5], preprocess=lambda a: (a, 'early') if a > 0 else None), ['early', -1]); counter += 1
+        self.assertEqual(sign_many([]), []); counter += 1
+        self.buffer.append(trace(prev_counter, counter, s_cnt, what="sign_many: options"))
+
+        # --- fastsign mode
+        s_cnt += 1; prev_counter = counter
+        self.assertEqual(sign_many(data[:3], fast=True), [fastsign(x) for x in data[:3]]); counter += 1
+        self.assertEqual(sign_many([NotImplementedNumber(-3.14)], 2, fast=True), [1]); counter += 1
+        self.assertEqual(sign_many(['5.0', None], 2, fast=True), [0, 0]); counter += 1
+        with self.assertRaisesRegex(TypeError, r"signum\.fastsign\(\): cannot compare or check for NaN"):
+            sign_many([1, '5.0'], fast=True)
+        counter += 1
+        self.buffer.append(trace(prev_counter, counter, s_cnt, what="sign_many: fastsign mode"))
+
+        # --- compact results as array('b')
+        s_cnt += 1; prev_counter = counter
+        self.assertEqual(sign_many(data, as_array=True), array('b', [-1, 0, 1, 2, -2, -1, 2, -2])); counter += 1
+        self.assertEqual(sign_many(iter(data), 2, as_array=True), array('b', [sign(x, 2) for x in data])); counter += 1
+        self.assertEqual(sign_many(range(1000), as_array=True), array('b', [0] + [1] * 999)); counter += 1
+        self.assertEqual(sign_many(['error'], if_exc=(-7,), as_array=True), array('b', [-7])); counter += 1
+        with self.assertRaises(OverflowError):
+            sign_many([1], 126, as_array=True)
+        counter += 1
+        with self.assertRaises(OverflowError):
+            sign_many(['error'], if_exc=(1000,), as_array=True)
+        counter += 1
+        self.buffer.append(trace(prev_counter, counter, s_cnt, what="sign_many: array('b')"))
+
+        # --- errors
+        s_cnt += 1; prev_counter = counter
+        with self.assertRaisesRegex(TypeError, r"signum\.sign: invalid argument `'error'`"):
+            sign_many([1, 'error'])
+        counter += 1
+        with self.assertRaisesRegex(TypeError, r"not iterable"):
+            sign_many(5)
+        counter += 1
+        with self.assertRaisesRegex(TypeError, r"signum\.sign_many\(\) takes 1 or 2 positional arguments, got 3"):
+            sign_many([1], 2, 3)
+        counter += 1
+        with self.assertRaisesRegex(TypeError, r"signum\.sign_many\(\) got an unexpected keyword argument 'code_shift'"):
+            sign_many([1], code_shift=2)
+        counter += 1
+        self.buffer.append(trace(prev_counter, counter, s_cnt, what="sign_many: errors"))
+
+        self.buffer.append(f'\n{success(counter, s_cnt=s_cnt)}\n')
+        print('\n'.join(self.buffer), flush=True)
+
+    def test_sign_buffer(self):
+        self.buffer = []
+        s_cnt = 0
+        counter = 0
+        values = [-5.0, -1.0, float('-0.0'), 0.0, 1.0, 5.0, -inf, inf, nan, float('-nan')]
+        codes = array('b', [sign(x, 0) for x in values])
+
+        # --- float64 and int64 buffers, codeshift
+        s_cnt += 1; prev_counter = counter
+        self.assertEqual(sign_buffer(array('d', values)), codes); counter += 1
+        self.assertEqual(sign_buffer(memoryview(array('d', values))), codes); counter += 1
+        self.assertEqual(sign_buffer(array('d', values), None, 2), array('b', [sign(x, 2) for x in values])); counter += 1
+        ints = [-2**63, -5, -1, 0, 1, 5, 2**63 - 1]
+        self.assertEqual(sign_buffer(array('q', ints)), array('b', [sign(x) for x in ints])); counter += 1
+        self.assertEqual(sign_buffer(array('Q', [0, 1, 2**64 - 1])), array('b', [0, 1, 1])); counter += 1
+        self.assertEqual(sign_buffer(array('d')), array('b')); counter += 1
+        self.buffer.append(trace(prev_counter, counter, s_cnt, what="sign_buffer: float64 and int64"))
+
+        # --- caller-supplied output, in place
+        s_cnt += 1; prev_counter = counter
+        out = array('b', bytes(len(values)))
+        self.assertIs(sign_buffer(array('d', values), out), out); counter += 1
+        self.assertEqual(out, codes); counter += 1
+        src = array('d', values)
+        in_place = memoryview(src).cast('B').cast('b')[:len(values)]
+        sign_buffer(src, out=in_place)
+        self.assertEqual(in_place.tolist(), codes.tolist()); counter += 1
+        self.buffer.append(trace(prev_counter, counter, s_cnt, what="sign_buffer: output buffer"))
+
+        # --- native threads: large buffers, the same codes for any number of threads
+        s_cnt += 1; prev_counter = counter
+        big = array('d', values) * 200_001
+        big_codes = codes * 200_001
+        for threads in (None, 1, 2, 3, 64):
+            self.assertEqual(sign_buffer(big, threads=threads), big_codes); counter += 1
+        out = array('b', bytes(len(big)))
+        self.assertIs(sign_buffer(big, out, threads=4), out); counter += 1
+        self.assertEqual(out, big_codes); counter += 1
+        in_place = memoryview(big).cast('B').cast('b')[:len(big)] # Overlapping output: one thread
+        sign_buffer(big, in_place, threads=4)
+        self.assertEqual(in_place.tobytes(), big_codes.tobytes()); counter += 1
+        ints = array('q', range(-1_000_000, 1_000_001))
+        self.assertEqual(sign_buffer(ints, None, 1, threads=3), array('b', [0] * 1_000_000 + [1] + [2] * 1_000_000))
+        counter += 1
+        self.buffer.append(trace(prev_counter, counter, s_cnt, what="sign_buffer: native threads"))
+
+        # --- errors
+        s_cnt += 1; prev_counter = counter
+        with self.assertRaisesRegex(TypeError, r"signum\.sign_buffer\(\): unsupported buffer format 'f'"):
+            sign_buffer(array('f', [1.0]))
+        counter += 1
+        with self.assertRaisesRegex(TypeError, r"signum\.sign_buffer\(\): 'out' must be an int8 buffer"):
+            sign_buffer(array('d', [1.0]), bytearray(1))
+        counter += 1
+        with self.assertRaisesRegex(ValueError, r"signum\.sign_buffer\(\): 'out' has 2 items, 1 expected"):
+            sign_buffer(array('d', [1.0]), array('b', [0, 0]))
+        counter += 1
+        with self.assertRaises(BufferError):
+            sign_buffer(memoryview(array('d', values))[::2])
+        counter += 1
+        with self.assertRaises(OverflowError):
+            sign_buffer(array('d', values), None, 126)
+        counter += 1
+        with self.assertRaisesRegex(ValueError, r"signum\.sign_buffer\(\): 'threads' must be None or a positive int"):
+            sign_buffer(array('d', values), threads=0)
+        counter += 1
+        with self.assertRaises(TypeError):
+            sign_buffer(array('d', values), threads=2.0)
+        counter += 1
+        self.buffer.append(trace(prev_counter, counter, s_cnt, what="sign_buffer: errors"))
+
+        self.buffer.append(f'\n{success(counter, s_cnt=s_cnt)}\n')
+        print('\n'.join(self.buffer), flush=True)
+
+    def test_isign(self):
+        self.buffer = []
+        s_cnt = 0
+        counter = 0
+        data = [-5, 0, 5.0, nan, 'error', Fraction(-1, 2), Decimal('NaN'), None]
+
+        # --- single results
+        s_cnt += 1; prev_counter = counter
+        self.assertEqual(list(isign(data, 2)), [sign(x, 2) for x in data]); counter += 1
+        self.assertEqual(repr(list(isign(data, if_exc=(None,)))), repr([sign(x, if_exc=(None,)) for x in data])); counter += 1
+        self.assertEqual(list(islice(isign(count(-2)), 5)), [-1, -1, 0, 1, 1]); counter += 1
+        self.assertEqual(list(isign(['5.0', -1], preprocess=lambda a: (float(a),))), [1, -1]); counter += 1
+        self.assertEqual(list(isign([NotImplementedNumber(-3.14)], fast=True)), [-1]); counter += 1
+        self.assertEqual(list(isign([])), []); counter += 1
+        it = isign(data[:1])
+        self.assertIs(iter(it), it); counter += 1
+        self.buffer.append(trace(prev_counter, counter, s_cnt, what="isign: single results"))
+
+        # --- batches of codes
+        s_cnt += 1; prev_counter = counter
+        self.assertEqual(list(isign(range(-3, 4), batch=3)),
+                         [array('b', [-1, -1, -1]), array('b', [0, 1, 1]), array('b', [1])]); counter += 1
+        self.assertEqual(list(isign(iter(data), 2, batch=100)), [array('b', [sign(x, 2) for x in data])]); counter += 1
+        self.assertEqual(list(isign(['error'], batch=1, if_exc=(-7,))), [array('b', [-7])]); counter += 1
+        self.buffer.append(trace(prev_counter, counter, s_cnt, what="isign: batches"))
+
+        # --- errors
+        s_cnt += 1; prev_counter = counter
+        it = isign([1, 'error'])
+        self.assertEqual(next(it), 1); counter += 1
+        with self.assertRaisesRegex(TypeError, r"signum\.sign: invalid argument `'error'`"):
+            next(it)
+        counter += 1
+        with self.assertRaisesRegex(ValueError, r"signum\.isign\(\): batch must be positive, got 0"):
+            isign(data, batch=0)
+        counter += 1
+        with self.assertRaisesRegex(TypeError, r"not iterable"):
+            isign(5)
+        counter += 1
+        with self.assertRaisesRegex(TypeError, r"cannot create 'signum\.SignIterator' instances"):
+            type(isign(data))()
+        counter += 1
+        self.buffer.append(trace(prev_counter, counter, s_cnt, what="isign: errors"))
+
+        self.buffer.append(f'\n{success(counter, s_cnt=s_cnt)}\n')
+        print('\n'.join(self.buffer), flush=True)
+
+    def test_sign_counts(self):
+        self.buffer = []
+        s_cnt = 0
+        counter = 0
+        data = [-5, 0, 5.0, nan, 'error', Fraction(-1, 2), Decimal('NaN'), None, MyNumber(3)]
+        values = [-5.0, -1.0, float('-0.0'), 0.0, 1.0, 5.0, -inf, inf, nan]
+
+        # --- iterables and buffers
+        s_cnt += 1; prev_counter = counter
+        expected = [0] * 5
+        for x in data:
+            expected[sign(x, 2)] += 1
+        self.assertEqual(sign_counts(data), tuple(expected)); counter += 1
+        self.assertEqual(sign_counts(iter(data)), tuple(expected)); counter += 1
+        self.assertEqual(sign_counts(array('d', values)), (0, 3, 2, 3, 1)); counter += 1
+        self.assertEqual(sign_counts(array('q', [-3, 0, 0, 7])), (0, 1, 2, 1, 0)); counter += 1
+        self.assertEqual(sign_counts(array('f', values)), (0, 3, 2, 3, 1)); counter += 1
+        self.assertEqual(sign_counts(memoryview(array('d', values))[::2]), (0, 2, 1, 1, 1)); counter += 1
+        self.assertEqual(sign_counts([]), (0, 0, 0, 0, 0)); counter += 1
+        self.assertEqual(sign_counts([NotImplementedNumber(-3.14), '5.0'], fast=True), (1, 1, 0, 0, 0)); counter += 1
+        self.buffer.append(trace(prev_counter, counter, s_cnt, what="sign_counts: iterables and buffers"))
+
+        # --- weights
+        s_cnt += 1; prev_counter = counter
+        w = array('d', [1, 2, 4, 8, 16, 32, 64, 128, 256])
+        self.assertEqual(sign_counts(array('d', values), w), ((0, 3, 2, 3, 1), -1 - 2 + 16 + 32 - 64 + 128)); counter += 1
+        self.assertEqual(sign_counts(values, weights=w), ((0, 3, 2, 3, 1), 109.0)); counter += 1
+        self.assertEqual(sign_counts(['error', -1, 2], array('q', [5, 3, 4])), ((1, 1, 0, 1, 0), 1.0)); counter += 1
+        with self.assertRaisesRegex(ValueError, r"signum\.sign_counts\(\): 9 weights for 2 items"):
+            sign_counts([1, 2], w)
+        counter += 1
+        with self.assertRaisesRegex(ValueError, r"signum\.sign_counts\(\): 1 weights for 9 items"):
+            sign_counts(array('d', values), array('d', [1]))
+        counter += 1
+        self.buffer.append(trace(prev_counter, counter, s_cnt, what="sign_counts: weights"))
+
+        # --- native threads: deterministic counts and weighted sums
+        s_cnt += 1; prev_counter = counter
+        big = array('d', values) * 300_001
+        big_w = array('d', [0.1, 0.7, 1e-3, 3.0, 1e10, 0.3, 2.5, 1e-9, 7.0]) * 300_001
+        expected = sign_counts(big, big_w, threads=1)
+        self.assertEqual(expected[0], (0, 900_003, 600_002, 900_003, 300_001)); counter += 1
+        self.assertAlmostEqual(expected[1], 300_001 * (-0.1 - 0.7 + 1e10 + 0.3 - 2.5 + 1e-9), delta=1e6); counter += 1
+        for threads in (None, 2, 3, 5, 64):
+            self.assertEqual(sign_counts(big, big_w, threads=threads), expected); counter += 1
+        self.assertEqual(sign_counts(big, threads=4), expected[0]); counter += 1
+        self.assertEqual(sign_counts(iter(values), threads=4), (0, 3, 2, 3, 1)); counter += 1 # Ignored for iterables
+        with self.assertRaisesRegex(ValueError, r"signum\.sign_counts\(\): 'threads' must be None or a positive int"):
+            sign_counts(big, threads=-2)
+        counter += 1
+        self.buffer.append(trace(prev_counter, counter, s_cnt, what="sign_counts: native threads"))
+
+        self.buffer.append(f'\n{success(counter, s_cnt=s_cnt)}\n')
+        print('\n'.join(self.buffer), flush=True)
+
+    def test_simd(self):
+        self.buffer = []
+        s_cnt = 0
+        counter = 0
+        levels = ['scalar', 'sse2', 'avx2', 'avx512']
+        # Every length up to a few vector groups, special values, and a shift that wraps around int8
+        script = '''if True:
+            from signum import sign, sign_buffer, sign_counts, __simd__
+            from array import array
+            import struct
+            special = [0.0, -0.0, 1.0, -1.0, float('inf'), float('-inf'), float('nan'), -float('nan'), 5e-324,
+                       -5e-324, 1.7e308, struct.unpack('d', struct.pack('Q', 0x7ff0000000000001))[0]]
+            results = [__simd__]
+            for n in list(range(100)) + [1000, 70001]:
+                d = array('d', [special[(i * 7 + n) % len(special)] for i in range(n)])
+                w = array('d', [(i % 13 - 6) * 0.1 for i in range(n)])
+                assert sign_buffer(d).tolist() == [sign(x, 0) for x in d]
+                in_place = array('d', d)
+                sign_buffer(in_place, memoryview(in_place).cast('B').cast('b')[:n])
+                results.append((sign_buffer(d).tobytes(), sign_buffer(d, None, -126).tobytes(),
+                                bytes(memoryview(in_place).cast('B')[:n]), sign_counts(d), sign_counts(d, w)))
+            print(repr(results))
+        '''
+
+        # --- the same codes, counts, and weighted sums for every instruction set
+        s_cnt += 1; prev_counter = counter
+        self.assertIn(signum_module.__simd__, levels); counter += 1
+        reference = None
+        for level in levels[:levels.index(signum_module.__simd__) + 1]:
+            env = dict(os.environ, SIGNUM_SIMD=level,
+                       PYTHONPATH=os.pathsep.join([os.path.dirname(signum_module.__file__), os.environ.get('PYTHONPATH', '')]))
+            output = subprocess.run([sys.executable, '-c', script], env=env, capture_output=True, text=True, check=True)
+            results = eval(output.stdout)
+            self.assertEqual(results[0], level); counter += 1
+            reference = reference or results[1:]
+            self.assertEqual(results[1:], reference); counter += 1
+        self.buffer.append(trace(prev_counter, counter, s_cnt, what="SIMD levels"))
+
+        self.buffer.append(f'\n{success(counter, s_cnt=s_cnt)}\n')
+        print('\n'.join(self.buffer), flush=True)
+
+    def test_sign_pack(self):
+        self.buffer = []
+        s_cnt = 0
+        counter = 0
+        data = [-5, 0, 5.0, nan, 'error', Fraction(-1, 2), Decimal('NaN'), None, MyNumber(3)]
+        values = [-5.0, -1.0, float('-0.0'), 0.0, 1.0, 5.0, -inf, inf, nan] * 3
+
+        # --- layout
+        s_cnt += 1; prev_counter = counter
+        packed, n, invalid = sign_pack(data)
+        self.assertEqual((packed, n, invalid), (b'\x93\xae\x01', 9, array('q', [4, 7]))); counter += 1
+        self.assertEqual(sign_pack([]), (b'', 0, array('q'))); counter += 1
+        self.assertEqual(sign_pack(array('d', values))[0], sign_pack(values)[0]); counter += 1
+        self.assertEqual(sign_pack(array('q', [1, -1, 0]))[:2], (b'\x0d', 3)); counter += 1
+        self.assertEqual(sign_pack([NotImplementedNumber(-3.14)], fast=True)[0], b'\x03'); counter += 1
+        self.buffer.append(trace(prev_counter, counter, s_cnt, what="sign_pack: layout"))
+
+        # --- round trips and counts
+        s_cnt += 1; prev_counter = counter
+        self.assertEqual(sign_unpack(*sign_pack(data)), sign_many(data, as_array=True)); counter += 1
+        self.assertEqual(sign_unpack(*sign_pack(array('d', values))), sign_buffer(array('d', values))); counter += 1
+        self.assertEqual(sign_pack_counts(*sign_pack(data)), sign_counts(data)); counter += 1
+        self.assertEqual(sign_pack_counts(*sign_pack(array('d', values))), sign_counts(values)); counter += 1
+        self.assertEqual(sign_pack_counts(b'\xff\xff', 5), (0, 5, 0, 0, 0)); counter += 1
+        self.assertEqual(sign_unpack(b'\x02', 1), array('b', [2])); counter += 1
+        self.assertEqual(sign_unpack(b'\x02', 1, invalid=[0]), array('b', [-2])); counter += 1
+        self.buffer.append(trace(prev_counter, counter, s_cnt, what="sign_pack: round trips and counts"))
+
+        # --- errors
+        s_cnt += 1; prev_counter = counter
+        with self.assertRaisesRegex(ValueError, r"signum\.sign_unpack\(\): 1 bytes cannot hold 5 packed items"):
+            sign_unpack(b'\x00', 5)
+        counter += 1
+        with self.assertRaisesRegex(ValueError, r"signum\.sign_unpack\(\): invalid index 0 is not an escaped item"):
+            sign_unpack(b'\x00', 1, [0])
+        counter += 1
+        with self.assertRaisesRegex(ValueError, r"signum\.sign_pack_counts\(\): 2 invalid indices for 1 escaped items"):
+            sign_pack_counts(b'\x02', 1, [0, 0])
+        counter += 1
+        self.buffer.append(trace(prev_counter, counter, s_cnt, what="sign_pack: errors"))
+
+        self.buffer.append(f'\n{success(counter, s_cnt=s_cnt)}\n')
+        print('\n'.join(self.buffer), flush=True)
+
+    def test_sign_file(self):
+        self.buffer = []
+        s_cnt = 0
+        counter = 0
+        values = [-1.5, 0.0, 2.0, nan, -0.0, inf, -inf, 5e-324, 1e300]
+        data = array('d', [values[i % 9] * (1 + i % 4) for i in range(200_003)]) # Several chunks of 65536
+        ints = array('q', [-2**63, -1, 0, 1, 2**63 - 1] * 7)
+
+        with tempfile.TemporaryDirectory() as tmp:
+            def path(name, arr=None):
+                p = os.path.join(tmp, name)
+                if arr is not None:
+                    with open(p, 'wb') as f:
+                        arr.tofile(f)
+                return p
+            def read(p):
+                with open(p, 'rb') as f:
+                    return f.read()
+            src, out = path('src.f64', data), path('out.i8')
+
+            # --- codes, packed codes, and counts
+            s_cnt += 1; prev_counter = counter
+            calls = []
+            counts = sign_file(src, 'float64', out, chunk=70_000, progress=lambda done, n: calls.append((done, n)))
+            self.assertEqual(counts, sign_counts(data)); counter += 1
+            self.assertEqual(read(out), sign_buffer(data).tobytes()); counter += 1
+            self.assertEqual(calls, [(65536, 200_003), (131072, 200_003), (196608, 200_003), (200_003, 200_003)])
+            counter += 1
+            self.assertEqual(sign_file(src, '<f8', out, packed=True), counts); counter += 1
+            self.assertEqual(read(out), sign_pack(data)[0]); counter += 1 # Shrunk to the packed size
+            self.assertEqual(sign_file(src, 'd', threads=2), counts); counter += 1 # Counts only
+            self.assertEqual(sign_file(path('src.i64', ints), 'int64', out), sign_counts(ints)); counter += 1
+            self.assertEqual(read(out), sign_buffer(ints).tobytes()); counter += 1
+            self.assertEqual(sign_file(path('src.i64'), 'uint64', out), (0, 0, 7, 28, 0)); counter += 1
+            swapped = array('d', data)
+            swapped.byteswap()
+            self.assertEqual(sign_file(path('src.be', swapped), '>f8', out), counts); counter += 1
+            self.assertEqual(read(out), sign_buffer(data).tobytes()); counter += 1
+            self.assertEqual(sign_file(path('empty', array('d')), 'f8', out), (0, 0, 0, 0, 0)); counter += 1
+            self.assertEqual(read(out), b''); counter += 1
+            self.buffer.append(trace(prev_counter, counter, s_cnt, what="sign_file: codes and counts"))
+
+            # --- errors
+            s_cnt += 1; prev_counter = counter
+            def stop(done, n): raise KeyboardInterrupt
+            with self.assertRaises(KeyboardInterrupt):
+                sign_file(src, 'f8', out, progress=stop)
+            counter += 1
+            with open(path('odd'), 'wb') as f:
+                f.write(b'1234567')
+            for args, kwargs, exc in [((src, 'float32'), {}, ValueError),
+                                      ((path('odd'), 'f8'), {}, ValueError),
+                                      ((path('missing'), 'f8'), {}, FileNotFoundError),
+                                      ((src, 'f8', src), {}, ValueError),
+                                      ((src, 'f8'), {'chunk': 0}, ValueError),
+                                      ((src, 'f8'), {'progress': 1}, TypeError),
+                                      ((src,), {}, TypeError)]:
+                with self.assertRaises(exc):
+                    sign_file(*args, **kwargs)
+                counter += 1
+            self.assertEqual(sign_file(src, 'f8'), counts); counter += 1 # Not truncated by 'src == dst'
+            self.buffer.append(trace(prev_counter, counter, s_cnt, what="sign_file: errors"))
+
+        self.buffer.append(f'\n{success(counter, s_cnt=s_cnt)}\n')
+        print('\n'.join(self.buffer), flush=True)
+
+    def test_sign_partition(self):
+        self.buffer = []
+        s_cnt = 0
+        counter = 0
+        data = [-5, 0, 5.0, nan, 'error', Fraction(-1, 2), Decimal('NaN'), None, MyNumber(3)]
+
+        # --- index arrays
+        s_cnt += 1; prev_counter = counter
+        groups = sign_partition(data)
+        self.assertEqual(groups, (array('q', [4, 7]), array('q', [0, 5]), array('q', [1]),
+                                  array('q', [2, 8]), array('q', [3, 6]))); counter += 1
+        self.assertTrue(all(sign(data[i], 2) == c for c, g in enumerate(groups) for i in g)); counter += 1
+        self.assertEqual(sign_partition(iter(data)), groups); counter += 1
+        self.assertEqual(sign_partition(array('d', [3.0, -1.0, nan, 0.0])),
+                         (array('q'), array('q', [1]), array('q', [3]), array('q', [0]), array('q', [2]))); counter += 1
+        self.assertEqual(sign_partition(['5.0', NotImplementedNumber(-3.14)], fast=True)[:2],
+                         (array('q', [0]), array('q', [1]))); counter += 1
+        self.assertEqual(sign_partition([]), (array('q'),) * 5); counter += 1
+        self.buffer.append(trace(prev_counter, counter, s_cnt, what="sign_partition: index arrays"))
+
+        # --- stable in-place regrouping
+        s_cnt += 1; prev_counter = counter
+        items = [3, -1, 'a', 0, -2, 7, None, 0.0]
+        self.assertEqual(sign_partition(items, reorder=True), (2, 2, 2, 2, 0)); counter += 1
+        self.assertEqual(items, ['a', None, -1, -2, 0, 0.0, 3, 7]); counter += 1
+        with self.assertRaisesRegex(TypeError, r"signum\.sign_partition\(\): reorder=True requires a list, not 'tuple'"):
+            sign_partition((1, 2), reorder=True)
+        counter += 1
+        self.buffer.append(trace(prev_counter, counter, s_cnt, what="sign_partition: reorder"))
+
+        self.buffer.append(f'\n{success(counter, s_cnt=s_cnt)}\n')
+        print('\n'.join(self.buffer), flush=True)
+
+    def test_sign_dispatch(self):
+        self.buffer = []
+        s_cnt = 0
+        counter = 0
+        data = [-5, 0, 5.0, nan, 'error', Fraction(-1, 2), Decimal('NaN'), None, MyNumber(3)]
+        choices = ('error', 'negative', 'zero', 'positive', 'nan')
+        handlers = [lambda x: ('error', x), lambda x: -x, lambda x: 0, lambda x: x, lambda x: 'nan']
+
+        # --- sign_select and sign_dispatch
+        s_cnt += 1; prev_counter = counter
+        for x in data:
+            self.assertEqual(sign_select(x, choices), choices[sign(x, 2)]); counter += 1
+        self.assertEqual(sign_dispatch(-5, handlers), 5); counter += 1
+        self.assertEqual(sign_dispatch('error', handlers), ('error', 'error')); counter += 1
+        self.assertEqual(sign_dispatch(nan, handlers), 'nan'); counter += 1
+        self.assertEqual(sign_select(NotImplementedNumber(-3.14), choices, fast=True), 'negative'); counter += 1
+        self.buffer.append(trace(prev_counter, counter, s_cnt, what="sign_select and sign_dispatch"))
+
+        # --- bulk variants
+        s_cnt += 1; prev_counter = counter
+        self.assertEqual(sign_select_many(data, list(choices)), [choices[sign(x, 2)] for x in data]); counter += 1
+        self.assertEqual(sign_select_many(iter(data), choices), [choices[sign(x, 2)] for x in data]); counter += 1
+        self.assertEqual(sign_dispatch_many((x for x in [-3, 0, 'a']), handlers), [3, 0, ('error', 'a')]); counter += 1
+        self.assertEqual(sign_dispatch_many([], handlers), []); counter += 1
+        self.buffer.append(trace(prev_counter, counter, s_cnt, what="sign_select_many and sign_dispatch_many"))
+
+        # --- errors
+        s_cnt += 1; prev_counter = counter
+        with self.assertRaisesRegex(ValueError, r"signum\.sign_select\(\): the 2nd argument must have 5 items, got 2"):
+            sign_select(1, [1, 2])
+        counter += 1
+        with self.assertRaisesRegex(TypeError, r"the 2nd argument must be a sequence of 5 items"):
+            sign_dispatch(1, None)
+        counter += 1
+        with self.assertRaisesRegex(RuntimeError, r"Boom!"):
+            sign_dispatch_many([1], [None, None, None, ExplodingNumber(0).__gt__, None])
+        counter += 1
+        self.buffer.append(trace(prev_counter, counter, s_cnt, what="dispatch errors"))
+
+        self.buffer.append(f'\n{success(counter, s_cnt=s_cnt)}\n')
+        print('\n'.join(self.buffer), flush=True)
+
+    def test_exact_types(self):
+        self.buffer = []
+        s_cnt = 0
+        counter = 0
+
+        class SubInt(int): pass
+        class SubFloat(float): pass
+        class SubFraction(Fraction): pass
+        class SubDecimal(Decimal): pass
+
+        # --- fast paths agree with the Triple Check on subclasses
+        s_cnt += 1; prev_counter = counter
+        for cls, values in ((SubInt, [-7, 0, 7, 10**100, -10**100]),
+                            (SubFloat, [-2.5, -0.0, 0.0, 2.5, inf, -inf, nan]),
+                            (SubFraction, [Fraction(-1, 3), Fraction(0), Fraction(1, 1 << 200)]),
+                            (SubDecimal, [Decimal('-1.5'), Decimal('-0'), Decimal(0), Decimal('1E-999'), Decimal('Infinity'),
+                                          Decimal('NaN'), Decimal('-NaN')])):
+            for x in values:
+                self.assertEqual(repr(sign(x)), repr(sign(cls(x)))); counter += 1
+                self.assertEqual(sign(x, 2), sign(cls(x), 2)); counter += 1
+                self.assertEqual(repr(fastsign(x)), repr(fastsign(cls(x)))); counter += 1
+        self.buffer.append(trace(prev_counter, counter, s_cnt, what="exact types vs subclasses"))
+
+        # --- bool and special values
+        s_cnt += 1; prev_counter = counter
+        self.assertEqual(sign(True), 1); counter += 1
+        self.assertEqual(sign(False), 0); counter += 1
+        self.assertEqual(fastsign(True), 1); counter += 1
+        self.assertEqual(sign(Fraction(0), 2), 2); counter += 1
+        self.assertEqual(sign(Decimal('-NaN'), 2), 4); counter += 1
+        self.assertEqual(sign(Decimal('sNaN'), 2), 0); counter += 1   # Signaling NaN cannot be compared
+        self.buffer.append(trace(prev_counter, counter, s_cnt, what="bool and special values"))
+
+        self.buffer.append(f'\n{success(counter, s_cnt=s_cnt)}\n')
+        print('\n'.join(self.buffer), flush=True)
+
+    def test_strategy_cache(self):
+        self.buffer = []
+        s_cnt = 0
+        counter = 0
+
+        class Bare:
+            def __init__(self, v): self.v = v
+
+        # --- invalid types keep their messages
+        s_cnt += 1; prev_counter = counter
+        for _ in range(2): # The second pass uses the cache
+            for x, name in (('a', 'str'), (None, 'NoneType'), (1j, 'complex'), (Bare(1), 'Bare')):
+                with self.assertRaisesRegex(TypeError,
+                                            rf"Cause: '<' not supported between instances of '{name}' and 'int'"):
+                    sign(x)
+                counter += 1
+            with self.assertRaisesRegex(TypeError, r"must be real number, not NoneType"):
+                fastsign(None)
+            counter += 1
+        self.buffer.append(trace(prev_counter, counter, s_cnt, what="cached invalid types"))
+
+        # --- a modified type is probed again
+        s_cnt += 1; prev_counter = counter
+        self.assertEqual(sign(Bare(1), 2), 0); counter += 1
+        Bare.__gt__ = lambda self, other: self.v > other
+        Bare.__lt__ = lambda self, other: self.v < other
+        Bare.__eq__ = lambda self, other: self.v == other
+        self.assertEqual(sign(Bare(-5)), -1); counter += 1
+        self.assertEqual(fastsign(Bare(5)), 1); counter += 1
+        del Bare.__gt__, Bare.__lt__, Bare.__eq__
+        self.assertEqual(sign(Bare(1), 2), 0); counter += 1
+        Bare.__float__ = lambda self: nan
+        self.assertTrue(isnan(sign(Bare(1)))); counter += 1
+        self.buffer.append(trace(prev_counter, counter, s_cnt, what="invalidation"))
+
+        # --- more types than cache entries
+        s_cnt += 1; prev_counter = counter
+        classes = [type(f'Num{i}', (MyNumber,), {}) for i in range(20)]
+        for _ in range(3):
+            for i, cls in enumerate(classes):
+                self.assertEqual(sign(cls(i - 10)), (i > 10) - (i < 10)); counter += 1
+                self.assertEqual(sign('a', 2), 0); counter += 1
+        self.buffer.append(trace(prev_counter, counter, s_cnt, what="eviction"))
+
+        self.buffer.append(f'\n{success(counter, s_cnt=s_cnt)}\n')
+        print('\n'.join(self.buffer), flush=True)
+
+    def test_register(self):
+        self.buffer = []
+        s_cnt = 0
+        counter = 0
+
+        class Money:
+            def __init__(self, cents): self.cents = cents
+        class Euro(Money): pass
+        class Quantity:
+            def __init__(self, v): self.v = v
+            def __sign__(self): return self.v
+        class Broken:
+            def __sign__(self): raise RuntimeError("Boom!")
+
+        # --- register
+        s_cnt += 1; prev_counter = counter
+        try:
+            register(Money, 'cents')
+            self.assertEqual([sign(Money(c)) for c in (-5, 0, 5)], [-1, 0, 1]); counter += 1
+            self.assertEqual(sign(Euro(-3), 2), 1); counter += 1
+            self.assertEqual(fastsign(Money(10**30)), 1); counter += 1
+            with self.assertRaisesRegex(TypeError, r"the sign implementation of type 'Money' returned 'str', not a number"):
+                sign(Money('a'))
+            counter += 1
+            register(Money, lambda m: m.cents / 100)
+            self.assertTrue(isnan(sign(Money(nan)))); counter += 1
+            self.assertEqual(sign(Money(nan), 2), 4); counter += 1
+            self.assertEqual(sign_many([Money(-1), Euro(1), 'x'], 2), [1, 3, 0]); counter += 1
+            self.assertEqual(sign(Money('a'), if_exc=('E',)), 'E'); counter += 1
+        finally:
+            register(Money, None)
+        self.assertEqual(sign(Money(5), 2), 0); counter += 1 # Unregistered: no comparisons
+        self.buffer.append(trace(prev_counter, counter, s_cnt, what="register"))
+
+        # --- __sign__ protocol
+        s_cnt += 1; prev_counter = counter
+        self.assertEqual(sign(Quantity(-2.5)), -1); counter += 1
+        self.assertEqual(sign(Quantity(Decimal('-NaN')), 2), 4); counter += 1
+        self.assertEqual(sign(Quantity(Fraction(0)), 10), 10); counter += 1
+        q = Quantity(1); q.__sign__ = lambda: -1 # Special methods are looked up on the type
+        self.assertEqual(sign(q), 1); counter += 1
+        Quantity.__sign__ = lambda self: -self.v
+        self.assertEqual(sign(Quantity(1)), -1); counter += 1
+        register(Quantity, lambda x: 0)
+        self.assertEqual(sign(Quantity(1)), 0); counter += 1 # Registration takes precedence
+        register(Quantity, None)
+        with self.assertRaisesRegex(TypeError, r"Cause: Boom!"):
+            sign(Broken())
+        counter += 1
+        with self.assertRaisesRegex(RuntimeError, r"Boom!"):
+            fastsign(Broken())
+        counter += 1
+        self.buffer.append(trace(prev_counter, counter, s_cnt, what="__sign__"))
+
+        # --- errors
+        s_cnt += 1; prev_counter = counter
+        with self.assertRaisesRegex(TypeError, r"signum\.register\(\): the 1st argument must be a type, not 'int'"):
+            register(1, 'a')
+        counter += 1
+        with self.assertRaisesRegex(TypeError, r"the 2nd argument must be callable, an attribute name, or None"):
+            register(Money, 1)
+        counter += 1
+        with self.assertRaisesRegex(TypeError, r"takes exactly 2 positional arguments, got 1"):
+            register(Money)
+        counter += 1
+        self.buffer.append(trace(prev_counter, counter, s_cnt, what="register errors"))
+
+        self.buffer.append(f'\n{success(counter, s_cnt=s_cnt)}\n')
+        print('\n'.join(self.buffer), flush=True)
+
+    def test_register_zero(self):
+        self.buffer = []
+        s_cnt = 0
+        counter = 0
+
+        class Delta(timedelta): pass
+        class Vector:
+            def __init__(self, v): self.v = v
+            def __gt__(self, other): return self.v > other.v
+            def __lt__(self, other): return self.v < other.v
+            def __eq__(self, other): return self.v == other.v
+
+        # --- default zeros
+        s_cnt += 1; prev_counter = counter
+        self.assertEqual(sign(timedelta(hours=-3)), -1); counter += 1
+        self.assertEqual(sign(Delta(0), 2), 2); counter += 1
+        self.assertEqual(fastsign(timedelta(microseconds=1)), 1); counter += 1
+        self.assertEqual(sign_many([timedelta(-1), timedelta(0), timedelta(1)]), [-1, 0, 1]); counter += 1
+        class SubDecimal(Decimal): pass
+        self.assertEqual(sign(SubDecimal('-0.5')), -1); counter += 1
+        self.assertTrue(isnan(sign(SubDecimal('NaN')))); counter += 1
+        self.buffer.append(trace(prev_counter, counter, s_cnt, what="default zeros"))
+
+        # --- registered zeros
+        s_cnt += 1; prev_counter = counter
+        self.assertEqual(sign(Vector(1), if_exc=('E',)), 'E'); counter += 1 # Vector can't be compared with int
+        try:
+            register_zero(Vector, Vector(0))
+            self.assertEqual([sign(Vector(v)) for v in (-2, 0, 2)], [-1, 0, 1]); counter += 1
+            self.assertEqual(fastsign(Vector(-2)), -1); counter += 1
+            register_zero(Vector, Vector(10))
+            self.assertEqual(sign(Vector(5)), -1); counter += 1 # Registration changes the cached strategy
+        finally:
+            register_zero(Vector, None)
+        self.assertEqual(sign(Vector(1), 2), 0); counter += 1
+        self.buffer.append(trace(prev_counter, counter, s_cnt, what="registered zeros"))
+
+        # --- errors
+        s_cnt += 1; prev_counter = counter
+        with self.assertRaisesRegex(TypeError, r"signum\.register_zero\(\): the 1st argument must be a type, not 'int'"):
+            register_zero(0, 0)
+        counter += 1
+        with self.assertRaisesRegex(TypeError, r"takes exactly 2 positional arguments, got 3"):
+            register_zero(Vector, 0, 0)
+        counter += 1
+        self.buffer.append(trace(prev_counter, counter, s_cnt, what="register_zero errors"))
+
+        self.buffer.append(f'\n{success(counter, s_cnt=s_cnt)}\n')
+        print('\n'.join(self.buffer), flush=True)
+
+    def test_register_invalid(self):
+        self.buffer = []
+        s_cnt = 0
+        counter = 0
+
+        class Opaque:
+            calls = 0
+            def __init__(self, v): self.v = v
+            def __float__(self): Opaque.calls += 1; return float(self.v)
+            def __lt__(self, other): Opaque.calls += 1; return self.v < other
+            def __gt__(self, other): Opaque.calls += 1; return self.v > other
+            def __eq__(self, other): Opaque.calls += 1; return self.v == other
+        class SubOpaque(Opaque): pass
+        class Plain: pass
+
+        # --- learned invalid types
+        s_cnt += 1; prev_counter = counter
+        for x in (None, 'abc', [1], {}, set(), Plain()):
+            for _ in range(2): # Probed, then cached
+                self.assertEqual(sign(x, if_exc=('E',)), 'E'); counter += 1
+                self.assertEqual(sign(x, 2), 0); counter += 1
+                self.assertEqual(sign_many([x], if_exc=('E',), fast=True), ['E']); counter += 1
+                with self.assertRaisesRegex(SignError, r"Cause: '<' not supported between instances of "
+                                                       f"'{type(x).__name__}' and 'int'"):
+                    sign(x)
+                counter += 1
+                with self.assertRaises(TypeError):
+                    fastsign(x)
+                counter += 1
+        self.assertEqual(sign_counts([None, 'a', -1, [], 2.5, nan]), (3, 1, 0, 1, 1)); counter += 1
+        Plain.__gt__ = lambda self, other: True # Modification invalidates the learned strategy
+        Plain.__lt__ = lambda self, other: False
+        self.assertEqual(sign(Plain()), 1); counter += 1
+        self.buffer.append(trace(prev_counter, counter, s_cnt, what="learned invalid types"))
+
+        # --- declared invalid types
+        s_cnt += 1; prev_counter = counter
+        self.assertEqual(sign(Opaque(-3)), -1); counter += 1
+        try:
+            register_invalid(Opaque)
+            Opaque.calls = 0
+            self.assertEqual(sign(Opaque(-3), 2), 0); counter += 1
+            self.assertEqual(sign(SubOpaque(5), if_exc=(None,)), None); counter += 1
+            self.assertEqual(sign_many([Opaque(1), 1], if_exc=('E',)), ['E', 1]); counter += 1
+            with self.assertRaisesRegex(SignError, r"Cause: type 'Opaque' is registered as invalid"):
+                sign(Opaque(1))
+            counter += 1
+            with self.assertRaisesRegex(SignError, r"Cause: type 'SubOpaque' is registered as invalid"):
+                fastsign(SubOpaque(1))
+            counter += 1
+            self.assertEqual(Opaque.calls, 0); counter += 1 # Neither '__float__' nor comparisons are called
+            register(SubOpaque, lambda x: x.v) # The nearest registration wins
+            self.assertEqual(sign(SubOpaque(5)), 1); counter += 1
+            register(SubOpaque, None)
+            self.assertEqual(sign(1.5), 1); counter += 1 # Exact types keep their fast paths
+        finally:
+            register_invalid(Opaque, False)
+        self.assertEqual(sign(Opaque(-3)), -1); counter += 1
+        register_invalid(Opaque, False) # Unregistering twice is harmless
+        self.assertEqual(sign(SubOpaque(0)), 0); counter += 1
+        self.buffer.append(trace(prev_counter, counter, s_cnt, what="declared invalid types"))
+
+        # --- errors
+        s_cnt += 1; prev_counter = counter
+        with self.assertRaisesRegex(TypeError, r"signum\.register_invalid\(\): the 1st argument must be a type, not 'int'"):
+            register_invalid(0)
+        counter += 1
+        with self.assertRaisesRegex(TypeError, r"takes 1 or 2 positional arguments, got 0"):
+            register_invalid()
+        counter += 1
+        self.buffer.append(trace(prev_counter, counter, s_cnt, what="register_invalid errors"))
+
+        self.buffer.append(f'\n{success(counter, s_cnt=s_cnt)}\n')
+        print('\n'.join(self.buffer), flush=True)
+
+    def test_preprocessors(self):
+        self.buffer = []
+        s_cnt = 0
+        counter = 0
+        values = [-1e-8, -1e-10, -0.0, 0, 1e-10, 3, -3, 10**30, 0.005, -0.015, 0.0051, 2.675,
+                  nan, inf, -inf, Decimal('-1E-12'), Fraction(1, 300), 149, 151, 'x', None]
+
+        # --- deadband and rel_deadband: the same as the lambda of the README
+        s_cnt += 1; prev_counter = counter
+        for eps in (1e-9, 5, Decimal('0.01'), 0):
+            p = deadband(eps)
+            lam = lambda a: (0 if abs(a) < eps else a,)
+            for x in values:
+                self.assertEqual(repr(sign(x, preprocess=p, if_exc=('E',))),
+                                 repr(sign(x, preprocess=lam, if_exc=('E',)))); counter += 1
+        p = rel_deadband(-100, 1e-3)
+        self.assertEqual([sign(x, preprocess=p) for x in (0.09, -0.11, 0.2)], [0, -1, 1]); counter += 1
+        self.assertEqual(sign_many([1e-12, -1, nan], 2, preprocess=deadband(1e-9)), [2, 1, 4]); counter += 1
+        self.buffer.append(trace(prev_counter, counter, s_cnt, what="deadband and rel_deadband"))
+
+        # --- round_to: the sign of round(x, ndigits)
+        s_cnt += 1; prev_counter = counter
+        for n in (-2, 0, 1, 2, 400, -400):
+            p = round_to(n)
+            lam = lambda a: (round(a, n),)
+            for x in values:
+                self.assertEqual(repr(sign(x, preprocess=p, if_exc=('E',))),
+                                 repr(sign(x, preprocess=lam, if_exc=('E',)))); counter += 1
+        self.buffer.append(trace(prev_counter, counter, s_cnt, what="round_to"))
+
+        # --- Python protocol, repr, errors
+        s_cnt += 1; prev_counter = counter
+        self.assertEqual(deadband(1e-9)(1e-10), (0,)); counter += 1
+        self.assertIsNone(deadband(1e-9)(1.0)); counter += 1
+        self.assertEqual(round_to(2)(0.004), (0.0,)); counter += 1
+        self.assertEqual(repr(rel_deadband(100, 0.5)), 'signum.rel_deadband(100, 0.5)'); counter += 1
+        with self.assertRaisesRegex(ValueError, r"signum\.deadband\(\): the threshold must be non-negative"):
+            deadband(-1)
+        counter += 1
+        with self.assertRaisesRegex(TypeError, r"signum\.deadband\(\): the threshold must be a real number, not 'str'"):
+            deadband('a')
+        counter += 1
+        with self.assertRaisesRegex(TypeError, r"signum\.round_to\(\): 'ndigits' must be an integer, not 'float'"):
+            round_to(2.0)
+        counter += 1
+        with self.assertRaises(TypeError):
+            type(deadband(1))()
+        counter += 1
+        self.buffer.append(trace(prev_counter, counter, s_cnt, what="protocol and errors"))
+
+        self.buffer.append(f'\n{success(counter, s_cnt=s_cnt)}\n')
+        print('\n'.join(self.buffer), flush=True)
+
+    def test_sign_text(self):
+        self.buffer = []
+        s_cnt = 0
+        counter = 0
+
+        # --- sign_text agrees with float() where float() is exact
+        s_cnt += 1; prev_counter = counter
+        for s in ('0', '-0', '+0.0', '.5', '-5.', '1_000', '-1e5', '2.5E-3', ' 7 ', '\t-3\n', '00012',
+                  'inf', '-Infinity', 'nan', '-NaN'):
+            self.assertEqual(repr(sign_text(s)), repr(sign(float(s)))); counter += 1
+            self.assertEqual(repr(sign_text(s.encode())), repr(sign(float(s)))); counter += 1
+        self.buffer.append(trace(prev_counter, counter, s_cnt, what="sign_text vs float"))
+
+        # --- exactness and invalid text
+        s_cnt += 1; prev_counter = counter
+        self.assertEqual(sign_text('1e-400'), 1); counter += 1
+        self.assertEqual(sign_text('-0.0000001e-999'), -1); counter += 1
+        self.assertEqual(sign_text('0e999'), 0); counter += 1
+        self.assertEqual(sign_text(bytearray(b'-12')), -1); counter += 1
+        for s in ('', ' ', '.', '-', 'e5', '1e', '1..2', '1_', '_1', '1__0', '1 2', '0x10', 'nan1', '+-1', '٣'):
+            self.assertEqual(sign_text(s, 2), 0); counter += 1
+        self.assertEqual(sign_text('x', if_exc=('E',)), 'E'); counter += 1
+        self.assertEqual(sign_text(None, 10), 8); counter += 1
+        with self.assertRaisesRegex(ValueError, r"signum\.sign_text\(\): invalid numeric text '1\.\.2'"):
+            sign_text('1..2')
+        counter += 1
+        with self.assertRaisesRegex(TypeError, r"expected str, bytes, or bytearray, not 'float'"):
+            sign_text(1.0)
+        counter += 1
+        self.buffer.append(trace(prev_counter, counter, s_cnt, what="exact and invalid text"))
+
+        # --- sign_column
+        s_cnt += 1; prev_counter = counter
+        text = 'id,value\n1,-2\n2,0\n3,1e-999\n4,\n5\n6,"-8"\n7, nan \r\n'
+        self.assertEqual(sign_column(io.StringIO(text), 1, skip=1).tolist(), [-1, 0, 1, -2, -2, -1, 2]); counter += 1
+        self.assertEqual(sign_column(io.BytesIO(text.encode()), column=0, skip=1, codeshift=2).tolist(),
+                         [3, 3, 3, 3, 3, 3, 3]); counter += 1
+        self.assertEqual(sign_column([b'1 2  -3', b' 0 x 5 '], 2, None).tolist(), [-1, 1]); counter += 1
+        self.assertEqual(sign_column(['1;;2', '1::-2'], 2, ';').tolist(), [1, -2]); counter += 1
+        self.assertEqual(sign_column(iter(['1::-2']), 1, '::').tolist(), [-1]); counter += 1
+        self.assertEqual(sign_column([]).tolist(), []); counter += 1
+        with self.assertRaisesRegex(TypeError, r"lines must be str or bytes, not 'int'"):
+            sign_column([1])
+        counter += 1
+        with self.assertRaisesRegex(TypeError, r"'delimiter' must be a non-empty str or bytes, or None"):
+            sign_column(['1'], 0, '')
+        counter += 1
+        with self.assertRaisesRegex(ValueError, r"'column' and 'skip' must be non-negative"):
+            sign_column(['1'], -1)
+        counter += 1
+        self.buffer.append(trace(prev_counter, counter, s_cnt, what="sign_column"))
+
+        self.buffer.append(f'\n{success(counter, s_cnt=s_cnt)}\n')
+        print('\n'.join(self.buffer), flush=True)
+
+    def test_signer(self):
+        self.buffer = []
+        s_cnt = 0
+        counter = 0
+        values = [-2, 0, 3.5, nan, -inf, Decimal('-0.1'), Fraction(1, 3), 1e-12, 'x', None, [1]]
+
+        def pp(x): return (x,) if isinstance(x, str) else None
+        def same(a, b): return repr(a) == repr(b) # NaN results too
+
+        # --- the same results as 'sign' and 'fastsign'
+        s_cnt += 1; prev_counter = counter
+        for cs, ie, p in ((None, None, None), (2, None, None), (None, ('E',), pp), (-1, (None,), deadband(1e-9)),
+                          (5, None, round_to(2))):
+            kwargs = {k: v for k, v in (('if_exc', ie), ('preprocess', p)) if v is not None}
+            s = Signer(cs, ie, p)
+            for x in values:
+                expected = message = None
+                try:
+                    expected = sign(x, cs, **kwargs) if cs is not None else sign(x, **kwargs)
+                except TypeError as e:
+                    message = str(e)
+                if message is None:
+                    self.assertTrue(same(s(x), expected), (cs, ie, p, x)); counter += 1
+                else:
+                    with self.assertRaises(SignError) as cm:
+                        s(x)
+                    self.assertEqual(str(cm.exception), message); counter += 1
+        s = Signer(mode='fast')
+        for x in values[:8]:
+            self.assertTrue(same(s(x), fastsign(x))); counter += 1
+        self.buffer.append(trace(prev_counter, counter, s_cnt, what="Signer results"))
+
+        # --- attributes, repr and pickling
+        s_cnt += 1; prev_counter = counter
+        s = Signer(codeshift=2, if_exc=(None,), preprocess=deadband(0.5), mode='fast')
+        self.assertEqual((s.codeshift, s.if_exc, s.mode), (2, (None,), 'fast')); counter += 1
+        self.assertEqual(repr(s), "signum.Signer(codeshift=2, if_exc=(None,), preprocess=signum.deadband(0.5), "
+                                  "mode='fast')"); counter += 1
+        for obj in (s, Signer(), Signer(None, ('E',), rel_deadband(2, 0.1)), round_to(3)):
+            t = pickle.loads(pickle.dumps(obj))
+            self.assertEqual(repr(t), repr(obj)); counter += 1
+            self.assertEqual([t(x) for x in (-1, 0.25, 7)], [obj(x) for x in (-1, 0.25, 7)]); counter += 1
+        self.assertEqual(list(map(Signer(2), [-3, 0, 3])), [1, 2, 3]); counter += 1
+        self.buffer.append(trace(prev_counter, counter, s_cnt, what="Signer attributes and pickling"))
+
+        # --- errors
+        s_cnt += 1; prev_counter = counter
+        for args, kwargs, exc in (((), {'mode': 'slow'}, ValueError), (('2',), {}, TypeError),
+                                  ((), {'if_exc': ()}, TypeError), ((), {'if_exc': 5}, TypeError),
+                                  ((), {'preprocess': 5}, TypeError), ((), {'speed': 1}, TypeError)):
+            with self.assertRaises(exc):
+                Signer(*args, **kwargs)
+            counter += 1
+        with self.assertRaisesRegex(TypeError, r"takes exactly 1 positional argument \(2 given\)"):
+            Signer()(1, 2)
+        counter += 1
+        with self.assertRaisesRegex(TypeError, r"takes exactly 1 positional argument \(2 given\)"):
+            Signer()(1, codeshift=2)
+        counter += 1
+        self.buffer.append(trace(prev_counter, counter, s_cnt, what="Signer errors"))
+
+        self.buffer.append(f'\n{success(counter, s_cnt=s_cnt)}\n')
+        print('\n'.join(self.buffer), flush=True)
+
+    def test_threads(self):
+        self.buffer = []
+        s_cnt = 0
+        counter = 0
+        values = [-5, 0, 7.5, nan, Fraction(-1, 3), Decimal('2.5'), True, timedelta(-1), None, 'x']
+        expected = [sign(x, 2) for x in values]
+
+        class Money:
+            def __init__(self, cents): self.cents = cents
+
+        # --- concurrent calls, registrations, and a shared iterator
+        s_cnt += 1; prev_counter = counter
+        results, errors, taken = [], [], []
+        it = isign(range(-4000, 4000))
+        def worker(k):
+            try:
+                for i in range(200):
+                    results.append([sign(x, 2) for x in values] == expected)
+                    if k == 0: # Registrations invalidate the caches of all threads
+                        register(Money, 'cents' if i % 2 else None)
+                    results.append(sign(Money(-1), 2, if_exc=(-1,)) in (1, -1)) # Registered or invalid
+                    taken.extend(islice(it, 10))
+            except Exception as e:
+                errors.append(e)
+        threads = [threading.Thread(target=worker, args=(k,)) for k in range(4)]
+        for t in threads: t.start()
+        for t in threads: t.join()
+        register(Money, None)
+        self.assertEqual(errors, []); counter += 1
+        self.assertTrue(all(results)); counter += 1
+        self.assertEqual(len(results), 1600); counter += 1
+        self.assertEqual((len(taken), taken.count(0), sum(taken)), (8000, 1, -1)); counter += 1 # Each item once
+        self.assertEqual(list(it), []); counter += 1
+        self.buffer.append(trace(prev_counter, counter, s_cnt, what="threads"))
+
+        self.buffer.append(f'\n{success(counter, s_cnt=s_cnt)}\n')
+        print('\n'.join(self.buffer), flush=True)
+
+    @unittest.skipIf(subinterpreters is None, "no subinterpreter support")
+    def test_interpreters(self):
+        self.buffer = []
+        s_cnt = 0
+        counter = 0
+
+        # --- each interpreter has its own registries
+        s_cnt += 1; prev_counter = counter
+        register(complex, 'imag')
+        interp = subinterpreters.create()
+        try:
+            run = getattr(subinterpreters, 'run_string', None) or subinterpreters.exec
+            run(interp, """if True:
+                from signum import sign, sign_many, register, Signer
+                from fractions import Fraction
+                assert sign(-1j, if_exc=('E',)) == 'E' # Not registered here
+                register(complex, 'real')
+                assert sign(5 - 1j) == 1
+                assert sign_many([Fraction(-1, 3), 0, 2.5]) == [-1, 0, 1]
+                assert list(map(Signer(2), [-1, 0, 1])) == [1, 2, 3]
+            """)
+            counter += 1
+            self.assertEqual(sign(5 - 1j), -1); counter += 1 # The registration of the subinterpreter is not seen
+            run(interp, "assert sign(5 - 1j) == 1"); counter += 1
+        finally:
+            subinterpreters.destroy(interp)
+            register(complex, None)
+        self.assertEqual(sign(-1j, if_exc=('E',)), 'E'); counter += 1
+        self.buffer.append(trace(prev_counter, counter, s_cnt, what="interpreters"))
+
+        self.buffer.append(f'\n{success(counter, s_cnt=s_cnt)}\n')
+        print('\n'.join(self.buffer), flush=True)
+
+    def test_stats(self):
+        self.buffer = []
+        s_cnt = 0
+        counter = 0
+        if not stats():
+            self.skipTest('built with SIGNUM_STATS=0')
+
+        class NaNSubclass(float): pass
+
+        def explode(x): raise ValueError(x)
+
+        stats(True, enable=True)
+        try:
+            # --- exit paths of sign and fastsign
+            s_cnt += 1; prev_counter = counter
+            sign(5); sign(nan)
+            sign(None, 2); sign(None, if_exc=(0,))
+            sign(MyNumber(3)); sign(MyNumber(nan), 2); sign(NaNSubclass(nan)) # The probe: identical, so not NaN
+            fastsign(2.5); fastsign(MyNumber(-1))
+            sign(1, preprocess=lambda x: (x, 'r')); sign(0.05, preprocess=deadband(0.1)); sign(-1, preprocess=explode)
+            with self.assertRaises(SignError) as cm:
+                sign('a')
+            str(cm.exception)
+            res = stats(True)
+            cache = res.pop('cache.hit') + res.pop('cache.miss')
+            self.assertGreaterEqual(cache, 5); counter += 1
+            self.assertEqual({k: v for k, v in res.items() if v},
+                             {'sign.exact': 3, 'sign.known_invalid': 3, 'sign.nan_shortcut': 1, 'sign.triple_check': 2,
+                              'sign.nan_probe': 1, 'fastsign.exact': 1, 'fastsign.compare': 1,
+                              'preprocess.decided': 1, 'preprocess.result': 1, 'preprocess.error': 1, 'if_exc': 1,
+                              'codeshift_error': 2, 'error.raised': 1, 'error.rendered': 1}); counter += 1
+            self.buffer.append(trace(prev_counter, counter, s_cnt, what="stats: exit paths"))
+
+            # --- reset, threads, switching off
+            s_cnt += 1; prev_counter = counter
+            self.assertEqual(set(stats().values()), {0}); counter += 1 # Reset
+            threads = [threading.Thread(target=lambda: [sign(i) for i in range(100)]) for _ in range(4)]
+            for t in threads: t.start()
+            for t in threads: t.join()
+            sign_many([1, 2, 3])
+            self.assertEqual(stats()['sign.exact'], 403); counter += 1 # Finished threads are kept
+            self.assertEqual(stats()['sign.exact'], 403); counter += 1 # Reading does not reset
+            stats(enable=False)
+            sign(7)
+            self.assertEqual(stats(True)['sign.exact'], 403); counter += 1
+            with self.assertRaises(TypeError):
+                stats(True, False)
+            counter += 1
+            self.buffer.append(trace(prev_counter, counter, s_cnt, what="stats: reset and threads"))
+        finally:
+            stats(True, enable=False)
+
+        self.buffer.append(f'\n{success(counter, s_cnt=s_cnt)}\n')
+        print('\n'.join(self.buffer), flush=True)
+
+    def test_profile(self):
+        self.buffer = []
+        s_cnt = 0
+        counter = 0
+
+        profile(True, rate=1)
+        try:
+            # --- samples by type and option set
+            s_cnt += 1; prev_counter = counter
+            for _ in range(10): sign(2.5)
+            for _ in range(5): sign(MyNumber(3), 2)
+            for _ in range(3): fastsign(1)
+            sign_many([None] * 4, if_exc=(0,))
+            to_zero = Signer(preprocess=deadband(0.1))
+            to_zero(0.05); to_zero(-0.05)
+            rows = profile(True, rate=0)
+            self.assertEqual({(r['type'], r['options']): r['samples'] for r in rows},
+                             {(float, '-'): 10, (MyNumber, 'codeshift'): 5, (int, 'fastsign'): 3,
+                              (type(None), 'if_exc'): 4, (float, 'native preprocess'): 2}); counter += 1
+            for r in rows:
+                self.assertEqual(sum(n for _, n in r['histogram']), r['samples']); counter += 1
+                self.assertTrue(r['p50_ns'] <= r['p90_ns'] <= r['p99_ns'] <= r['max_ns']); counter += 1
+            self.assertAlmostEqual(sum(r['share'] for r in rows), 1.0); counter += 1
+            self.assertEqual(rows, sorted(rows, key=lambda r: -r['share'])); counter += 1 # Most total time first
+            self.assertEqual(profile(), []); counter += 1 # Reset
+            self.buffer.append(trace(prev_counter, counter, s_cnt, what="profile: types and options"))
+
+            # --- bounded state, sampling rate, table
+            s_cnt += 1; prev_counter = counter
+            profile(rate=1)
+            for i in range(100):
+                sign(type(f'Opaque{i}', (), {})(), 2)
+            rows = profile(True, rate=0)
+            self.assertEqual(len(rows), 64); counter += 1
+            self.assertEqual(sum(r['samples'] for r in rows), 100); counter += 1
+            shared = [r['samples'] for r in rows if r['type'] is None and r['options'] == '*']
+            self.assertEqual(shared, [37]); counter += 1 # 63 slots for pairs, the last one for the others
+            profile(rate=10)
+            for _ in range(10000): sign(1)
+            self.assertTrue(800 <= profile(True, rate=0)[0]['samples'] <= 1250); counter += 1 # About 1 call in 10
+            profile(rate=1)
+            sign(MyNumber(1))
+            table = profile_table(True, rate=0)
+            self.assertIn('testing.MyNumber', table); counter += 1
+            self.assertIn('1 samples; sampling is off', table); counter += 1
+            for rate in (-1, 2**31):
+                with self.assertRaises(ValueError):
+                    profile(rate=rate)
+                counter += 1
+            self.buffer.append(trace(prev_counter, counter, s_cnt, what="profile: bounds, rate, table"))
+        finally:
+            profile(True, rate=0)
+
+        self.buffer.append(f'\n{success(counter, s_cnt=s_cnt)}\n')
+        print('\n'.join(self.buffer), flush=True)
+
+    def test_sign_error(self):
+        self.buffer = []
+        s_cnt = 0
+        counter = 0
+
+        class Silent:
+            def __repr__(self): raise RuntimeError("No repr")
+
+        # --- attributes and lazy message
+        s_cnt += 1; prev_counter = counter
+        with self.assertRaises(SignError) as cm:
+            sign([1, 2])
+        e = cm.exception
+        self.assertIsInstance(e, TypeError); counter += 1
+        self.assertEqual(e.obj, [1, 2]); counter += 1
+        self.assertIsInstance(e.cause, TypeError); counter += 1
+        self.assertEqual(str(e), "signum.sign: invalid argument `[1, 2]` (type 'list'). "
+                                 "Cause: '<' not supported between instances of 'list' and 'int'"); counter += 1
+        self.assertIs(str(e), str(e)); counter += 1 # Rendered once
+        with self.assertRaisesRegex(SignError, r"invalid argument `\?\?\?` \(type 'Silent'\)"):
+            sign(Silent())
+        counter += 1
+        with self.assertRaises(SignError) as cm:
+            fastsign('a')
+        self.assertEqual(str(cm.exception), "signum.fastsign(): cannot compare or check for NaN. "
+                                            "Cause: comparison with 'int' not implemented for type 'str'"); counter += 1
+        self.assertIsNone(cm.exception.cause); counter += 1
+        self.buffer.append(trace(prev_counter, counter, s_cnt, what="SignError"))
+
+        # --- construction and pickling
+        s_cnt += 1; prev_counter = counter
+        e = SignError('x', ValueError('bad'))
+        self.assertEqual(str(e), "signum.sign: invalid argument `'x'` (type 'str'). Cause: bad"); counter += 1
+        e = pickle.loads(pickle.dumps(e))
+        self.assertEqual((e.obj, str(e.cause)), ('x', 'bad')); counter += 1
+        self.assertEqual(str(SignError(None)), "signum.sign: invalid argument `None`. Type 'NoneType' does not "
+                                               "support order comparisons (>, <, ==) or NaN detection."); counter += 1
+        with self.assertRaises(TypeError):
+            SignError()
+        counter += 1
+        self.buffer.append(trace(prev_counter, counter, s_cnt, what="construction and pickling"))
+
+        self.buffer.append(f'\n{success(counter, s_cnt=s_cnt)}\n')
+        print('\n'.join(self.buffer), flush=True)
+
 if __name__ == '__main__':
     # Switch sys.stdout and sys.stderr to 'utf-8' encoding
     outflows = OutputUTF8()
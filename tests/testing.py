@@ -55,6 +55,10 @@ MAX_PASSES = {
     'fastsign_41_tests': 100000,
     'fastsign_57_tests': 100000,
     'leak_test':        1000000,
+    'types_benchmark':   100000,
+    'threads_benchmark':   2000,
+    'interpreters_benchmark': 1000,
+    'file_benchmark':      1000,
     'default':             1000,
 }
 
@@ -0,0 +1,113 @@
+from signum import sign, fastsign, sign_many, sign_buffer, sign_counts, Signer, __simd__
+from testing import get_passes, set_high_priority, success, OutputUTF8
+
+from array import array
+from decimal import Decimal
+from fractions import Fraction
+from math import nan, inf
+import os
+import sys
+import threading
+import time
+
+MAX_PASSES = get_passes(__file__)
+
+# A mixed workload: exact fast paths, the strategy cache, invalid arguments
+DATA = [-5, 0, 7.5, nan, Fraction(-1, 3), Decimal('2.5'), True, 10**30, None, 'x'] * 10
+VALID = [x for x in DATA if isinstance(x, (int, float, Fraction, Decimal))]
+
+to_code = Signer(2, if_exc=(-2,))
+
+# (name, work of one thread)
+CASES = [
+    ('sign loop',     lambda: [sign(x, 2, if_exc=(-2,)) for x in DATA]),
+    ('Signer map',    lambda: list(map(to_code, DATA))),
+    ('fastsign loop', lambda: [fastsign(x) for x in VALID]),
+    ('sign_many',     lambda: sign_many(DATA, 2, if_exc=(-2,))),
+]
+
+# Native threads of the buffer kernels (the 'threads=' argument): one call on a large buffer
+BIG = array('d', [-2.5, 0.0, 7.0, nan, -0.0, 1e300, -1e-300, 4.0]) * 2_500_000
+BIG_W = array('d', [1.5]) * len(BIG)
+OUT = array('b', bytes(len(BIG)))
+KERNELS = [
+    ('sign_buffer',            lambda t: sign_buffer(BIG, OUT, threads=t)),
+    ('sign_counts',            lambda t: sign_counts(BIG, threads=t)),
+    ('sign_counts, weighted',  lambda t: sign_counts(BIG, BIG_W, threads=t)),
+]
+
+def kernel_rate(kernel, n_threads):
+    """Items per second of 'kernel' with 'threads=n_threads', best of a few calls"""
+    best = inf
+    for _ in range(max(3, MAX_PASSES // 400)):
+        start = time.perf_counter()
+        kernel(n_threads)
+        best = min(best, time.perf_counter() - start)
+    return len(BIG) / best
+
+def throughput(work, n_threads):
+    """Calls per second of 'n_threads' threads, each doing 'work' MAX_PASSES times (weak scaling)"""
+    barrier = threading.Barrier(n_threads + 1)
+    def worker():
+        barrier.wait()
+        for _ in range(MAX_PASSES):
+            work()
+        barrier.wait()
+
+    threads = [threading.Thread(target=worker) for _ in range(n_threads)]
+    for t in threads:
+        t.start()
+    barrier.wait()
+    start = time.perf_counter()
+    barrier.wait()
+    elapsed = time.perf_counter() - start
+    for t in threads:
+        t.join()
+    return n_threads * MAX_PASSES * len(work()) / elapsed
+
+if __name__ == "__main__":
+    # Switch sys.stdout and sys.stderr to 'utf-8' encoding
+    outflows = OutputUTF8()
+    outflows.set_utf8()
+
+    print(f'***** Test: {__file__}')
+    print(f'MAX_PASSES: {MAX_PASSES}')
+    print(f'*** {set_high_priority()} ***\n')
+
+    gil = getattr(sys, '_is_gil_enabled', lambda: True)()
+    cpus = os.cpu_count() or 1
+    print(f"Python {sys.version.split()[0]}, GIL {'enabled' if gil else 'disabled'}, {cpus} CPUs")
+    if gil:
+        print('With the GIL, threads share one core: expect no scaling. Use a free-threaded build (3.13t+).')
+
+    thread_counts = sorted({1, 2, 4, 8, 16, cpus} & set(range(1, cpus + 1)))
+    counter = 0
+    for name, work in CASES:
+        work() # Warm up the caches of the main thread
+        print(f"\n{name}")
+        print(f"{'Threads':>7} | {'Mcalls/s':>9} | {'Speedup':>7} | {'Efficiency':>10}")
+        print("-" * 42)
+        base = None
+        for n in thread_counts:
+            rate = throughput(work, n)
+            base = base or rate
+            counter += 1
+            print(f"{n:>7} | {rate / 1e6:>9.2f} | {rate / base:>6.2f}x | {rate / base / n:>9.0%}")
+
+    print(f"\nNative threads of the buffer kernels, {len(BIG):,} float64 items (the GIL is released, SIMD: {__simd__})")
+    for name, kernel in KERNELS:
+        kernel(None) # Warm up: page faults of the output
+        print(f"\n{name}")
+        print(f"{'threads':>7} | {'Mitems/s':>9} | {'Speedup':>7} | {'Efficiency':>10}")
+        print("-" * 42)
+        base = None
+        for n in thread_counts:
+            rate = kernel_rate(kernel, n)
+            base = base or rate
+            counter += 1
+            print(f"{n:>7} | {rate / 1e6:>9.0f} | {rate / base:>6.2f}x | {rate / base / n:>9.0%}")
+
+    print(f'\n{success(counter, passes=MAX_PASSES)}')
+
+    # Restore stdout and stderr
+    outflows.reset_from_utf8()
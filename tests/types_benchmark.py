@@ -0,0 +1,59 @@
+from signum import sign
+from testing import get_passes, set_high_priority, success, OutputUTF8
+
+from decimal import Decimal
+from fractions import Fraction
+from math import nan
+import time
+
+MAX_PASSES = get_passes(__file__)
+
+# Subclasses are never taken by the exact-type fast paths: they measure the Triple Check for the same values
+class SubInt(int): pass
+class SubFloat(float): pass
+class SubFraction(Fraction): pass
+class SubDecimal(Decimal): pass
+
+# (type name, exact values, the same values through the Triple Check)
+CASES = [
+    ('int',      [-5, 0, 5, 10**1000],                   [SubInt(-5), SubInt(0), SubInt(5), SubInt(10**1000)]),
+    ('bool',     [True, False],                          [SubInt(1), SubInt(0)]),
+    ('float',    [-5.5, 0.0, 5.5, nan],                  [SubFloat(-5.5), SubFloat(0.0), SubFloat(5.5), SubFloat(nan)]),
+    ('Fraction', [Fraction(-5, 2), Fraction(0), Fraction(1, 1 << 2000)],
+                 [SubFraction(-5, 2), SubFraction(0), SubFraction(1, 1 << 2000)]),
+    ('Decimal',  [Decimal('-5.5'), Decimal(0), Decimal('5.5'), Decimal('NaN')],
+                 [SubDecimal('-5.5'), SubDecimal(0), SubDecimal('5.5'), SubDecimal('NaN')]),
+]
+
+def ns_per_call(values):
+    start = time.perf_counter()
+    for _ in range(MAX_PASSES):
+        for x in values:
+            sign(x)
+    return (time.perf_counter() - start) / (MAX_PASSES * len(values)) * 1e9
+
+if __name__ == "__main__":
+    # Switch sys.stdout and sys.stderr to 'utf-8' encoding
+    outflows = OutputUTF8()
+    outflows.set_utf8()
+
+    print(f'***** Test: {__file__}')
+    print(f'MAX_PASSES: {MAX_PASSES}')
+    print(f'*** {set_high_priority()} ***\n')
+
+    for _ in range(MAX_PASSES): # Warm up Python
+        sign(1)
+
+    print(f"{'Type':<10} | {'Fast path (ns)':>14} | {'Triple Check (ns)':>17} | {'Speedup':>7}")
+    print("-" * 58)
+    counter = 0
+    for name, exact, generic in CASES:
+        assert [sign(x, 2) for x in exact] == [sign(x, 2) for x in generic] # Same results on both paths
+        t_fast, t_slow = ns_per_call(exact), ns_per_call(generic)
+        counter += len(exact)
+        print(f"{name:<10} | {t_fast:>14.1f} | {t_slow:>17.1f} | {t_slow / t_fast:>6.2f}x")
+
+    print(f'\n{success(counter, passes=MAX_PASSES)}')
+
+    # Restore stdout and stderr
+    outflows.reset_from_utf8()